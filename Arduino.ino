@@ -3,13 +3,35 @@ const int SOLENOID_PIN = 2;
 unsigned long PULSE_DURATION_US = 40000;
 
 volatile bool windowActive = false, contactDetected = false, solenoidActive = false;
+volatile bool contactPending = false;         // Timestamped 'S' waiting to be sent from loop()
+volatile unsigned long contactTime_us = 0;    // micros() captured in the contact interrupt
 volatile unsigned long solenoidStartTime_us = 0;
+bool timestampMode = false;                   // Enabled by the host with 'X' (protocol v1.2.0+)
+bool releaseEvents = false;                   // Enabled by the host with 'E' (protocol v1.3.0+)
+volatile bool releasePending = false;         // Contact made in this window, release not reported yet
+bool releaseOpen = false;                     // Contact currently open while waiting for the release
+unsigned long releaseStart_us = 0;            // micros() when the contact opened
+const unsigned long RELEASE_DEBOUNCE_US = 2000; // Contact must stay open this long to count as released
+
+void writeMicros(unsigned long value) {
+    // Little-endian 32-bit board clock value
+    Serial.write((uint8_t)(value & 0xFF));
+    Serial.write((uint8_t)((value >> 8) & 0xFF));
+    Serial.write((uint8_t)((value >> 16) & 0xFF));
+    Serial.write((uint8_t)((value >> 24) & 0xFF));
+}
 
 void handleContact() {
     if (!windowActive) return;
     if (!contactDetected) {
-        Serial.write('S');
         contactDetected = true;
+        releasePending = releaseEvents;
+        if (timestampMode) {
+            contactTime_us = micros();
+            contactPending = true;
+        } else {
+            Serial.write('S');
+        }
         return;
     }
 }
@@ -18,10 +40,10 @@ void setup() {
     Serial.begin(115200);
     pinMode(CONTACT_PIN, INPUT_PULLUP);
     pinMode(SOLENOID_PIN, OUTPUT);
-    const char* FWV = "1.1.1";
-    
+    const char* FWV = "1.3.0";
+
     attachInterrupt(digitalPinToInterrupt(CONTACT_PIN), handleContact, FALLING);
-    
+
     for (int i = 0; i < 3; i++) {
         digitalWrite(SOLENOID_PIN, HIGH);
         delay(PULSE_DURATION_US / 1000);
@@ -37,18 +59,53 @@ void setup() {
 }
 
 void loop() {
+    if (contactPending) {
+        noInterrupts();
+        unsigned long t = contactTime_us;
+        contactPending = false;
+        interrupts();
+        Serial.write('S');
+        writeMicros(t);
+    }
+
+    // Release event: the contact opened after the pulse and stayed open for the debounce time
+    if (releasePending && !contactPending && !solenoidActive) {
+        unsigned long now = micros();
+        if (digitalRead(CONTACT_PIN) == LOW) {
+            releaseOpen = false;
+        } else if (!releaseOpen) {
+            releaseOpen = true;
+            releaseStart_us = now;
+        } else if (now - releaseStart_us >= RELEASE_DEBOUNCE_US) {
+            releasePending = false;
+            releaseOpen = false;
+            Serial.write('L');
+            if (timestampMode) {
+                writeMicros(releaseStart_us);
+            }
+        }
+    }
+
     if (Serial.available() > 0) {
         char cmd = Serial.read();
-        
+
         // Fast handling of 'D' command for delay test
         if (cmd == 'D') {
-            Serial.write('R');
+            if (timestampMode) {
+                unsigned long t = micros();
+                Serial.write('R');
+                writeMicros(t);
+            } else {
+                Serial.write('R');
+            }
             return; // Exit to avoid further checks
         }
-        
+
         // Other commands are processed as before
         if (cmd == 'T') {
             contactDetected = false;
+            releasePending = false;
+            releaseOpen = false;
             digitalWrite(SOLENOID_PIN, HIGH);
             solenoidStartTime_us = micros();
             solenoidActive = true;
@@ -72,6 +129,16 @@ void loop() {
             int state = digitalRead(CONTACT_PIN);
             Serial.write(state == LOW ? 'H' : 'U');
         }
+        else if (cmd == 'X') {
+            // Switch to timestamped events: 'S' and 'R' are followed by 4 bytes of micros()
+            timestampMode = true;
+            Serial.write('A');
+        }
+        else if (cmd == 'E') {
+            // Report the contact release after each trigger with 'L' (followed by micros() in timestamp mode)
+            releaseEvents = true;
+            Serial.write('A');
+        }
     }
 
     if (solenoidActive && (micros() - solenoidStartTime_us >= PULSE_DURATION_US)) {
@@ -0,0 +1,83 @@
+import os
+import sys
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+import Python as p82
+
+MATCH_TOLERANCE_MS = 1e-9    # Vectorized summary vs OrderStatistics/RunningStats (float summation order only)
+FIELDS = ("filtered_samples", "min", "max", "avg", "jitter", "p50", "p90", "p99", "raw_min", "raw_max", "raw_avg", "raw_jitter")
+
+
+def archived_sessions(count, seed):
+    """Sessions like the result store holds: µs-resolution latencies, different lengths and controllers"""
+    rng = random.Random(seed)
+    sessions = []
+    for _ in range(count):
+        mean, sd = rng.uniform(2.0, 12.0), rng.uniform(0.3, 2.0)
+        length = rng.choice((100, 200, 400, 400, 400))
+        sessions.append([round(max(0.1, rng.gauss(mean, sd) + (rng.uniform(5, 30) if rng.random() < 0.01 else 0.0)), 3)
+                         for _ in range(length)])
+    return sessions
+
+
+def reference_summary(values):
+    """What get_statistics computes for a session (before rounding)"""
+    order_stats = p82.OrderStatistics(p82.ORDER_STATS_LOW_MS, 160.0)
+    running = p82.RunningStats()
+    for value in values:
+        order_stats.add(value)
+        running.add(value)
+    return dict(order_stats.summary(), raw_min=running.min, raw_max=running.max, raw_avg=running.mean, raw_jitter=running.stdev)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check the vectorized analysis against get_statistics and time batch analysis")
+    parser.add_argument("--sessions", type=int, default=2000, help="Archived sessions analysed in one batch")
+    parser.add_argument("--seed", type=int, default=82)
+    args = parser.parse_args()
+    if p82.np is None:
+        print("The analysis functions need NumPy")
+        return 2
+
+    sessions = archived_sessions(args.sessions, args.seed)
+    start = time.perf_counter()
+    reference = [reference_summary(values) for values in sessions]
+    reference_s = time.perf_counter() - start
+    start = time.perf_counter()
+    batch = p82.summarize_sessions(sessions)
+    batch_s = time.perf_counter() - start
+
+    worst = max(abs(float(batch[field][i]) - ref[field]) for i, ref in enumerate(reference) for field in FIELDS)
+    ok = worst <= MATCH_TOLERANCE_MS
+    print(f"{args.sessions} sessions: per-session statistics {reference_s:.2f} s, vectorized batch {batch_s:.3f} s "
+          f"({reference_s / batch_s:.0f}x)")
+    print(f"Largest difference to get_statistics: {worst:.2e} ms ({'ok' if ok else 'FAIL'})")
+
+    a, b = sessions[0], [value + 0.2 for value in sessions[0]]
+    start = time.perf_counter()
+    estimate, low, high = p82.bootstrap_ci(a, "avg", seed=args.seed)
+    p99 = p82.bootstrap_ci(a, "p99", seed=args.seed)
+    comparison = p82.compare_latencies(a, b, seed=args.seed)
+    bootstrap_s = time.perf_counter() - start
+    print(f"\nBootstrap ({p82.BOOTSTRAP_RESAMPLES} resamples, {len(a)} samples): avg {estimate:.3f} ms [{low:.3f}, {high:.3f}], "
+          f"p99 {p99[0]:.3f} ms [{p99[1]:.3f}, {p99[2]:.3f}]")
+    print(f"Shifted copy +0.2 ms: difference {comparison['difference']:+.3f} ms "
+          f"[{comparison['ci_low']:+.3f}, {comparison['ci_high']:+.3f}], KS {comparison['ks_distance']:.3f} ({bootstrap_s:.2f} s)")
+    ok &= abs(comparison['difference'] - 0.2) < 1e-9 and comparison['ci_low'] <= 0.2 <= comparison['ci_high']
+
+    percentiles = p82.latency_percentiles(a)
+    counts, edges = p82.latency_histogram(a, bin_ms=0.5)
+    x, cdf = p82.latency_ecdf(a)
+    ok &= percentiles[50] == reference[0]['p50'] and counts.sum() == len(a) and cdf[-1] == 1.0
+    print(f"Percentiles p1 {percentiles[1]:.3f} / p50 {percentiles[50]:.3f} / p99.9 {percentiles[99.9]:.3f} ms, "
+          f"{len(counts)} histogram bins from {edges[0]:.1f} ms")
+    print("All analysis checks passed" if ok else "Analysis checks failed")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
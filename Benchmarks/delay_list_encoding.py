@@ -0,0 +1,65 @@
+import os
+import sys
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+import Python as p82
+
+# Largest round-trip error allowed by the 0.1 µs fixed point (ms), with a little room for float rounding
+ROUND_TRIP_TOLERANCE_MS = 0.5 / p82.DELAY_LIST_SCALE + 1e-9
+
+
+def soak_delays(count, seed):
+    """Latencies like a long session: timer-resolution values, a slow drift, rare outliers"""
+    rng = random.Random(seed)
+    values = []
+    for i in range(count):
+        value = rng.gauss(4.0 + 0.3 * i / count, 0.6) + rng.uniform(0.0, 1.0)
+        if rng.random() < 0.002:
+            value += rng.uniform(5.0, 40.0)
+        values.append(round(max(0.05, value), 4))  # perf_counter µs values in ms
+    return values
+
+
+def check_round_trip(values):
+    decoded = p82.decode_delay_list(p82.encode_delay_list(values))
+    return len(decoded) == len(values) and all(abs(a - b) <= ROUND_TRIP_TOLERANCE_MS for a, b in zip(values, decoded))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the text and compact delay list encodings and check the compact round trip")
+    parser.add_argument("--seed", type=int, default=82)
+    args = parser.parse_args()
+
+    edge_cases = [[], [0.0], [4.2], [0.0001, 199.9999, 0.0001], [-3.5, 3.5], [1e6, 0.0], [4.0] * 1000]
+    ok = all(check_round_trip(values) for values in edge_cases)
+    print(f"Edge cases round trip: {'ok' if ok else 'FAIL'}")
+    legacy = "4.12, 3.9, 5.01"
+    legacy_ok = p82.decode_delay_list(legacy) == [4.12, 3.9, 5.01]
+    print(f"Text lists decode:     {'ok' if legacy_ok else 'FAIL'}")
+    ok &= legacy_ok
+
+    print(f"\n{'Samples':>8} {'text (B)':>10} {'compact (B)':>12} {'ratio':>7} {'text max err':>13} {'encode':>9} {'decode':>9}")
+    for count in (200, 400, 10_000, 100_000):
+        values = soak_delays(count, args.seed)
+        text = p82.format_delay_list(values, "text")
+        text_error = max(abs(a - b) for a, b in zip(values, p82.decode_delay_list(text)))
+        start = time.perf_counter()
+        compact = p82.encode_delay_list(values)
+        encode_s = time.perf_counter() - start
+        start = time.perf_counter()
+        p82.decode_delay_list(compact)
+        decode_s = time.perf_counter() - start
+        ok &= check_round_trip(values)
+        print(f"{count:>8} {len(text):>10} {len(compact):>12} {len(text) / len(compact):>6.1f}x "
+              f"{text_error * 1000:>10.1f} µs {encode_s * 1e3:>6.1f} ms {decode_s * 1e3:>6.1f} ms")
+
+    print(f"\nCompact round trip within {ROUND_TRIP_TOLERANCE_MS * 1000:.2f} µs: {'ok' if ok else 'FAIL'}")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,86 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+import Python as p82
+
+EV_ABS, EV_SYN, SYN_REPORT = p82.EvdevDevice.EV_ABS, p82.EvdevDevice.EV_SYN, p82.EvdevDevice.SYN_REPORT
+# Xbox-style layout as reported by xpad/hid-microsoft: (code, rest value, minimum, maximum)
+XBOX_AXES = (
+    (0x00, 0, -32768, 32767),   # ABS_X   left stick
+    (0x01, 0, -32768, 32767),   # ABS_Y
+    (0x02, 0, 0, 1023),         # ABS_Z   left trigger
+    (0x03, 0, -32768, 32767),   # ABS_RX  right stick
+    (0x04, 0, -32768, 32767),   # ABS_RY
+    (0x05, 0, 0, 1023),         # ABS_RZ  right trigger
+)
+# Generic HID pad: unsigned 8-bit sticks resting in the middle
+GENERIC_AXES = ((0x00, 128, 0, 255), (0x01, 127, 0, 255))
+
+
+def virtual_device(layout):
+    """EvdevDevice configured like init() would from EVIOCGABS, without opening a node"""
+    device = p82.EvdevDevice("/dev/input/virtual")
+    for code, value, minimum, maximum in layout:
+        device._add_axis(code, value, minimum, maximum)
+    device.arm()
+    return device
+
+
+def send(device, code, value, timestamp_ns=0):
+    device._handle_event(EV_ABS, code, value, timestamp_ns)
+    device._handle_event(EV_SYN, SYN_REPORT, 0, timestamp_ns)
+
+
+def stick_tester(device):
+    """Just the state stick detection uses; the rest of LatencyTester needs a board"""
+    tester = p82.LatencyTester.__new__(p82.LatencyTester)
+    tester.joystick = device
+    tester.stick_axes = None
+    tester.primary_axis = None
+    tester.axis_rest = None
+    return tester
+
+
+def check(label, ok):
+    print(f"  {'ok  ' if ok else 'FAIL'} {label}")
+    return ok
+
+
+def main():
+    ok = True
+    print("Xbox layout (triggers 0..1023):")
+    device = virtual_device(XBOX_AXES)
+    ok &= check("triggers read 0.0 at rest, not -1.0", device.get_axis(2) == 0.0 and device.get_axis(5) == 0.0)
+    ok &= check("sticks read 0 at rest", all(abs(device.get_axis(axis)) < 0.001 for axis in (0, 1, 3, 4)))
+    send(device, 0x05, 1023)
+    ok &= check("full trigger reads 1.0", device.get_axis(5) == 1.0)
+    send(device, 0x05, 0)
+
+    tester = stick_tester(device)
+    tester.capture_axis_rest()
+    ok &= check("no stick detected at rest", not tester.detect_active_stick() and tester.stick_axes is None)
+    send(device, 0x03, 32767)
+    ok &= check("right stick hit detected as axes [3, 4]", tester.detect_active_stick() and tester.stick_axes == [3, 4]
+                and tester.primary_axis == 3)
+
+    print("Axis resting at an extreme:")
+    device = virtual_device(XBOX_AXES)
+    send(device, 0x05, 1023)     # Trigger held down while the rest position is captured
+    tester = stick_tester(device)
+    tester.capture_axis_rest()
+    ok &= check("held trigger is not taken for the stick", not tester.detect_active_stick())
+
+    print("Generic pad (sticks 0..255):")
+    device = virtual_device(GENERIC_AXES)
+    ok &= check("unsigned sticks stay centered", all(abs(value) < 0.01 for value in device.axes))
+    send(device, 0x00, 0)
+    ok &= check("full deflection reads -1.0", device.get_axis(0) == -1.0)
+
+    print("All evdev axis checks passed" if ok else "Evdev axis checks failed")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
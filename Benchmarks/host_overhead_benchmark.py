@@ -0,0 +1,197 @@
+import os
+import sys
+import json
+import time
+import bisect
+import argparse
+import platform
+import statistics
+import contextlib
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Simulator"))
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+from pty_p82 import p82, PtyPrometheus, VirtualGamepad, connect
+
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "host_overhead_baseline.json")
+USB_LATENCY_US = 150.0       # Exact board-to-host transfer delay injected by the virtual board
+TRAVEL_MS = 8.0              # Exact solenoid travel (T to contact)
+CONTROLLER_DELAY_MS = 4.0    # Exact contact-to-input delay of the virtual gamepad
+SCENARIOS = {
+    # name: (test type, board timestamps)
+    "button-arrival": (p82.TEST_TYPE_BUTTON, False),
+    "button-board-timestamps": (p82.TEST_TYPE_BUTTON, True),
+}
+# Metrics compared against the baseline (lower is better) with a relative tolerance and an absolute slack
+REGRESSION_CHECKS = (
+    ("loop_us", "p99", 0.25, 20.0),
+    ("s_error_us", "p99", 0.25, 50.0),
+    ("g_error_us", "p99", 0.25, 50.0),
+    ("cpu_main_pct", None, 0.25, 5.0),
+)
+
+
+class InstrumentedTester(p82.LatencyTester):
+    """LatencyTester that records loop iteration times and the S/G timestamps of every accepted sample"""
+
+    def __init__(self, *args, **kwargs):
+        self.loop_times_us = []
+        self.samples = []
+        self._last_poll_us = None
+        self._last_poll_trigger_us = None
+        super().__init__(*args, **kwargs)
+
+    def _poll_gamepad_input(self):
+        # Called once per loop iteration while a cycle is active
+        now_us = time.perf_counter() * 1_000_000
+        if self._last_poll_trigger_us == self.last_trigger_time_us:
+            self.loop_times_us.append(now_us - self._last_poll_us)
+        self._last_poll_us = now_us
+        self._last_poll_trigger_us = self.last_trigger_time_us
+        return super()._poll_gamepad_input()
+
+    def log_progress(self, latency, early_g=False):
+        self.samples.append((self.s_time_us, self.g_time_us))
+        super().log_progress(latency, early_g)
+
+
+def percentiles(values):
+    ordered = sorted(values)
+    pick = lambda q: ordered[min(len(ordered) - 1, int(len(ordered) * q))]
+    return {
+        'mean': round(statistics.mean(ordered), 2),
+        'sd': round(statistics.pstdev(ordered), 2),
+        'p50': round(pick(0.50), 2),
+        'p90': round(pick(0.90), 2),
+        'p99': round(pick(0.99), 2),
+        'max': round(ordered[-1], 2),
+    }
+
+
+def detection_errors(tester, board, gamepad, board_timestamps):
+    """Host timestamp minus the moment the event became observable by the host (µs)"""
+    presses = sorted(gamepad.presses)
+    contacts = [press[0] for press in presses]
+    s_writes = [(at, data) for at, data in board.writes if data[:1] == b'S']
+    s_write_times = [at for at, _ in s_writes]
+    s_errors, g_errors = [], []
+    for s_us, g_us in tester.samples:
+        i = min(range(len(contacts)), key=lambda k: abs(contacts[k] - s_us))
+        contact_us, press_us = presses[i][0], presses[i][1]
+        if board_timestamps:
+            s_errors.append(s_us - contact_us)  # Reconstructed contact time
+        else:
+            j = bisect.bisect_left(s_write_times, contact_us)
+            if j < len(s_write_times):
+                s_errors.append(s_us - s_write_times[j])  # Arrival of the 'S' byte
+        g_errors.append(g_us - press_us)
+    return s_errors, g_errors
+
+
+def run_scenario(test_type, board_timestamps, iterations, seed):
+    board = PtyPrometheus(seed=seed, usb_latency_us=(USB_LATENCY_US, 0.0), travel_ms=(TRAVEL_MS, 0.0),
+                          bounce_us=(0.0, 0.0)).start()
+    gamepad = VirtualGamepad(seed=seed, latency_ms=(CONTROLLER_DELAY_MS, 0.0), report_interval_ms=0.0,
+                             bounce_prob=0.0).attach(board)
+    ser = None
+    tester = None
+    try:
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            ser, _, clock_sync, contact_delay = connect(board, board_timestamps)
+            tester = InstrumentedTester(gamepad, ser, test_type, contact_delay, iterations, "Virtual", None,
+                                        clock_sync, headless=True)
+            tester.button_to_test = 0
+            wall_start, cpu_start, main_start = time.perf_counter(), time.process_time(), time.thread_time()
+            tester.test_loop()
+            wall = time.perf_counter() - wall_start
+            cpu = time.process_time() - cpu_start
+            main_cpu = time.thread_time() - main_start
+        s_errors, g_errors = detection_errors(tester, board, gamepad, board_timestamps)
+        return {
+            'samples': len(tester.samples),
+            'invalid': tester.invalid_measurements,
+            'loop_us': percentiles(tester.loop_times_us),
+            's_error_us': percentiles(s_errors),
+            'g_error_us': percentiles(g_errors),
+            'cycles_per_min': round(len(tester.samples) / wall * 60, 1),
+            'cpu_main_pct': round(main_cpu / wall * 100, 1),
+            'cpu_process_pct': round(cpu / wall * 100, 1),
+        }
+    finally:
+        if tester is not None:
+            tester.stop_serial_capture()
+        if ser is not None:
+            ser.close()
+        board.stop()
+
+
+def compare(results, baseline):
+    """Prints metric changes against the baseline and returns the regressed metric names"""
+    regressions = []
+    for name, result in results['scenarios'].items():
+        base = baseline.get('scenarios', {}).get(name)
+        if not base:
+            continue
+        for metric, field, tolerance, slack in REGRESSION_CHECKS:
+            new = result[metric][field] if field else result[metric]
+            old = base[metric][field] if field else base[metric]
+            label = f"{name} {metric}{'.' + field if field else ''}"
+            regressed = new > old * (1 + tolerance) + slack
+            print(f"  {label:<44} {old:>9.1f} -> {new:>9.1f}{'  REGRESSION' if regressed else ''}")
+            if regressed:
+                regressions.append(label)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure the host-side overhead of the measurement loop against exactly known delays")
+    parser.add_argument("--iterations", type=int, default=100, help="Measurements per scenario")
+    parser.add_argument("--baseline", default=BASELINE_FILE, help="Baseline JSON file")
+    parser.add_argument("--save", action="store_true",
+                        help="Write the results as the new baseline (on the bench host, with --iterations 1000 or more for a meaningful p99)")
+    parser.add_argument("--seed", type=int, default=82)
+    args = parser.parse_args()
+    if not hasattr(os, "openpty"):
+        print("The host-overhead benchmark needs a pseudo-terminal (Linux/macOS)")
+        return 2
+
+    p82.start_async_logger()
+    try:
+        results = {
+            'version': p82.VERSION,
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'iterations': args.iterations,
+            'scenarios': {},
+        }
+        for name, (test_type, board_timestamps) in SCENARIOS.items():
+            result = run_scenario(test_type, board_timestamps, args.iterations, args.seed)
+            results['scenarios'][name] = result
+            print(f"\n{name}: {result['samples']} samples, {result['invalid']} invalid, {result['cycles_per_min']} cycles/min")
+            print(f"  Loop iteration   p50 {result['loop_us']['p50']:8.1f} µs   p99 {result['loop_us']['p99']:8.1f} µs   max {result['loop_us']['max']:8.1f} µs")
+            print(f"  S detection err  mean {result['s_error_us']['mean']:+7.1f} µs   p99 {result['s_error_us']['p99']:+8.1f} µs")
+            print(f"  G detection err  mean {result['g_error_us']['mean']:+7.1f} µs   p99 {result['g_error_us']['p99']:+8.1f} µs")
+            print(f"  CPU              main thread {result['cpu_main_pct']:5.1f}%   process {result['cpu_process_pct']:5.1f}%")
+    finally:
+        p82.stop_async_logger()
+
+    if args.save:
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nBaseline written to {args.baseline}")
+        return 0
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        print(f"\nCompared with baseline from v{baseline.get('version')} ({baseline.get('platform')}):")
+        regressions = compare(results, baseline)
+        if regressions:
+            print(f"\n{len(regressions)} metric(s) regressed")
+            return 1
+    else:
+        print(f"\nNo baseline at {args.baseline}; record one on this host with --save")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
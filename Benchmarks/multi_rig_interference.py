@@ -0,0 +1,76 @@
+import os
+import sys
+import argparse
+import multiprocessing
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from host_overhead_benchmark import p82, run_scenario
+
+METRICS = ("s_error_us", "g_error_us", "loop_us")
+
+
+def rig_process(index, cpus, board_timestamps, iterations, seed, results):
+    """One simulated rig (pty board + virtual gamepad) pinned like a multi-rig worker"""
+    pinned = p82.set_cpu_affinity(cpus)
+    p82.start_async_logger()
+    try:
+        result = run_scenario(p82.TEST_TYPE_BUTTON, board_timestamps, iterations, seed + index)
+    finally:
+        p82.stop_async_logger()
+    results.put((index, dict(result, cpus=cpus if pinned else None)))
+
+
+def run_rigs(count, board_timestamps, iterations, seed):
+    """Runs `count` simulated rigs at the same time in separate processes; returns their results in rig order"""
+    ctx = multiprocessing.get_context("spawn")
+    results = ctx.Queue()
+    cpus = p82.rig_cpus(count)
+    workers = [ctx.Process(target=rig_process, args=(i, cpus[i], board_timestamps, iterations, seed, results))
+               for i in range(count)]
+    for worker in workers:
+        worker.start()
+    collected = dict(results.get() for _ in workers)
+    for worker in workers:
+        worker.join()
+    return [collected[i] for i in range(count)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure cross-rig interference of parallel measurement processes with simulated rigs")
+    parser.add_argument("--rigs", type=int, default=2, help="Rigs measured in parallel")
+    parser.add_argument("--iterations", type=int, default=100, help="Measurements per rig")
+    parser.add_argument("--arrival", action="store_true", help="Use arrival-time 'S' instead of board timestamps")
+    parser.add_argument("--seed", type=int, default=82)
+    parser.add_argument("--bound", type=float, metavar="US",
+                        help="Fail when a parallel rig adds more than US µs p99 S/G detection error (no bound by default)")
+    args = parser.parse_args()
+    if not hasattr(os, "openpty"):
+        print("The interference benchmark needs pseudo-terminals (Linux/macOS)")
+        return 2
+
+    cpus = p82.available_cpus()
+    print(f"{len(cpus)} CPU(s) available, rig CPU sets {p82.rig_cpus(args.rigs)}")
+    if len(cpus) <= args.rigs * p82.MULTI_RIG_CPUS_PER_RIG:
+        print(f"Warning: fewer than {p82.MULTI_RIG_CPUS_PER_RIG} CPUs per rig + coordinator; the result shows CPU sharing, not the multi-rig design")
+    solo = run_rigs(1, not args.arrival, args.iterations, args.seed)[0]
+    parallel = run_rigs(args.rigs, not args.arrival, args.iterations, args.seed)
+
+    print(f"\n{'p99 (µs)':<14} {'alone':>9} " + " ".join(f"{'rig ' + str(i + 1):>9}" for i in range(args.rigs)) + f" {'added':>9}")
+    worst = 0.0
+    for metric in METRICS:
+        added = max(rig[metric]['p99'] for rig in parallel) - solo[metric]['p99']
+        if metric != "loop_us":
+            worst = max(worst, added)
+        print(f"{metric:<14} {solo[metric]['p99']:>9.1f} " + " ".join(f"{rig[metric]['p99']:>9.1f}" for rig in parallel) + f" {added:>+9.1f}")
+    print(f"{'cycles/min':<14} {solo['cycles_per_min']:>9.1f} " + " ".join(f"{rig['cycles_per_min']:>9.1f}" for rig in parallel))
+
+    print(f"\nAdded p99 detection error {worst:+.1f} µs")
+    if args.bound is None:
+        return 0
+    within = worst <= args.bound
+    print(f"{'Within' if within else 'Exceeds'} the {args.bound:.0f} µs bound")
+    return 0 if within else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
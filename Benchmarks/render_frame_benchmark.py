@@ -0,0 +1,84 @@
+import os
+import sys
+import time
+import random
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+import Python as p82
+import pygame
+
+FRAMES = 300
+
+
+class UncachedRenderer(p82.TestWindowRenderer):
+    """Previous per-frame behaviour: new Font objects, re-rendered labels, per-frame card/gradient
+    drawing (only the dashboard background was cached) and a full display.flip() every frame"""
+
+    def __init__(self, screen):
+        super().__init__(screen)
+        self._frame_layers = {}
+
+    def _font(self, size):
+        return pygame.font.Font(None, size)
+
+    def _text(self, text, size, color):
+        return self._font(size).render(text, True, color)
+
+    def _layer(self, name):
+        if name == "monitor":
+            return super()._layer(name)
+        # Everything else was drawn once per frame
+        if name not in self._frame_layers:
+            self._frame_layers[name] = getattr(self, "_build_" + name)()
+        return self._frame_layers[name]
+
+    def present(self):
+        pygame.display.flip()
+        self._dirty = []
+        self._frame_layers = {}
+        self._scene = None  # Redraw the whole frame next time
+
+
+def dashboard_frames(renderer, frames):
+    """Per-frame cost of the live dashboard while samples keep arriving (about one per frame)"""
+    rng = random.Random(82)
+    order_stats = p82.OrderStatistics(p82.ORDER_STATS_LOW_MS, 160.0)
+    recent = []
+    start = time.perf_counter()
+    for i in range(frames):
+        value = rng.gauss(4.0, 0.6)
+        order_stats.add(value)
+        recent = (recent + [value])[-p82.RENDER_RING_SIZE:]
+        live = order_stats.summary()
+        renderer.draw_dashboard({
+            'test_type': p82.TEST_TYPE_BUTTON, 'iterations': frames, 'count': i + 1, 'invalid': 0,
+            'calibrating': False, 'finished': False, 'average': live['avg'], 'live': live, 'recent': recent,
+        })
+        renderer.present()
+    return (time.perf_counter() - start) / frames
+
+
+def start_screen_frames(renderer, frames):
+    """Per-frame cost of the start screen (title glow animation, hover button)"""
+    start = time.perf_counter()
+    for _ in range(frames):
+        renderer.draw_start_screen(p82.TEST_TYPE_KEYBOARD, "space")
+        renderer.present()
+    return (time.perf_counter() - start) / frames
+
+
+def main():
+    pygame.display.init()
+    pygame.font.init()
+    screen = pygame.display.set_mode((800, 600))
+    print(f"{'Frame':<14} {'before (ms)':>12} {'after (ms)':>11} {'speedup':>9}")
+    for label, run in (("Dashboard", dashboard_frames), ("Start screen", start_screen_frames)):
+        old_cost = run(UncachedRenderer(screen), FRAMES)
+        new_cost = run(p82.TestWindowRenderer(screen), FRAMES)
+        print(f"{label:<14} {old_cost * 1e3:>12.3f} {new_cost * 1e3:>11.3f} {old_cost / new_cost:>8.1f}x")
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    main()
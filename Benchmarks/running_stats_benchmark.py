@@ -0,0 +1,57 @@
+import os
+import sys
+import time
+import random
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+import Python as p82
+
+RUN_LENGTHS = (100, 400, 1000, 5000, 20000)
+TIMED_SAMPLES = 50  # Per-sample cost is measured over the last samples of each run
+
+
+def full_list_cost(values):
+    """Per-sample cost of the previous hot path: stdev/min/max over the whole result list"""
+    results = values[:-TIMED_SAMPLES]
+    start = time.perf_counter()
+    for value in values[-TIMED_SAMPLES:]:
+        results.append(value)
+        statistics.stdev(results)
+        min(results)
+        max(results)
+    return (time.perf_counter() - start) / TIMED_SAMPLES
+
+
+def running_stats_cost(values):
+    """Per-sample cost with RunningStats: one O(1) update plus reading the current values"""
+    stats = p82.RunningStats()
+    for value in values[:-TIMED_SAMPLES]:
+        stats.add(value)
+    start = time.perf_counter()
+    for value in values[-TIMED_SAMPLES:]:
+        stats.add(value)
+        stats.stdev
+        stats.min
+        stats.max
+    return (time.perf_counter() - start) / TIMED_SAMPLES
+
+
+def main():
+    rng = random.Random(82)
+    print(f"{'Samples':>8} {'full list (µs)':>16} {'running (µs)':>14} {'speedup':>9}")
+    for n in RUN_LENGTHS:
+        values = [rng.gauss(4.0, 0.6) for _ in range(n)]
+        stats = p82.RunningStats()
+        for value in values:
+            stats.add(value)
+        assert abs(stats.stdev - statistics.stdev(values)) < 1e-9
+        assert abs(stats.mean - statistics.mean(values)) < 1e-9
+        old_cost = full_list_cost(list(values))
+        new_cost = running_stats_cost(values)
+        print(f"{n:>8} {old_cost * 1e6:>16.2f} {new_cost * 1e6:>14.3f} {old_cost / new_cost:>8.0f}x")
+
+
+if __name__ == "__main__":
+    main()
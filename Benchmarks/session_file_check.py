@@ -0,0 +1,56 @@
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+import Python as p82
+
+CYCLES = 500
+
+
+def write_session(filename, codec):
+    writer = p82.SessionWriter(filename, {'contact_delay': 0.0}, codec)
+    for i in range(CYCLES):
+        trigger = i * 100_000.0
+        writer.append(trigger, trigger + 500.0, trigger + 4_500.0, 12.0, 3.0, 40_000, p82.CycleTrace.VALID)
+    writer.close()
+
+
+def check(label, ok):
+    print(f"  {'ok  ' if ok else 'FAIL'} {label}")
+    return ok
+
+
+def main():
+    if p82.np is None:
+        print("SessionFile columns need NumPy")
+        return 2
+    ok = True
+    with tempfile.TemporaryDirectory() as directory:
+        for codec in p82.SessionWriter.CODECS:
+            print(f"Codec {codec or 'none'}:")
+            filename = os.path.join(directory, f"session_{codec or 'raw'}.p82s")
+            write_session(filename, codec)
+            try:
+                with p82.SessionFile(filename) as session:
+                    g_us = session.column('g_us')
+                    latencies = session.latencies_ms()
+                    rows = sum(1 for _ in session.rows())
+                ok &= check("columns read inside 'with' close without an error", True)
+            except BufferError as e:
+                ok &= check(f"columns read inside 'with' close without an error ({e})", False)
+                continue
+            ok &= check("column stays readable after close", len(g_us) == CYCLES and float(g_us[-1]) == (CYCLES - 1) * 100_000.0 + 4_500.0)
+            ok &= check("latencies and rows", rows == CYCLES and abs(float(latencies.mean()) - 4.0) < 1e-9)
+            del g_us, latencies
+            session = p82.SessionFile(filename)
+            session.close()
+            session.close()
+            ok &= check("close without reading columns, twice", True)
+    print("All session file checks passed" if ok else "Session file checks failed")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -13,7 +13,6 @@ import webbrowser
 import os
 from serial.tools import list_ports
 from colorama import Fore, Style, init
-import msvcrt
 import pygame
 from pygame.locals import *
 import statistics
@@ -21,16 +20,52 @@ import random
 import string
 import sys
 import csv
+import json
 import ctypes
 import threading
+import multiprocessing
+from multiprocessing import shared_memory
 import queue
 import math
+import bisect
+import glob
+import argparse
+import select
+import struct
+import contextlib
+import sqlite3
+import mmap
+import zlib
+import base64
+import bz2
+import lzma
+from array import array
+
+try:
+    import msvcrt
+except ImportError:
+    msvcrt = None  # Windows-only console input; other platforms fall back to input()
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
 
 try:
     import hid
 except ImportError:
     hid = None
 
+try:
+    import resource
+except ImportError:
+    resource = None  # Unix-only; used for the memlock limit of the real-time mode
+
+try:
+    import numpy as np
+except ImportError:
+    np = None  # Optional; session file columns, ResultStore.latency_arrays(), the analysis functions and --compare
+
 # Async logging helpers placed before main so they exist at startup
 ASYNC_LOG_QUEUE = None
 ASYNC_LOG_STOP = None
@@ -114,16 +149,77 @@ STICK_SETUP_FALLBACK_PULSE_DURATION = 80
 STICK_SETUP_FALLBACK_DEFLECTION_WAIT = 0.500
 STICK_SETUP_FALLBACK_MAX_ITERATIONS = 200
 STICK_MAX_CONSECUTIVE_TIMEOUTS = 8
+SERIAL_CAPTURE_THREAD = True        # Timestamp Arduino bytes on a dedicated reader thread
+SERIAL_CAPTURE_BUFFER = 4096        # Ring buffer capacity (events) for captured serial bytes
+HID_READER_THREAD = True            # Read direct HID reports on a background thread with per-report timestamps
+LINUX_EVDEV_INPUT = True            # On Linux, read gamepads/keyboards from /dev/input with kernel timestamps
+REPORT_RATE_MONITOR = True          # Timestamp every report of direct HID/evdev gamepads to estimate the report rate
+REPORT_TIMELINE_CAPACITY = 131072   # Report timestamps kept (about 2 minutes at 1000 Hz)
+REPORT_PROBE_S = 0.5                # Idle time sampled before the test when too few reports were seen yet
+REPORT_MIN_INTERVALS = 20           # Intervals needed for an estimate
+REPORT_MAX_INTERVAL_MS = 50.0       # Longer gaps are idle time, not report intervals
+REPORT_DOMINANCE_RATIO = 0.5        # Warn when the report interval reaches this fraction of the average latency
+SCHEDULER_SPIN_WINDOW_US = 2000     # Spin-wait this long before a trigger deadline instead of sleeping
+SCHEDULER_IDLE_BUDGET_US = 8000     # Minimum time left before the spin window to run rendering/idle work
+RENDER_PROCESS = False              # Draw the test window in a separate process fed through shared memory
+RENDER_PROCESS_FPS = 60             # Refresh rate of the render process window
+RENDER_RING_SIZE = 256              # Recent samples shared with the render process (sparkline)
+GIL_SWITCH_INTERVAL = 0.0001       # Seconds; while the loop spins, reader threads get the GIL this fast (default 5 ms)
+LINUX_REALTIME = False              # Linux: SCHED_FIFO, CPU pinning and mlockall during measurements (also --realtime)
+REALTIME_PRIORITY = 50              # SCHED_FIFO priority of the measuring thread (1-99)
+REALTIME_CPU = None                 # CPU for the measuring thread (None = last isolated CPU, else the last allowed CPU)
+HEADLESS = False                    # No window at all (also enabled with --headless); progress goes to the console
+HEADLESS_PROGRESS = "console"       # Headless progress output: "console" lines or "json" records (one per line)
+HEADLESS_PROGRESS_INTERVAL = 1.0    # Seconds between headless progress reports
+MULTI_RIG_CPUS = None               # CPUs for multi-rig worker processes (None = every CPU this process may use)
+MULTI_RIG_CPUS_PER_RIG = 2          # CPUs per rig worker: the measuring thread and its reader/logger threads
 
 # Variables that should not be changed without need
-COOLING_PERIOD_MINUTES = 10         # Cooling period in minutes
+COOLING_PERIOD_MINUTES = 10         # Cooling needed after the reference run (calibrates the thermal model)
 COOLING_PERIOD_SECONDS = COOLING_PERIOD_MINUTES * 60  # Cooling period in seconds
+THERMAL_TAU_S = 300.0               # Solenoid cooling time constant: stored heat decays as exp(-t / tau)
+THERMAL_REFERENCE_PULSES = 400      # Reference run: this many default pulses need COOLING_PERIOD_MINUTES of cooling
 LOWER_QUANTILE = 0.02               # Lower quantile for filtering
 UPPER_QUANTILE = 0.98               # Upper quantile for filtering
+ORDER_STATS_RESOLUTION_MS = 0.01    # Bucket width of the live order-statistics structure
+TRACE_CAPACITY = 8192               # Cycles kept by the per-cycle trace recorder (ring buffer)
+SESSION_DIR = "sessions"            # Binary session files (.p82s) are written here during tests; None disables them
+SESSION_CODEC = None                # Session body compression: None, "zlib", "bz2" or "lzma"
+RESULT_STORE_FILE = "p82_results.sqlite"  # Every completed session is archived in this SQLite file; None disables it
+DELAY_LIST_ENCODING = "text"        # Delay lists in uploads, CSV and JSON: "text" (0.01 ms) or "compact" (also --delay-encoding)
+DELAY_LIST_TAG = "P82D1:"           # Version tag of the compact delay list encoding
+DELAY_LIST_SCALE = 10_000           # Compact delay list resolution: 0.1 µs steps of the ms values
+UPLOAD_URL = 'https://gamepadla.com/scripts/poster.php'  # Gamepadla result endpoint (also --upload-url)
+UPLOAD_RESULT_URL = 'https://gamepadla.com/result/{}/'   # Result page of an uploaded test key
+UPLOAD_SPOOL_DIR = "upload_spool"   # Results waiting for upload; each stays here until the server accepted it
+UPLOAD_TIMEOUT = (5.0, 30.0)        # Connect / read timeout of one upload request (s)
+UPLOAD_ATTEMPTS = 4                 # Attempts per result before it is left in the spool for a later flush
+UPLOAD_BACKOFF_S = 1.0              # Delay before the first retry; doubles with every further attempt
+UPLOAD_BACKOFF_MAX_S = 60.0         # Upper limit of the retry delay
+UPLOAD_FLUSH_INTERVAL_S = 30.0      # Background flush passes while spooled results are pending
+ORDER_STATS_LOW_MS = -10.0          # Lowest bucket (early G); values outside the range still sort correctly
 STICK_THRESHOLD = 0.99              # Stick activation threshold
+STICK_DETECT_DEFLECTION = 0.5       # Minimum travel from the rest value before an axis is taken as the tested stick
 RATIO = 5                           # Delay to pulse duration ratio
 CONTACT_DELAY = 0.2                 # Contact sensor delay (ms) for correction (will be updated after calibration)
 REQUIRED_ARDUINO_VERSION = "1.1.1"
+TIMESTAMP_ARDUINO_VERSION = "1.2.0" # First firmware that can send micros() with 'S' (enabled with 'X')
+RELEASE_ARDUINO_VERSION = "1.3.0"   # First firmware that reports the contact release with 'L' (enabled with 'E')
+ADAPTIVE_INTERVAL = False           # Fire the next trigger once the contact is released and the input is at rest (also --adaptive)
+ADAPTIVE_MARGIN_MS = 10.0           # Settling time after release/rest before the next trigger
+ADAPTIVE_MAX_DUTY = 0.35            # Solenoid duty-cycle cap: the interval never drops below pulse / ADAPTIVE_MAX_DUTY
+ADAPTIVE_STICK_REST = 0.2           # Stick counts as back at rest below this deflection
+EARLY_STOP = False                  # Sequential mode: iterations become a maximum, the test stops once the CI below is narrow (also --stop-ci)
+EARLY_STOP_CI_MS = 0.1              # Stop when the 95% CI of the filtered mean is within ± this (ms)
+EARLY_STOP_P99_CI_MS = None         # Also require the 95% CI of p99 within ± this (ms); None = mean only
+EARLY_STOP_MIN_SAMPLES = 200        # Never stop before this many valid samples (Gamepadla minimum)
+EARLY_STOP_CHECK_EVERY = 5          # Valid samples between interval checks
+EARLY_STOP_Z = 1.96                 # Normal quantile of the 95% intervals
+BOARD_TIMESTAMPS = True             # Reconstruct 'S' on the host clock from board timestamps when supported
+CLOCK_SYNC_INTERVAL = 1.0           # Seconds between 'D' round trips that keep the clock sync current during tests
+CLOCK_SYNC_RTT_MARGIN_US = 200      # Round trips slower than min RTT + margin are ignored for clock sync
+CLOCK_SYNC_FORGETTING = 0.998       # Per-sample forgetting factor of the offset/drift estimator
+CLOCK_SYNC_MIN_SPAN_US = 500_000    # Board time span needed before drift is estimated (offset only before)
 LATENCY_EQUALITY_THRESHOLD = 0.001  # Threshold for comparing latencies (ms)
 
 # Constants for test types
@@ -133,7 +229,9 @@ TEST_TYPE_HARDWARE = "hardware"     # New test type for hardware check
 TEST_TYPE_KEYBOARD = "keyboard"
 
 _TEMP_DIR = os.path.join(os.path.expanduser('~'), 'AppData', 'Local', 'Temp') if platform.system() == 'Windows' else '/tmp'
-LAST_TEST_TIME_FILE_BUTTON = os.path.join(_TEMP_DIR, 'last_test_time_button.txt')
+THERMAL_STORE_FILE_BUTTON = os.path.join(_TEMP_DIR, 'p82_solenoid_heat_button.json')
+THERMAL_STORE_FILE_STICK = os.path.join(_TEMP_DIR, 'p82_solenoid_heat_stick.json')
+LAST_TEST_TIME_FILE_BUTTON = os.path.join(_TEMP_DIR, 'last_test_time_button.txt')  # Cooling timers of older versions
 LAST_TEST_TIME_FILE_STICK = os.path.join(_TEMP_DIR, 'last_test_time_stick.txt')
 
 # Function to check time since last test
@@ -171,52 +269,127 @@ def check_cooling_period(leading_newline=True):
     
     print(f"{CYAN}└" + "─" * 45 + f"┘{Style.RESET_ALL}")
 
-def get_cooling_remaining_seconds(test_type):
-    path = LAST_TEST_TIME_FILE_STICK if test_type == TEST_TYPE_STICK else LAST_TEST_TIME_FILE_BUTTON
-    if not os.path.exists(path):
-        return 0
-    try:
-        with open(path) as f:
-            content = f.read().strip()
+@contextlib.contextmanager
+def _file_lock(path):
+    """Exclusive inter-process lock held on path + '.lock' (fcntl on Unix, msvcrt on Windows)"""
+    with open(path + ".lock", "a+b") as f:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        elif msvcrt is not None:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)  # Retries for up to 10 s
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            elif msvcrt is not None:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+def _thermal_reference_limit():
+    """Heat left by the reference run (THERMAL_REFERENCE_PULSES default pulses at the fixed interval) after
+    cooling for COOLING_PERIOD_SECONDS. A solenoid at or below it is as cool as the old timer required."""
+    pulse_s = PULSE_DURATION / 1000.0
+    decay = math.exp(-pulse_s * RATIO / THERMAL_TAU_S)
+    heat = pulse_s * (1.0 - decay ** THERMAL_REFERENCE_PULSES) / (1.0 - decay)  # Heat right after the last pulse
+    return heat * math.exp(-COOLING_PERIOD_SECONDS / THERMAL_TAU_S)
+
+THERMAL_SAFE_HEAT = _thermal_reference_limit()
+
+class ThermalStore:
+    """Heat budget of one solenoid shared by every session through one JSON file.
+    Heat is counted in seconds of solenoid on-time and decays as exp(-t / THERMAL_TAU_S). Updates are locked
+    read-modify-write cycles that replace the file atomically; reads reuse the last state until the file changes."""
+
+    def __init__(self, path, legacy_path=None):
+        self.path = path
+        self.legacy_path = legacy_path  # Old cooling timer file, converted when no store exists yet
+        self._cache = None              # (mtime_ns, heat, wall-clock time of heat)
+
+    def _load(self):
+        try:
+            mtime_ns = os.stat(self.path).st_mtime_ns
+        except OSError:
+            return self._legacy_state()
+        if self._cache is None or self._cache[0] != mtime_ns:
+            try:
+                with open(self.path) as f:
+                    state = json.load(f)
+                self._cache = (mtime_ns, float(state['heat']), float(state['time']))
+            except (OSError, ValueError, KeyError, TypeError):
+                return 0.0, time.time()
+        return self._cache[1], self._cache[2]
+
+    def _legacy_state(self):
+        """Heat that leaves exactly the remaining time of an old timer file: 'time,cooling seconds', or only
+        'time' from the oldest versions, which always cooled for COOLING_PERIOD_SECONDS"""
+        try:
+            with open(self.legacy_path) as f:
+                content = f.read().strip()
             parts = content.split(',')
             if len(parts) == 2:
-                last_time = float(parts[0])
-                cooling_seconds = float(parts[1])
+                last_time, cooling_seconds = float(parts[0]), float(parts[1])
             else:
-                last_time = float(content)
-                cooling_seconds = COOLING_PERIOD_SECONDS
-            return max(0, int(cooling_seconds - (time.time() - last_time)))
-    except (ValueError, IOError):
-        return 0
+                last_time, cooling_seconds = float(content), COOLING_PERIOD_SECONDS
+        except (OSError, ValueError, TypeError):
+            return 0.0, time.time()
+        remaining = max(0.0, cooling_seconds - (time.time() - last_time))
+        return (THERMAL_SAFE_HEAT * math.exp(remaining / THERMAL_TAU_S) if remaining > 0 else 0.0), time.time()
+
+    def heat(self, now=None):
+        heat, at = self._load()
+        now = time.time() if now is None else now
+        return heat * math.exp(-max(0.0, now - at) / THERMAL_TAU_S)
+
+    def remaining_seconds(self, now=None):
+        """Seconds until the heat has decayed to THERMAL_SAFE_HEAT"""
+        heat = self.heat(now)
+        if heat <= THERMAL_SAFE_HEAT:
+            return 0
+        return int(math.ceil(THERMAL_TAU_S * math.log(heat / THERMAL_SAFE_HEAT)))
+
+    def add(self, heat, now=None):
+        """Adds heat (on-time seconds as of `now`) and returns the new remaining cooling time"""
+        now = time.time() if now is None else now
+        with _file_lock(self.path):
+            self._cache = None
+            state = {'heat': self.heat(now) + heat, 'time': now, 'tau': THERMAL_TAU_S}
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(state, f)
+            os.replace(tmp_path, self.path)
+        return self.remaining_seconds(now)
+
+_THERMAL_STORES = {}
+
+def thermal_store(test_type):
+    """Store of the solenoid used by test_type (keyboard and hardware tests use the button solenoid)"""
+    if test_type == TEST_TYPE_STICK:
+        path, legacy = THERMAL_STORE_FILE_STICK, LAST_TEST_TIME_FILE_STICK
+    else:
+        path, legacy = THERMAL_STORE_FILE_BUTTON, LAST_TEST_TIME_FILE_BUTTON
+    if path not in _THERMAL_STORES:
+        _THERMAL_STORES[path] = ThermalStore(path, legacy)
+    return _THERMAL_STORES[path]
+
+def get_cooling_remaining_seconds(test_type):
+    return thermal_store(test_type).remaining_seconds()
 
-def save_test_completion_time(iterations, test_type):
-    if iterations <= 0 or test_type == TEST_TYPE_KEYBOARD:
+def save_solenoid_heat(heat, test_type):
+    """Charges the heat of a finished (or aborted) session to its solenoid"""
+    if heat <= 0:
         return
     try:
-        # Calculate new cooling time based on iterations (10 min per 400 iterations)
-        new_cooling = int((iterations / 400.0) * 10.0 * 60)
-        
-        # Get remaining time from previous test
-        remaining = get_cooling_remaining_seconds(test_type)
-        
-        # Total cooling time is remaining + new
-        total_cooling = remaining + new_cooling
-        
-        path = LAST_TEST_TIME_FILE_STICK if test_type == TEST_TYPE_STICK else LAST_TEST_TIME_FILE_BUTTON
-        with open(path, 'w') as f:
-            f.write(f"{time.time()},{total_cooling}")
-            
-        print(f"\n{Fore.GREEN}Test completion time recorded.{Fore.RESET}")
+        remaining = thermal_store(test_type).add(heat)
         label = "STICK" if test_type == TEST_TYPE_STICK else "BUTTON"
-        if remaining > 0:
-            print(f"{Fore.YELLOW}Added {new_cooling}s to remaining {remaining}s. Total cooling timer ({label}): {total_cooling}s.{Fore.RESET}")
-        else:
-            print(f"{Fore.YELLOW}Cooling timer ({label}) set to {total_cooling} seconds.{Fore.RESET}")
-    except IOError as e:
-        print_error(f"Recording test completion time: {e}")
+        print(f"\n{Fore.GREEN}Solenoid heat recorded ({heat:.1f} s of on-time).{Fore.RESET}")
+        print(f"{Fore.YELLOW}Cooling timer ({label}): {remaining} seconds.{Fore.RESET}")
+    except OSError as e:
+        print_error(f"Recording solenoid heat: {e}")
 
 # Function to test Arduino communication latency
-def test_arduino_latency(ser):
+def test_arduino_latency(ser, clock_sync=None):
     print(f"\nTesting Arduino communication latency... {LATENCY_TEST_ITERATIONS} measurements")
     latencies = []
     ser.timeout = 1
@@ -228,6 +401,11 @@ def test_arduino_latency(ser):
         ser.write(b'D')
         ser.flush()
         if ser.read() == b'R':
+            if clock_sync is not None:
+                payload = ser.read(4)  # Board micros() when 'D' was handled
+                end = time.perf_counter()
+                if len(payload) == 4:
+                    clock_sync.add_sample(start * 1_000_000, end * 1_000_000, int.from_bytes(payload, "little"))
             latencies.append((time.perf_counter() - start) * 1000)  # Convert to ms
             
         else:
@@ -239,29 +417,211 @@ def test_arduino_latency(ser):
         print(f"Arduino latency test results:\nTotal measurements: {len(latencies)}\n"
               f"Minimum latency:    {min(latencies):.3f} ms\nMaximum latency:    {max(latencies):.3f} ms\n"
               f"Average latency:    {avg_latency:.3f} ms\nJitter deviation:   {statistics.stdev(latencies):.3f} ms")
+        if clock_sync is not None and clock_sync.ready:
+            print(f"Board clock sync:   {clock_sync.samples} samples, drift {clock_sync.drift_ppm:+.1f} ppm, min RTT {clock_sync.min_rtt_us / 1000:.3f} ms")
         return avg_latency
     else:
         print_error("Testing Arduino latency: No valid measurements")
         return None
 
+class BoardClockSync:
+    """Online offset and drift estimate between the Arduino micros() clock and perf_counter.
+    Fed with timestamped 'D' round trips (host send/receive time + board time), it maps board
+    timestamps onto the host time base so 'S' no longer carries USB transfer jitter."""
+
+    WRAP = 1 << 32  # micros() is a 32-bit counter (wraps every ~71.6 minutes)
+
+    def __init__(self, forgetting=CLOCK_SYNC_FORGETTING, rtt_margin_us=CLOCK_SYNC_RTT_MARGIN_US):
+        self.forgetting = forgetting
+        self.rtt_margin_us = rtt_margin_us
+        self.min_rtt_us = None
+        self.samples = 0
+        self.rejected = 0
+        self._last_unwrapped = None
+        self._x0 = None      # First board time (µs), keeps the regression numbers small
+        self._y0 = None      # First host time (µs)
+        self._weight = 0.0
+        self._mean_x = 0.0
+        self._mean_y = 0.0
+        self._cxx = 0.0
+        self._cxy = 0.0
+        self._span_us = 0.0  # Board time covered by accepted samples
+        self.slope = 1.0     # Host µs per board µs
+
+    @property
+    def ready(self):
+        return self.samples > 0
+
+    @property
+    def drift_ppm(self):
+        """Board clock rate error relative to the host clock (positive = board runs fast)"""
+        return (1.0 / self.slope - 1.0) * 1_000_000
+
+    def unwrap(self, board_us):
+        """Extends a 32-bit micros() value to a monotonic 64-bit one, tolerating slightly older stamps"""
+        if self._last_unwrapped is None:
+            self._last_unwrapped = board_us
+            return board_us
+        base = self._last_unwrapped - (self._last_unwrapped % self.WRAP)
+        value = min((base + board_us - self.WRAP, base + board_us, base + board_us + self.WRAP),
+                    key=lambda c: abs(c - self._last_unwrapped))
+        if value > self._last_unwrapped:
+            self._last_unwrapped = value
+        return value
+
+    def add_sample(self, host_send_us, host_recv_us, board_us):
+        """Adds one round trip. Slow round trips (queued behind other traffic) are rejected."""
+        rtt_us = host_recv_us - host_send_us
+        board = self.unwrap(board_us)
+        if self.min_rtt_us is None or rtt_us < self.min_rtt_us:
+            self.min_rtt_us = rtt_us
+        if rtt_us > self.min_rtt_us + self.rtt_margin_us:
+            self.rejected += 1
+            return False
+        host_mid = (host_send_us + host_recv_us) / 2.0
+        if self._x0 is None:
+            self._x0, self._y0 = board, host_mid
+        x = board - self._x0
+        y = host_mid - self._y0
+        # Exponentially weighted least squares (Welford form): host = mean_y + slope * (board - mean_x)
+        self._weight = self._weight * self.forgetting + 1.0
+        dx = x - self._mean_x
+        self._mean_x += dx / self._weight
+        self._mean_y += (y - self._mean_y) / self._weight
+        self._cxx = self._cxx * self.forgetting + dx * (x - self._mean_x)
+        self._cxy = self._cxy * self.forgetting + dx * (y - self._mean_y)
+        self.samples += 1
+        self._span_us = max(self._span_us, x)
+        # Drift is only trusted once the samples span enough board time; before that only the offset is tracked
+        if self._span_us >= CLOCK_SYNC_MIN_SPAN_US and self._cxx > 0:
+            self.slope = self._cxy / self._cxx
+        return True
+
+    def to_host_us(self, board_us):
+        """Converts a board micros() value to perf_counter µs"""
+        x = self.unwrap(board_us) - self._x0
+        return self._y0 + self._mean_y + self.slope * (x - self._mean_x)
+
+
+def enable_release_events(ser):
+    """Asks firmware v1.3.0+ to report every contact release with 'L' ('E' command). Returns True when acknowledged."""
+    try:
+        ser.reset_input_buffer()
+        ser.write(b'E')
+        ser.flush()
+        start = time.time()
+        while time.time() - start < 1.0:
+            if ser.in_waiting and ser.read() == b'A':
+                return True
+            time.sleep(0.001)
+    except serial.SerialException:
+        pass
+    return False
+
+def enable_board_timestamps(ser):
+    """Switches firmware v1.2.0+ to timestamped 'S'/'R' events ('X' command). Returns True when acknowledged."""
+    try:
+        ser.reset_input_buffer()
+        ser.write(b'X')
+        ser.flush()
+        start = time.time()
+        while time.time() - start < 1.0:
+            if ser.in_waiting and ser.read() == b'A':
+                return True
+            time.sleep(0.001)
+    except serial.SerialException:
+        pass
+    return False
+
+
+def encode_delay_list(values_ms):
+    """Compact delay list: DELAY_LIST_TAG + base64(zlib(varints)). The varints are zigzag deltas of the
+    values in DELAY_LIST_SCALE fixed point, so the order of the samples is kept exactly."""
+    out = bytearray()
+    previous = 0
+    for value in values_ms:
+        fixed = int(round(value * DELAY_LIST_SCALE))
+        delta = fixed - previous
+        previous = fixed
+        zigzag = delta * 2 if delta >= 0 else -delta * 2 - 1
+        while zigzag >= 0x80:
+            out.append((zigzag & 0x7F) | 0x80)
+            zigzag >>= 7
+        out.append(zigzag)
+    return DELAY_LIST_TAG + base64.b64encode(zlib.compress(bytes(out), 9)).decode("ascii")
+
+def decode_delay_list(text):
+    """Delay list in ms from either encoding: the compact tagged form or the comma-separated text"""
+    text = (text or "").strip()
+    if not text.startswith(DELAY_LIST_TAG):
+        if text.startswith("P82D"):
+            raise ValueError(f"Unsupported delay list encoding {text.split(':', 1)[0]}")
+        return [float(x) for x in text.split(",") if x.strip()]
+    data = zlib.decompress(base64.b64decode(text[len(DELAY_LIST_TAG):]))
+    values = []
+    fixed = zigzag = shift = 0
+    for byte in data:
+        zigzag |= (byte & 0x7F) << shift
+        if byte & 0x80:
+            shift += 7
+            continue
+        fixed += (zigzag >> 1) ^ -(zigzag & 1)
+        values.append(fixed / DELAY_LIST_SCALE)
+        zigzag = shift = 0
+    if shift:
+        raise ValueError("Truncated delay list")
+    return values
+
+def format_delay_list(values_ms, encoding=None):
+    """Delay list cell for uploads and exports in DELAY_LIST_ENCODING (or the given encoding)"""
+    if (encoding or DELAY_LIST_ENCODING) == "compact":
+        return encode_delay_list(values_ms)
+    return ', '.join(str(round(x, 2)) for x in values_ms)
+
+def new_result_file(directory, prefix, extension):
+    """Creates an empty, not yet existing file named prefix + timestamp and returns its path. Creation is
+    exclusive, so processes writing to the same directory in the same second get _2, _3, ... suffixes
+    instead of overwriting each other."""
+    stem = os.path.join(directory, f"{prefix}_{time.strftime('%Y%m%d-%H%M%S')}")
+    counter = 1
+    while True:
+        filename = f"{stem}{extension}" if counter == 1 else f"{stem}_{counter}{extension}"
+        try:
+            os.close(os.open(filename, os.O_WRONLY | os.O_CREAT | os.O_EXCL))
+            return filename
+        except FileExistsError:
+            counter += 1
+
 # Function to export statistics to CSV
-def export_to_csv(stats, gamepad_name, raw_results):
-    timestamp = time.strftime("%Y%m%d-%H%M%S")
-    filename = f"latency_test_{timestamp}.csv"
+def export_to_csv(stats, gamepad_name, raw_results, directory="."):
+    filename = new_result_file(directory, "latency_test", ".csv")
     stats_copy = stats.copy()
-    stats_copy['filtered_results'] = ', '.join(str(round(x, 2)) for x in stats['filtered_results'])
+    stats_copy['filtered_results'] = format_delay_list(stats['filtered_results'])
     stats_copy['gamepad_name'] = gamepad_name  # Add gamepad name to stats
-    stats_copy['raw_results'] = ', '.join(str(round(x, 2)) for x in raw_results)  # Add raw results to stats
+    stats_copy['raw_results'] = format_delay_list(raw_results)  # Add raw results to stats
     with open(filename, 'w', newline='') as csvfile:
         writer = csv.DictWriter(csvfile, fieldnames=stats_copy.keys())
         writer.writeheader()
         writer.writerow(stats_copy)
     print(f"Data saved to file {filename}")
+    return filename
 def print_error(message):
     print(f"\n{Fore.YELLOW}Error: {message}{Fore.RESET}")
 def print_info(message):
     print(f"\n{Fore.GREEN}Info: {message}{Fore.RESET}")
 
+def init_pygame_input():
+    """Initialises only what Pygame joysticks need without a window: the event queue (dummy video driver) and joysticks"""
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    if not pygame.display.get_init():
+        pygame.display.init()
+    pygame.joystick.init()
+
+def clear_pygame_events():
+    """Drops queued Pygame events; nothing to do when Pygame is not used for input (headless direct backends)"""
+    if pygame.display.get_init():
+        pygame.event.clear()
+
 def load_window_icon():
     """Load window icon from various possible locations"""
     icon_paths = [
@@ -291,23 +651,24 @@ def load_window_icon():
     return None
 
 # ASCII Logo
-print(f" ")
-print("██████╗ ██████╗  ██████╗ ███╗   ███╗███████╗████████╗██╗  ██╗███████╗██╗   ██╗███████╗   " + Fore.LIGHTRED_EX + " █████╗ ██████╗ " + Fore.RESET + "")
-print("██╔══██╗██╔══██╗██╔═══██╗████╗ ████║██╔════╝╚══██╔══╝██║  ██║██╔════╝██║   ██║██╔════╝   " + Fore.LIGHTRED_EX + "██╔══██╗╚════██╗" + Fore.RESET + "")
-print("██████╔╝██████╔╝██║   ██║██╔████╔██║█████╗     ██║   ███████║█████╗  ██║   ██║███████╗   " + Fore.LIGHTRED_EX + "╚█████╔╝ █████╔╝" + Fore.RESET + "")
-print("██╔═══╝ ██╔══██╗██║   ██║██║╚██╔╝██║██╔══╝     ██║   ██╔══██║██╔══╝  ██║   ██║╚════██║   " + Fore.LIGHTRED_EX + "██╔══██╗██╔═══╝ " + Fore.RESET + "")
-print("██║     ██║  ██║╚██████╔╝██║ ╚═╝ ██║███████╗   ██║   ██║  ██║███████╗╚██████╔╝███████║   " + Fore.LIGHTRED_EX + "╚█████╔╝███████╗" + Fore.RESET + "")
-print("╚═╝     ╚═╝  ╚═╝ ╚═════╝ ╚═╝     ╚═╝╚══════╝   ╚═╝   ╚═╝  ╚═╝╚══════╝ ╚═════╝ ╚══════╝   " + Fore.LIGHTRED_EX + " ╚════╝ ╚══════╝" + Fore.RESET + "")                                                                                                 
-print(f"v.{VERSION} by John Punch (" + Fore.LIGHTRED_EX + "https://gamepadla.com" + Fore.RESET + ")")
-print(f"{Fore.YELLOW}Commercial use requires a license: https://github.com/cakama3a/Prometheus82/blob/main/LICENSE.md{Fore.RESET}")
-print(f" ")
-print(f"{Fore.CYAN}Professional gamepad latency tester with microsecond precision.{Fore.RESET}")
-print(f"{Fore.CYAN}Measures button and stick response time using Prometheus 82 hardware tester.{Fore.RESET}")
-print(f" ")
-print(f"Support the project: " + Fore.LIGHTRED_EX + "https://ko-fi.com/gamepadla" + Fore.RESET + "")
-print(f"How to use Prometheus 82: " + Fore.LIGHTRED_EX + "https://youtu.be/NBS_tU-7VqA" + Fore.RESET + "")
-print(f"GitHub page: " + Fore.LIGHTRED_EX + "https://github.com/cakama3a/Prometheus82" + Fore.RESET + "")
-print(f"{Style.DIM}To open links, press CTRL+Click{Style.RESET_ALL}")
+def print_banner():
+    print(f" ")
+    print("██████╗ ██████╗  ██████╗ ███╗   ███╗███████╗████████╗██╗  ██╗███████╗██╗   ██╗███████╗   " + Fore.LIGHTRED_EX + " █████╗ ██████╗ " + Fore.RESET + "")
+    print("██╔══██╗██╔══██╗██╔═══██╗████╗ ████║██╔════╝╚══██╔══╝██║  ██║██╔════╝██║   ██║██╔════╝   " + Fore.LIGHTRED_EX + "██╔══██╗╚════██╗" + Fore.RESET + "")
+    print("██████╔╝██████╔╝██║   ██║██╔████╔██║█████╗     ██║   ███████║█████╗  ██║   ██║███████╗   " + Fore.LIGHTRED_EX + "╚█████╔╝ █████╔╝" + Fore.RESET + "")
+    print("██╔═══╝ ██╔══██╗██║   ██║██║╚██╔╝██║██╔══╝     ██║   ██╔══██║██╔══╝  ██║   ██║╚════██║   " + Fore.LIGHTRED_EX + "██╔══██╗██╔═══╝ " + Fore.RESET + "")
+    print("██║     ██║  ██║╚██████╔╝██║ ╚═╝ ██║███████╗   ██║   ██║  ██║███████╗╚██████╔╝███████║   " + Fore.LIGHTRED_EX + "╚█████╔╝███████╗" + Fore.RESET + "")
+    print("╚═╝     ╚═╝  ╚═╝ ╚═════╝ ╚═╝     ╚═╝╚══════╝   ╚═╝   ╚═╝  ╚═╝╚══════╝ ╚═════╝ ╚══════╝   " + Fore.LIGHTRED_EX + " ╚════╝ ╚══════╝" + Fore.RESET + "")                                                                                                 
+    print(f"v.{VERSION} by John Punch (" + Fore.LIGHTRED_EX + "https://gamepadla.com" + Fore.RESET + ")")
+    print(f"{Fore.YELLOW}Commercial use requires a license: https://github.com/cakama3a/Prometheus82/blob/main/LICENSE.md{Fore.RESET}")
+    print(f" ")
+    print(f"{Fore.CYAN}Professional gamepad latency tester with microsecond precision.{Fore.RESET}")
+    print(f"{Fore.CYAN}Measures button and stick response time using Prometheus 82 hardware tester.{Fore.RESET}")
+    print(f" ")
+    print(f"Support the project: " + Fore.LIGHTRED_EX + "https://ko-fi.com/gamepadla" + Fore.RESET + "")
+    print(f"How to use Prometheus 82: " + Fore.LIGHTRED_EX + "https://youtu.be/NBS_tU-7VqA" + Fore.RESET + "")
+    print(f"GitHub page: " + Fore.LIGHTRED_EX + "https://github.com/cakama3a/Prometheus82" + Fore.RESET + "")
+    print(f"{Style.DIM}To open links, press CTRL+Click{Style.RESET_ALL}")
 
 def get_input_with_countdown(prompt, menu=None, show_cooling=True, max_len=None):
     """Reads user input while updating the cooling status in real-time and keeping the Pygame window responsive."""
@@ -375,10 +736,82 @@ def get_input_with_countdown(prompt, menu=None, show_cooling=True, max_len=None)
             time.sleep(0.01)
     except KeyboardInterrupt: print(); raise
 
+class ReportTimeline:
+    """Host timestamps of the input reports (or state changes) of one direct backend, kept in a fixed ring.
+    The reader thread only stores timestamps; intervals are evaluated after the test by estimate()."""
+
+    def __init__(self, continuous, capacity=REPORT_TIMELINE_CAPACITY):
+        self.continuous = continuous  # Device sends every report (HID); False: only state changes are seen (evdev)
+        self.capacity = capacity
+        self.times_ns = array('q', bytes(8 * capacity))
+        self.edges = array('b', bytes(capacity))  # 1: the report carried a button/key change or threshold crossing
+        self.count = 0
+
+    def add(self, timestamp_ns, edge=False):
+        slot = self.count % self.capacity
+        self.times_ns[slot] = timestamp_ns
+        self.edges[slot] = edge
+        self.count += 1
+
+    def _ordered(self, column, count):
+        if count <= self.capacity:
+            return column[:count].tolist()
+        slot = count % self.capacity
+        return column[slot:].tolist() + column[:slot].tolist()
+
+    def snapshot(self, since_ns=None, with_edges=False):
+        """Recorded timestamps in order (the last `capacity`), optionally only those from since_ns on.
+        With with_edges, returns (timestamps, edge flags)."""
+        count = self.count
+        times = self._ordered(self.times_ns, count)
+        start = bisect.bisect_left(times, since_ns) if since_ns is not None else 0
+        if with_edges:
+            return times[start:], self._ordered(self.edges, count)[start:]
+        return times[start:]
+
+    def estimate(self, since_ns=None):
+        """Effective report interval (median, ms), its jitter and the dropped reports, or None with too few reports.
+        Gaps above REPORT_MAX_INTERVAL_MS are idle time; with state changes only, longer gaps are not counted as drops.
+        With state changes only, intervals that start or end at an input edge are left out: the gap between the
+        solenoid's press and release is the pulse length, not the report interval. Without other state changes
+        (idle noise such as stick or sensor jitter) there is then no estimate."""
+        times, edges = self.snapshot(since_ns, with_edges=True)
+        max_ns = REPORT_MAX_INTERVAL_MS * 1_000_000
+        if self.continuous:
+            intervals = [b - a for a, b in zip(times, times[1:]) if 0 < b - a <= max_ns]
+        else:
+            intervals = [b - a for a, b, edge_a, edge_b in zip(times, times[1:], edges, edges[1:])
+                         if 0 < b - a <= max_ns and not edge_a and not edge_b]
+        if len(intervals) < REPORT_MIN_INTERVALS:
+            return None
+        median = statistics.median(intervals)
+        regular = [i for i in intervals if i <= 1.5 * median]
+        dropped = sum(round(i / median) - 1 for i in intervals if i > 1.5 * median) if self.continuous else None
+        return {
+            'report_interval': round(median / 1e6, 4),
+            'report_rate_hz': round(1e9 / median, 1),
+            'report_jitter': round(statistics.pstdev(regular) / 1e6, 4),
+            'dropped_reports': dropped,
+            'report_count': len(times),
+            'report_source': 'reports' if self.continuous else 'state changes',
+        }
+
+
+def report_rate_warning(stats):
+    """Warning text when the controller's report interval is a large part of the measured latency, else None"""
+    interval = stats.get('report_interval')
+    if interval is None or not stats.get('avg') or interval < REPORT_DOMINANCE_RATIO * stats['avg']:
+        return None
+    return (f"The controller reports only every {interval:.2f} ms ({stats['report_rate_hz']:.0f} Hz), "
+            f"{interval / stats['avg'] * 100:.0f}% of the average latency: the result mostly reflects the report rate "
+            f"(about {interval / 2:.2f} ms of waiting on average).")
+
+
 class SteamControllerDirect:
     """Steam Controller 2026 direct HID adapter compatible with Pygame joystick calls."""
 
     VALVE_VID = 0x28DE
+    CONTINUOUS_REPORTS = True  # State reports arrive at the report rate even without changes
     SC2026_WIRED_PID = 0x1302
     SC2026_DONGLE_PID = 0x1304
     SUPPORTED_PIDS = {SC2026_WIRED_PID, SC2026_DONGLE_PID}
@@ -426,6 +859,15 @@ class SteamControllerDirect:
         self.buttons = [0] * len(self.BUTTON_BITS)
         self._running = False
         self._heartbeat = None
+        self._reader = None
+        self._reader_running = False
+        self._axis_edges_ns = [None] * len(self.axes)      # Earliest threshold crossing since arm()
+        self._button_edges_ns = [None] * len(self.buttons)  # Earliest press since arm()
+        self._edge_lock = threading.Lock()  # Held by the reader while it applies a report, and by arm()
+        self.last_report_ns = 0
+        self.report_count = 0
+        self.report_timeline = None  # ReportTimeline fed with every state report
+        self.wake_event = None
 
     @classmethod
     def available_devices(cls):
@@ -536,8 +978,62 @@ class SteamControllerDirect:
         except Exception:
             pass
         self.disable_lizard_mode()
+        if HID_READER_THREAD:
+            self.start_reader()
+
+    def start_reader(self):
+        """Starts the background thread that blocks on input reports and timestamps each one"""
+        if self._reader_running or not self.device:
+            return
+        self._reader_running = True
+        self._reader = threading.Thread(target=self._reader_loop, daemon=True)
+        self._reader.start()
+
+    def stop_reader(self):
+        self._reader_running = False
+        if self._reader:
+            self._reader.join(timeout=0.3)
+            self._reader = None
+
+    def _reader_loop(self):
+        while self._reader_running:
+            try:
+                data = self.device.read(64, 100)
+            except Exception:
+                time.sleep(0.01)
+                continue
+            if not data:
+                continue
+            timestamp_ns = time.perf_counter_ns()
+            if data[0] in self.SERVICE_REPORTS:
+                continue
+            if data[0] not in (self.REPORT_STATE, self.REPORT_EXTENDED_STATE, self.REPORT_PUCK_STATE) or len(data) < 18:
+                continue
+            self._parse_state_report(data, timestamp_ns)
+            if self.wake_event is not None:
+                self.wake_event.set()
+
+    def has_event_timestamps(self):
+        return self._reader_running
+
+    def arm(self):
+        """Forgets recorded edges so the next crossing/press belongs to the new measurement cycle.
+        Takes the reader's lock, so a report is applied either wholly before or wholly after arming."""
+        with self._edge_lock:
+            self._axis_edges_ns = [None] * len(self.axes)
+            self._button_edges_ns = [None] * len(self.buttons)
+
+    def edge_time_us(self, kind, index):
+        """Returns the report timestamp (µs) of the first axis crossing or button press since arm(), or None"""
+        if not self._reader_running:
+            return None
+        edges = self._axis_edges_ns if kind == "axis" else self._button_edges_ns
+        if index is None or not 0 <= index < len(edges) or edges[index] is None:
+            return None
+        return edges[index] / 1000.0
 
     def close(self):
+        self.stop_reader()
         self._running = False
         if self._heartbeat:
             self._heartbeat.join(timeout=0.2)
@@ -589,8 +1085,8 @@ class SteamControllerDirect:
         return False
 
     def update(self):
-        if not self.device:
-            return
+        if not self.device or self._reader_running:
+            return  # State is kept current by the reader thread
         for _ in range(32):
             try:
                 data = self.device.read(64, 0)
@@ -606,7 +1102,7 @@ class SteamControllerDirect:
                 continue
             self._parse_state_report(data)
 
-    def _parse_state_report(self, data):
+    def _parse_state_report(self, data, timestamp_ns=None):
         def s16(offset):
             return int.from_bytes(bytes(data[offset:offset + 2]), "little", signed=True)
 
@@ -616,13 +1112,30 @@ class SteamControllerDirect:
                 value = -value
             return max(-1.0, min(1.0, value / 32767.0))
 
-        self.buttons = [1 if data[offset] & mask else 0 for offset, mask in self.BUTTON_BITS]
-        self.axes[0] = axis(10)
-        self.axes[1] = axis(12, invert=True)
-        self.axes[2] = axis(14)
-        self.axes[3] = axis(16, invert=True)
-        self.axes[4] = max(0.0, min(1.0, s16(6) / 32767.0))
-        self.axes[5] = max(0.0, min(1.0, s16(8) / 32767.0))
+        buttons = [1 if data[offset] & mask else 0 for offset, mask in self.BUTTON_BITS]
+        axes = [
+            axis(10),
+            axis(12, invert=True),
+            axis(14),
+            axis(16, invert=True),
+            max(0.0, min(1.0, s16(6) / 32767.0)),
+            max(0.0, min(1.0, s16(8) / 32767.0)),
+        ]
+        with self._edge_lock:
+            if timestamp_ns is not None:
+                # Per-report edge detection: keep the earliest crossing/press since the last arm()
+                for i, value in enumerate(axes):
+                    if self._axis_edges_ns[i] is None and abs(value) >= STICK_THRESHOLD > abs(self.axes[i]):
+                        self._axis_edges_ns[i] = timestamp_ns
+                for i, pressed in enumerate(buttons):
+                    if pressed and not self.buttons[i] and self._button_edges_ns[i] is None:
+                        self._button_edges_ns[i] = timestamp_ns
+                self.last_report_ns = timestamp_ns
+                self.report_count += 1
+                if self.report_timeline is not None:
+                    self.report_timeline.add(timestamp_ns)
+            self.buttons = buttons
+            self.axes[:] = axes
 
     def get_name(self):
         if self.device_info and self.device_info.get("product_id") == self.SC2026_DONGLE_PID:
@@ -653,10 +1166,1781 @@ class SteamControllerDirect:
         return 0
 
 
+class EvdevDevice:
+    """Linux evdev gamepad adapter compatible with Pygame joystick calls.
+    Events are read by one shared epoll thread and keep the kernel's per-event timestamp (CLOCK_MONOTONIC, or
+    CLOCK_REALTIME on kernels that refuse to switch), converted to the perf_counter time base with a per-device
+    offset, so input is seen without polling and without window focus."""
+
+    EV_SYN = 0x00
+    EV_KEY = 0x01
+    EV_ABS = 0x03
+    SYN_REPORT = 0x00
+    ABS_X = 0x00
+    ABS_HAT0X = 0x10
+    ABS_HAT3Y = 0x17
+    ABS_CNT = 0x40
+    ONE_SIDED_REST = 0.25  # An axis with min >= 0 resting in this lowest part of its range is a trigger (0..1)
+    AXIS_PARTNERS = {0x00: 0x01, 0x01: 0x00, 0x03: 0x04, 0x04: 0x03, 0x02: 0x05, 0x05: 0x02}  # X/Y, RX/RY, Z/RZ
+    BTN_MISC = 0x100
+    BTN_JOYSTICK = 0x120
+    BTN_DIGI = 0x140
+    KEY_ENTER = 28
+    KEY_SPACE = 57
+    KEY_A = 30
+    KEY_CNT = 0x300
+    EVENT_FORMAT = "llHHi"
+    EVENT_SIZE = struct.calcsize(EVENT_FORMAT)
+    CLOCK_MONOTONIC = 1
+
+    _epoll = None
+    _reader = None
+    _registry = {}
+    _registry_lock = threading.Lock()
+
+    def __init__(self, path):
+        self.path = path
+        self.fd = None
+        self.event_clock = None      # Clock of the kernel event timestamps (set by init)
+        self.clock_offset_ns = 0     # Maps this device's event time onto perf_counter_ns
+        self.name = "Unknown evdev device"
+        self.input_id = (0, 0, 0, 0)
+        self.axis_codes = []
+        self.axis_ranges = {}
+        self.button_codes = []
+        self.hat_codes = []
+        self.axes = []
+        self.buttons = []
+        self.pressed_keys = set()
+        self._axis_index = {}
+        self._one_sided = set()      # Axis codes normalized to 0..1 (triggers) instead of -1..1
+        self._button_index = {}
+        self._axis_edges_ns = []
+        self._button_edges_ns = []
+        self._key_edges_ns = {}
+        self._edge_lock = threading.Lock()  # Held by the reader while it applies a batch of events, and by arm()
+        self.last_key_code = None
+        self.last_key_ns = 0
+        self.last_report_ns = 0
+        self.report_count = 0
+        self.report_timeline = None  # ReportTimeline fed with every SYN_REPORT (state change)
+        self._frame_edge = False     # The events since the last SYN_REPORT include a press/release or threshold crossing
+        self.wake_event = None
+
+    @staticmethod
+    def _ioc(direction, nr, size):
+        return (direction << 30) | (size << 16) | (ord('E') << 8) | nr
+
+    @classmethod
+    def _ioctl_bytes(cls, fd, nr, size):
+        buf = bytearray(size)
+        fcntl.ioctl(fd, cls._ioc(2, nr, size), buf, True)
+        return bytes(buf)
+
+    @staticmethod
+    def _bit(bits, code):
+        return code // 8 < len(bits) and bool(bits[code // 8] & (1 << (code % 8)))
+
+    @classmethod
+    def _capabilities(cls, fd):
+        key_bits = cls._ioctl_bytes(fd, 0x20 + cls.EV_KEY, cls.KEY_CNT // 8)
+        abs_bits = cls._ioctl_bytes(fd, 0x20 + cls.EV_ABS, cls.ABS_CNT // 8)
+        return key_bits, abs_bits
+
+    @classmethod
+    def _classify(cls, key_bits, abs_bits):
+        if cls._bit(abs_bits, cls.ABS_X) and any(cls._bit(key_bits, c) for c in range(cls.BTN_JOYSTICK, cls.BTN_DIGI)):
+            return "gamepad"
+        if cls._bit(key_bits, cls.KEY_SPACE) and cls._bit(key_bits, cls.KEY_A):
+            return "keyboard"
+        return None
+
+    @classmethod
+    def available_devices(cls, kind="gamepad"):
+        if fcntl is None or not hasattr(select, "epoll"):
+            return []
+        devices = []
+        for path in sorted(glob.glob("/dev/input/event*"), key=lambda p: int(p[len("/dev/input/event"):] or 0)):
+            try:
+                fd = os.open(path, os.O_RDONLY | os.O_NONBLOCK)
+            except OSError:
+                continue  # No permission (add the user to the 'input' group) or device vanished
+            try:
+                if cls._classify(*cls._capabilities(fd)) == kind:
+                    name = cls._ioctl_bytes(fd, 0x06, 256).split(b"\0", 1)[0].decode("utf-8", "replace")
+                    devices.append({"path": path, "name": name})
+            except OSError:
+                pass
+            finally:
+                os.close(fd)
+        return devices
+
+    @classmethod
+    def open_device(cls, path):
+        device = cls(path)
+        device.init()
+        return device
+
+    def init(self):
+        if self.fd is not None:
+            return
+        if fcntl is None:
+            raise RuntimeError("evdev input is only available on Linux")
+        self.fd = os.open(self.path, os.O_RDONLY | os.O_NONBLOCK)
+        try:
+            fcntl.ioctl(self.fd, self._ioc(1, 0xa0, 4), struct.pack("i", self.CLOCK_MONOTONIC))  # EVIOCSCLOCKID
+            self.event_clock = time.CLOCK_MONOTONIC
+        except OSError:
+            self.event_clock = time.CLOCK_REALTIME  # Old kernels: this device keeps CLOCK_REALTIME timestamps
+        self.clock_offset_ns = self._measure_clock_offset(self.event_clock)
+        self.name = self._ioctl_bytes(self.fd, 0x06, 256).split(b"\0", 1)[0].decode("utf-8", "replace")
+        self.input_id = struct.unpack("HHHH", self._ioctl_bytes(self.fd, 0x02, 8))
+        key_bits, abs_bits = self._capabilities(self.fd)
+        key_state = self._ioctl_bytes(self.fd, 0x18, self.KEY_CNT // 8)
+
+        for code in range(self.ABS_CNT):
+            if not self._bit(abs_bits, code):
+                continue
+            if self.ABS_HAT0X <= code <= self.ABS_HAT3Y:
+                self.hat_codes.append(code)
+                continue
+            value, minimum, maximum = struct.unpack("iiiiii", self._ioctl_bytes(self.fd, 0x40 + code, 24))[:3]
+            self._add_axis(code, value, minimum, maximum)
+        for code in list(range(self.BTN_JOYSTICK, self.KEY_CNT)) + list(range(self.BTN_MISC, self.BTN_JOYSTICK)):
+            if self._bit(key_bits, code):
+                self._button_index[code] = len(self.button_codes)
+                self.button_codes.append(code)
+                self.buttons.append(1 if self._bit(key_state, code) else 0)
+        self.pressed_keys = {code for code in range(self.BTN_MISC) if self._bit(key_state, code)}
+        self.arm()
+        self._register(self)
+
+    def _add_axis(self, code, value, minimum, maximum):
+        """Registers an absolute axis with its EVIOCGABS range and current value"""
+        self.axis_ranges[code] = (minimum, maximum)
+        if minimum >= 0 and value - minimum <= (maximum - minimum) * self.ONE_SIDED_REST:
+            self._one_sided.add(code)  # Triggers rest at 0; sticks with an unsigned range rest in the middle
+        self._axis_index[code] = len(self.axis_codes)
+        self.axis_codes.append(code)
+        self.axes.append(self._normalize(code, value))
+
+    def close(self):
+        self._unregister(self)
+        if self.fd is not None:
+            try:
+                os.close(self.fd)
+            except OSError:
+                pass
+            self.fd = None
+
+    def _normalize(self, code, value):
+        minimum, maximum = self.axis_ranges[code]
+        if maximum <= minimum:
+            return 0.0
+        if code in self._one_sided:
+            return max(0.0, min(1.0, (value - minimum) / (maximum - minimum)))
+        return max(-1.0, min(1.0, 2.0 * (value - minimum) / (maximum - minimum) - 1.0))
+
+    @classmethod
+    def _register(cls, device):
+        with cls._registry_lock:
+            if cls._epoll is None:
+                cls._epoll = select.epoll()
+            cls._registry[device.fd] = device
+            cls._epoll.register(device.fd, select.EPOLLIN)
+            if cls._reader is None:
+                cls._reader = threading.Thread(target=cls._reader_loop, daemon=True)
+                cls._reader.start()
+
+    @classmethod
+    def _unregister(cls, device):
+        with cls._registry_lock:
+            if device.fd in cls._registry:
+                del cls._registry[device.fd]
+                try:
+                    cls._epoll.unregister(device.fd)
+                except (OSError, ValueError):
+                    pass
+
+    @staticmethod
+    def _measure_clock_offset(clock):
+        """Offset (ns) that maps kernel event time on `clock` onto perf_counter_ns (0 on Linux with CLOCK_MONOTONIC)"""
+        best = None
+        for _ in range(5):
+            before = time.perf_counter_ns()
+            event_time = time.clock_gettime_ns(clock)
+            after = time.perf_counter_ns()
+            if best is None or after - before < best[0]:
+                best = (after - before, (before + after) // 2 - event_time)
+        return best[1]
+
+    @classmethod
+    def _reader_loop(cls):
+        event_size = cls.EVENT_SIZE
+        unpack = struct.Struct(cls.EVENT_FORMAT).unpack_from
+        while True:
+            try:
+                ready = cls._epoll.poll(0.1)
+            except (OSError, ValueError):
+                time.sleep(0.01)
+                continue
+            for fd, _ in ready:
+                device = cls._registry.get(fd)
+                if device is None:
+                    continue
+                try:
+                    data = os.read(fd, event_size * 64)
+                except BlockingIOError:
+                    continue
+                except OSError:
+                    cls._unregister(device)  # Device unplugged
+                    continue
+                with device._edge_lock:
+                    for offset in range(0, len(data) - event_size + 1, event_size):
+                        sec, usec, ev_type, code, value = unpack(data, offset)
+                        device._handle_event(ev_type, code, value, sec * 1_000_000_000 + usec * 1000 + device.clock_offset_ns)
+
+    def _handle_event(self, ev_type, code, value, timestamp_ns):
+        if ev_type == self.EV_ABS:
+            index = self._axis_index.get(code)
+            if index is not None:
+                new_value = self._normalize(code, value)
+                if (abs(new_value) >= STICK_THRESHOLD) != (abs(self.axes[index]) >= STICK_THRESHOLD):
+                    self._frame_edge = True
+                if self._axis_edges_ns[index] is None and abs(new_value) >= STICK_THRESHOLD > abs(self.axes[index]):
+                    self._axis_edges_ns[index] = timestamp_ns
+                self.axes[index] = new_value
+        elif ev_type == self.EV_KEY and value != 2:  # 2 = autorepeat
+            index = self._button_index.get(code)
+            if index is not None:
+                if bool(value) != bool(self.buttons[index]):
+                    self._frame_edge = True
+                if value and not self.buttons[index] and self._button_edges_ns[index] is None:
+                    self._button_edges_ns[index] = timestamp_ns
+                self.buttons[index] = 1 if value else 0
+            elif value:
+                if code not in self.pressed_keys:
+                    self._frame_edge = True
+                    if code not in self._key_edges_ns:
+                        self._key_edges_ns[code] = timestamp_ns
+                self.pressed_keys.add(code)
+                self.last_key_code = code
+                self.last_key_ns = timestamp_ns
+            else:
+                if code in self.pressed_keys:
+                    self._frame_edge = True
+                self.pressed_keys.discard(code)
+        elif ev_type == self.EV_SYN and code == self.SYN_REPORT:
+            self.last_report_ns = timestamp_ns
+            self.report_count += 1
+            if self.report_timeline is not None:
+                self.report_timeline.add(timestamp_ns, self._frame_edge)
+            self._frame_edge = False
+            if self.wake_event is not None:
+                self.wake_event.set()
+
+    def arm(self):
+        """Forgets recorded edges so the next crossing/press belongs to the new measurement cycle.
+        Takes the reader's lock, so a batch of events is applied either wholly before or wholly after arming."""
+        with self._edge_lock:
+            self._axis_edges_ns = [None] * len(self.axes)
+            self._button_edges_ns = [None] * len(self.buttons)
+            self._key_edges_ns = {}
+
+    def edge_time_us(self, kind, index):
+        """Returns the kernel timestamp (µs) of the first axis crossing, button or key press since arm(), or None"""
+        if kind == "key":
+            edge = self._key_edges_ns.get(index)
+        else:
+            edges = self._axis_edges_ns if kind == "axis" else self._button_edges_ns
+            edge = edges[index] if index is not None and 0 <= index < len(edges) else None
+        return edge / 1000.0 if edge is not None else None
+
+    def has_event_timestamps(self):
+        return self.fd is not None
+
+    def update(self):
+        return  # State is kept current by the epoll reader
+
+    def get_name(self):
+        return self.name
+
+    def get_guid(self):
+        # Same layout as SDL's Linux GUID so detect_input_mode() can read the vendor ID chunks
+        return "".join(f"{x & 0xFF:02x}{x >> 8:02x}0000" for x in self.input_id)
+
+    def get_id(self):
+        return -1
+
+    def get_numaxes(self):
+        return len(self.axes)
+
+    def get_axis(self, index):
+        return self.axes[index]
+
+    def axis_partner(self, index):
+        """Index of the other axis of the same stick by event code (not by position), or None"""
+        code = self.axis_codes[index]
+        partner = self.AXIS_PARTNERS.get(code)
+        if partner not in self._axis_index or (partner in self._one_sided) != (code in self._one_sided):
+            return None
+        return self._axis_index[partner]
+
+    def get_numbuttons(self):
+        return len(self.buttons)
+
+    def get_button(self, index):
+        return self.buttons[index]
+
+    def get_numhats(self):
+        return len(self.hat_codes) // 2
+
+
+class EvdevKeyboard:
+    """Groups every evdev keyboard so the keyboard test does not depend on the test window having focus.
+    Key codes are Linux KEY_* codes, not Pygame key constants."""
+
+    def __init__(self, devices):
+        self.devices = devices
+
+    @classmethod
+    def open_all(cls):
+        devices = []
+        for dev in EvdevDevice.available_devices("keyboard"):
+            try:
+                devices.append(EvdevDevice.open_device(dev["path"]))
+            except OSError:
+                pass
+        return cls(devices) if devices else None
+
+    def close(self):
+        for device in self.devices:
+            device.close()
+
+    @property
+    def wake_event(self):
+        return self.devices[0].wake_event
+
+    @wake_event.setter
+    def wake_event(self, event):
+        for device in self.devices:
+            device.wake_event = event
+
+    @property
+    def last_key_code(self):
+        latest = max(self.devices, key=lambda d: d.last_key_ns)
+        return latest.last_key_code
+
+    @property
+    def last_key_ns(self):
+        return max(d.last_key_ns for d in self.devices)
+
+    def arm(self):
+        for device in self.devices:
+            device.arm()
+
+    def edge_time_us(self, kind, code):
+        edges = [e for e in (d.edge_time_us(kind, code) for d in self.devices) if e is not None]
+        return min(edges) if edges else None
+
+    def has_event_timestamps(self):
+        return True
+
+    def is_pressed(self, code):
+        return any(code in device.pressed_keys for device in self.devices)
+
+
+# Input backends that keep their own state (no Pygame event pump needed)
+DIRECT_INPUT_BACKENDS = (SteamControllerDirect, EvdevDevice)
+
+
+class SerialCaptureEngine:
+    """Serial port adapter that timestamps every incoming byte on a dedicated reader thread.
+    Mimics the pyserial calls used by LatencyTester (in_waiting, read, reset_input_buffer, write, flush).
+    Captured bytes are kept in a preallocated ring buffer together with their perf_counter_ns arrival time."""
+
+    READ_TIMEOUT = 0.05  # Blocking read timeout (s) so the thread can notice stop requests
+
+    def __init__(self, ser, capacity=SERIAL_CAPTURE_BUFFER):
+        self.ser = ser
+        self.capacity = capacity
+        self._bytes = bytearray(capacity)
+        self._stamps = array('q', [0]) * capacity
+        self._head = 0  # Total bytes written by the reader thread
+        self._tail = 0  # Total bytes consumed by the measurement thread
+        self.overflows = 0
+        self.last_timestamp_ns = 0
+        self._running = False
+        self._thread = None
+        self._saved_timeout = None
+        self.wake_event = None
+
+    def start(self):
+        if self._running:
+            return
+        self._saved_timeout = self.ser.timeout
+        self.ser.timeout = self.READ_TIMEOUT
+        self._running = True
+        self._thread = threading.Thread(target=self._reader_loop, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._running = False
+        if self._thread:
+            self._thread.join(timeout=0.5)
+            self._thread = None
+        try:
+            self.ser.timeout = self._saved_timeout
+        except Exception:
+            pass
+
+    def _reader_loop(self):
+        ser = self.ser
+        capacity = self.capacity
+        while self._running:
+            try:
+                data = ser.read(max(1, ser.in_waiting))
+            except Exception:
+                self._running = False
+                return
+            if not data:
+                continue
+            now_ns = time.perf_counter_ns()
+            head = self._head
+            for b in data:
+                idx = head % capacity
+                self._bytes[idx] = b
+                self._stamps[idx] = now_ns
+                head += 1
+            self._head = head  # Publish only after the records are stored
+            if self.wake_event is not None:
+                self.wake_event.set()
+
+    @property
+    def in_waiting(self):
+        head = self._head
+        if head - self._tail > self.capacity:
+            self.overflows += head - self._tail - self.capacity
+            self._tail = head - self.capacity
+        return head - self._tail
+
+    def read_event(self):
+        """Returns (byte, timestamp_ns) of the next captured byte, or None if nothing is buffered"""
+        if not self.in_waiting:
+            return None
+        idx = self._tail % self.capacity
+        event = (bytes((self._bytes[idx],)), self._stamps[idx])
+        self._tail += 1
+        self.last_timestamp_ns = event[1]
+        return event
+
+    def read(self, size=1):
+        deadline = time.perf_counter() + (self._saved_timeout if self._saved_timeout is not None else 1.0)
+        out = b""
+        while len(out) < size:
+            event = self.read_event()
+            if event is None:
+                if time.perf_counter() >= deadline or not self._running:
+                    break
+                time.sleep(0.0005)
+                continue
+            out += event[0]
+        return out
+
+    def reset_input_buffer(self):
+        self._tail = self._head
+
+    def reset_output_buffer(self):
+        self.ser.reset_output_buffer()
+
+    def write(self, data):
+        return self.ser.write(data)
+
+    def flush(self):
+        self.ser.flush()
+
+    @property
+    def timeout(self):
+        return self._saved_timeout
+
+    @timeout.setter
+    def timeout(self, value):
+        self._saved_timeout = value
+
+
+class RunningStats:
+    """O(1) running statistics (Welford mean/variance plus min/max) updated as samples are appended"""
+
+    __slots__ = ("count", "mean", "_m2", "min", "max")
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+        self.min = None
+        self.max = None
+
+    def add(self, value):
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (value - self.mean)
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+
+    @property
+    def stdev(self):
+        """Sample standard deviation (same as statistics.stdev)"""
+        return math.sqrt(self._m2 / (self.count - 1)) if self.count > 1 else 0.0
+
+    @property
+    def pstdev(self):
+        """Population standard deviation (same as statistics.pstdev)"""
+        return math.sqrt(self._m2 / self.count) if self.count > 0 else 0.0
+
+
+class OrderStatistics:
+    """Incremental order statistics with O(log n) insert and rank/quantile lookup.
+    Samples are bucketed on a fixed-point grid; Fenwick trees hold the count, sum and sum of squares per bucket,
+    and each bucket keeps its exact values, so ranks, quantile-filtered sums and min/max match a full sort."""
+
+    def __init__(self, low_ms, high_ms, resolution_ms=ORDER_STATS_RESOLUTION_MS):
+        self.low_ms = low_ms
+        self.resolution_ms = resolution_ms
+        self.size = max(1, int(math.ceil((high_ms - low_ms) / resolution_ms)) + 1)
+        self._counts = array('l', [0]) * (self.size + 1)  # Fenwick trees, 1-indexed
+        self._sums = array('d', [0.0]) * (self.size + 1)
+        self._squares = array('d', [0.0]) * (self.size + 1)
+        self._buckets = {}  # bucket index -> sorted exact values
+        self._top_step = 1 << (self.size.bit_length() - 1)
+        self.count = 0
+
+    def add(self, value):
+        index = int((value - self.low_ms) / self.resolution_ms)
+        index = min(max(index, 0), self.size - 1)  # Out-of-range values share the edge buckets, order is kept
+        bisect.insort(self._buckets.setdefault(index, []), value)
+        square = value * value
+        i = index + 1
+        while i <= self.size:
+            self._counts[i] += 1
+            self._sums[i] += value
+            self._squares[i] += square
+            i += i & -i
+        self.count += 1
+
+    def _descend(self, rank):
+        """Finds the bucket holding the value of a 0-based rank.
+        Returns (bucket index, rank inside bucket, sum and sum of squares of all lower buckets)."""
+        pos, remaining, total, squares = 0, rank, 0.0, 0.0
+        step = self._top_step
+        while step:
+            nxt = pos + step
+            if nxt <= self.size and self._counts[nxt] <= remaining:
+                pos = nxt
+                remaining -= self._counts[nxt]
+                total += self._sums[nxt]
+                squares += self._squares[nxt]
+            step >>= 1
+        return pos, remaining, total, squares
+
+    def value_at(self, rank):
+        """Value with the given 0-based rank in sorted order"""
+        bucket, inner, _, _ = self._descend(rank)
+        return self._buckets[bucket][inner]
+
+    def _prefix(self, rank):
+        """Sum and sum of squares of the `rank` smallest values"""
+        if rank >= self.count:
+            return self._prefix_all()
+        bucket, inner, total, squares = self._descend(rank)
+        head = self._buckets[bucket][:inner]
+        return total + sum(head), squares + sum(v * v for v in head)
+
+    def _prefix_all(self):
+        total, squares, i = 0.0, 0.0, self.size
+        while i > 0:
+            total += self._sums[i]
+            squares += self._squares[i]
+            i -= i & -i
+        return total, squares
+
+    def quantile(self, q):
+        """Nearest-rank quantile, same indexing as the LOWER/UPPER_QUANTILE slice in get_statistics"""
+        if not self.count:
+            return None
+        return self.value_at(min(self.count - 1, int(self.count * q)))
+
+    def filtered_bounds(self, lower=LOWER_QUANTILE, upper=UPPER_QUANTILE):
+        """Rank range [lo, hi) kept by quantile filtering (identical to the sorted-list slice)"""
+        return int(self.count * lower), min(self.count, int(self.count * upper) + 1)
+
+    def filtered_values(self, lower=LOWER_QUANTILE, upper=UPPER_QUANTILE):
+        lo, hi = self.filtered_bounds(lower, upper)
+        return [self.value_at(rank) for rank in range(lo, hi)]
+
+    def summary(self, lower=LOWER_QUANTILE, upper=UPPER_QUANTILE):
+        """Quantile-filtered count/min/max/avg/jitter plus p50/p90/p99 of all samples, or None if empty"""
+        if not self.count:
+            return None
+        lo, hi = self.filtered_bounds(lower, upper)
+        lo_sum, lo_squares = self._prefix(lo)
+        hi_sum, hi_squares = self._prefix(hi)
+        n = hi - lo
+        mean = (hi_sum - lo_sum) / n
+        variance = max(0.0, (hi_squares - lo_squares) / n - mean * mean)
+        return {
+            'filtered_samples': n,
+            'min': self.value_at(lo),
+            'max': self.value_at(hi - 1),
+            'avg': mean,
+            'jitter': math.sqrt(variance),
+            'p50': self.quantile(0.50),
+            'p90': self.quantile(0.90),
+            'p99': self.quantile(0.99),
+        }
+
+
+class CycleTrace:
+    """Always-on per-cycle trace of test_loop in preallocated array columns (a ring of the last `capacity` cycles).
+    A record is opened at the trigger and completed when the cycle is classified; render time spent in the
+    idle phase afterwards is added to the same record."""
+
+    OPEN, VALID, SKIPPED, GLITCH, TOO_LATE, TIMEOUT, TIMEOUT_IGNORED = range(7)
+    CLASS_NAMES = ("open", "valid", "skipped_first", "glitch", "too_late", "timeout", "timeout_ignored")
+    COLUMNS = ("trigger_us", "s_us", "g_us", "max_loop_delta_us", "render_us", "classification", "pulse_us")
+
+    def __init__(self, capacity=TRACE_CAPACITY):
+        self.capacity = capacity
+        self.trigger_us = array('d', bytes(8 * capacity))
+        self.s_us = array('d', bytes(8 * capacity))
+        self.g_us = array('d', bytes(8 * capacity))
+        self.max_loop_delta_us = array('d', bytes(8 * capacity))
+        self.render_us = array('d', bytes(8 * capacity))
+        self.classification = array('b', bytes(capacity))
+        self.pulse_us = array('l', [0]) * capacity
+        self.count = 0      # Cycles recorded since the start (the ring keeps the last `capacity`)
+        self.sink = None    # SessionWriter that receives every completed record
+        self.pending = []   # Slots of finished records not yet handed to the sink
+        self._slot = -1
+
+    def begin(self, trigger_us, pulse_us):
+        if self._slot >= 0 and self.sink is not None:
+            self.pending.append(self._slot)  # Final now; written in the idle phase by flush()
+        slot = self._slot = self.count % self.capacity
+        self.count += 1
+        self.trigger_us[slot] = trigger_us
+        self.s_us[slot] = 0.0
+        self.g_us[slot] = 0.0
+        self.max_loop_delta_us[slot] = 0.0
+        self.render_us[slot] = 0.0
+        self.classification[slot] = self.OPEN
+        self.pulse_us[slot] = int(pulse_us)
+
+    def note_loop(self, delta_us):
+        """Tracks the longest loop iteration while the current cycle is open"""
+        slot = self._slot
+        if slot >= 0 and self.classification[slot] == self.OPEN and delta_us > self.max_loop_delta_us[slot]:
+            self.max_loop_delta_us[slot] = delta_us
+
+    def add_render(self, duration_us):
+        if self._slot >= 0:
+            self.render_us[self._slot] += duration_us
+
+    def close(self, classification, s_us=0.0, g_us=0.0):
+        """Classifies the current cycle; S/G are 0 when they were not received"""
+        slot = self._slot
+        if slot < 0:
+            return
+        self.s_us[slot] = s_us
+        self.g_us[slot] = g_us
+        self.classification[slot] = classification
+
+    def flush(self, final=False):
+        """Hands the finished records to the sink. test_loop calls it in the idle phase after the current cycle
+        was classified, so the file write is never near a trigger or inside a measurement window; with final
+        (test end) the current record is written too."""
+        if self.sink is None:
+            return
+        slots = self.pending + ([self._slot] if final and self._slot >= 0 else [])
+        for slot in slots:
+            self.sink.append(self.trigger_us[slot], self.s_us[slot], self.g_us[slot], self.max_loop_delta_us[slot],
+                             self.render_us[slot], self.pulse_us[slot], self.classification[slot])
+        self.pending = []
+        if final:
+            self._slot = -1
+
+    def mean_interval_ms(self):
+        """Average time between consecutive retained triggers, or None with fewer than two cycles"""
+        retained = min(self.count, self.capacity)
+        if retained < 2:
+            return None
+        first = self.trigger_us[(self.count - retained) % self.capacity]
+        last = self.trigger_us[(self.count - 1) % self.capacity]
+        return round((last - first) / (retained - 1) / 1000, 2)
+
+    def records(self):
+        """Yields (cycle number, record dict) from the oldest retained cycle to the newest"""
+        first = max(0, self.count - self.capacity)
+        for cycle in range(first, self.count):
+            slot = cycle % self.capacity
+            yield cycle, {name: getattr(self, name)[slot] for name in self.COLUMNS}
+
+    def export_csv(self, filename, contact_delay=0.0):
+        """Writes one row per cycle; times are relative to the first retained trigger, S/G relative to their trigger"""
+        rows = list(self.records())
+        origin_us = rows[0][1]['trigger_us'] if rows else 0.0
+        with open(filename, 'w', newline='') as csvfile:
+            writer = csv.writer(csvfile)
+            writer.writerow(["cycle", "trigger_ms", "s_after_trigger_us", "g_after_trigger_us", "latency_ms",
+                             "max_loop_delta_us", "render_us", "classification", "pulse_us"])
+            for cycle, rec in rows:
+                s_rel = rec['s_us'] - rec['trigger_us'] if rec['s_us'] else None
+                g_rel = rec['g_us'] - rec['trigger_us'] if rec['g_us'] else None
+                latency = (g_rel - s_rel) / 1000.0 + contact_delay if s_rel is not None and g_rel is not None else None
+                writer.writerow([
+                    cycle,
+                    f"{(rec['trigger_us'] - origin_us) / 1000.0:.3f}",
+                    f"{s_rel:.1f}" if s_rel is not None else "",
+                    f"{g_rel:.1f}" if g_rel is not None else "",
+                    f"{latency:.4f}" if latency is not None else "",
+                    f"{rec['max_loop_delta_us']:.1f}",
+                    f"{rec['render_us']:.1f}",
+                    self.CLASS_NAMES[rec['classification']],
+                    rec['pulse_us'],
+                ])
+        return filename
+
+
+class SessionWriter:
+    """Binary session file (.p82s) written incrementally during a test.
+    Layout: "<4sHHI" preamble (magic, format version, codec, header length), a JSON header padded to 8 bytes,
+    then one fixed-width little-endian record per cycle (RECORD). Each record field is a typed column:
+    SessionFile exposes it as a NumPy view without parsing. With a codec only the record body is compressed,
+    as a single stream."""
+
+    MAGIC = b"P82S"
+    FORMAT_VERSION = 1
+    PREAMBLE = struct.Struct("<4sHHI")
+    RECORD = struct.Struct("<dddffib3x")
+    FIELDS = ("trigger_us", "s_us", "g_us", "max_loop_delta_us", "render_us", "pulse_us", "classification")
+    CODECS = (None, "zlib", "bz2", "lzma")
+
+    def __init__(self, filename, header, codec=None):
+        if codec not in self.CODECS:
+            raise ValueError(f"Unknown session codec: {codec}")
+        self.filename = filename
+        self.count = 0
+        self._compressor = _session_compressor(codec)
+        payload = json.dumps(dict(header, fields=list(self.FIELDS)), ensure_ascii=False).encode("utf-8")
+        payload += b" " * (-(self.PREAMBLE.size + len(payload)) % 8)
+        self._file = open(filename, "wb")
+        self._file.write(self.PREAMBLE.pack(self.MAGIC, self.FORMAT_VERSION, self.CODECS.index(codec), len(payload)))
+        self._file.write(payload)
+
+    def append(self, trigger_us, s_us, g_us, max_loop_delta_us, render_us, pulse_us, classification):
+        data = self.RECORD.pack(trigger_us, s_us, g_us, max_loop_delta_us, render_us, pulse_us, classification)
+        if self._compressor is not None:
+            data = self._compressor.compress(data)
+        if data:
+            self._file.write(data)
+        self.count += 1
+
+    def close(self):
+        if self._file is None:
+            return
+        if self._compressor is not None:
+            self._file.write(self._compressor.flush())
+        self._file.close()
+        self._file = None
+
+
+def _session_compressor(codec):
+    if codec == "zlib":
+        return zlib.compressobj(6)
+    if codec == "bz2":
+        return bz2.BZ2Compressor()
+    if codec == "lzma":
+        return lzma.LZMACompressor()
+    return None
+
+
+def _session_decompressor(codec):
+    return {"zlib": zlib.decompressobj, "bz2": bz2.BZ2Decompressor, "lzma": lzma.LZMADecompressor}[codec]()
+
+
+class SessionFile:
+    """Reads a .p82s session. Uncompressed bodies are memory-mapped, so opening is O(1) and columns are
+    NumPy views into the file; a record cut short by an interrupted run is ignored."""
+
+    def __init__(self, filename):
+        self.filename = filename
+        self._mmap = None
+        self._views = []             # Base memoryview and its slices, released together by close()
+        with open(filename, "rb") as f:
+            magic, version, codec_id, header_len = SessionWriter.PREAMBLE.unpack(f.read(SessionWriter.PREAMBLE.size))
+            if magic != SessionWriter.MAGIC:
+                raise ValueError(f"{filename} is not a Prometheus 82 session file")
+            if version > SessionWriter.FORMAT_VERSION:
+                raise ValueError(f"{filename} uses session format v{version}; this version reads up to v{SessionWriter.FORMAT_VERSION}")
+            self.header = json.loads(f.read(header_len).decode("utf-8"))
+            self.codec = SessionWriter.CODECS[codec_id]
+            offset = SessionWriter.PREAMBLE.size + header_len
+            if self.codec is None:
+                size = os.fstat(f.fileno()).st_size
+                if size > offset:
+                    self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                base = memoryview(self._mmap) if self._mmap is not None else memoryview(b"")
+                self._views.append(base)
+                body = base[offset:]
+            else:
+                f.seek(offset)
+                body = memoryview(_session_decompressor(self.codec).decompress(f.read()))
+            self._views.append(body)
+        self._body = body[:len(body) - len(body) % SessionWriter.RECORD.size]
+        self._views.append(self._body)
+        self._records = None
+
+    def __len__(self):
+        return len(self._body) // SessionWriter.RECORD.size
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @property
+    def records(self):
+        """All records as a NumPy structured array (a view of the mapped file when uncompressed)"""
+        if np is None:
+            raise RuntimeError("NumPy is required for array access; use rows() instead")
+        if self._records is None:
+            dtype = np.dtype({
+                'names': list(SessionWriter.FIELDS),
+                'formats': ['<f8', '<f8', '<f8', '<f4', '<f4', '<i4', 'i1'],
+                'offsets': [0, 8, 16, 24, 28, 32, 36],
+                'itemsize': SessionWriter.RECORD.size,
+            })
+            self._records = np.frombuffer(self._body, dtype=dtype)
+        return self._records
+
+    def column(self, name):
+        return self.records[name]
+
+    def rows(self):
+        """Yields record tuples in FIELDS order without NumPy"""
+        return SessionWriter.RECORD.iter_unpack(self._body)
+
+    def latencies_ms(self):
+        """Latencies of the valid cycles, computed like test_loop (contact delay from the header)"""
+        records = self.records
+        valid = records[records['classification'] == CycleTrace.VALID]
+        return (valid['g_us'] - valid['s_us']) / 1000.0 + self.header.get('contact_delay', 0.0)
+
+    def close(self):
+        """Releases the file. NumPy arrays taken from records/column() stay valid: while any of them is
+        alive the mapping is left to the garbage collector instead of being closed under them."""
+        self._records = None
+        exported = False
+        for view in reversed(self._views):  # Slices first, then the base view
+            try:
+                view.release()
+            except BufferError:
+                exported = True      # A NumPy view still uses this buffer
+        if self._mmap is not None and not exported:
+            try:
+                self._mmap.close()
+            except BufferError:
+                pass
+        self._mmap = None
+
+
+def open_session_writer(test_type, device_name, device_guid, protocol, contact_delay, pulse_duration_ms, iterations, timestamp_source):
+    """Creates the session file for the next test in SESSION_DIR; returns None when session files are disabled"""
+    if not SESSION_DIR:
+        return None
+    os.makedirs(SESSION_DIR, exist_ok=True)
+    extension = ".p82s" + {"zlib": ".z", "bz2": ".bz2", "lzma": ".xz"}.get(SESSION_CODEC, "")
+    filename = new_result_file(SESSION_DIR, "latency_session", extension)
+    header = {
+        'version': VERSION, 'date': time.strftime('%Y-%m-%d %H:%M:%S', time.localtime()),
+        'test_type': test_type, 'device': device_name, 'guid': device_guid, 'protocol': protocol,
+        'contact_delay': contact_delay, 'pulse_duration': pulse_duration_ms, 'iterations': iterations,
+        'timestamp_source': timestamp_source, 'os_name': platform.system(),
+    }
+    return SessionWriter(filename, header, SESSION_CODEC)
+
+
+class ResultStore:
+    """Local SQLite archive of every completed session with its per-sample latencies.
+    Sessions are indexed by device, GUID, protocol/connection/test type and date, so filtered aggregates
+    stay fast across many thousands of sessions. Each session is written in one transaction."""
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS sessions (
+            id INTEGER PRIMARY KEY,
+            created REAL NOT NULL,
+            version TEXT,
+            test_type TEXT COLLATE NOCASE,
+            device_name TEXT COLLATE NOCASE,
+            device_guid TEXT,
+            protocol TEXT COLLATE NOCASE,
+            connection TEXT COLLATE NOCASE,
+            pulse_duration REAL,
+            contact_delay REAL,
+            timestamp_source TEXT,
+            iterations INTEGER,
+            valid_samples INTEGER,
+            invalid_samples INTEGER,
+            avg REAL, jitter REAL, min REAL, max REAL, p50 REAL, p99 REAL,
+            session_file TEXT
+        );
+        CREATE TABLE IF NOT EXISTS samples (
+            session_id INTEGER NOT NULL REFERENCES sessions(id) ON DELETE CASCADE,
+            seq INTEGER NOT NULL,
+            latency_ms REAL NOT NULL,
+            PRIMARY KEY (session_id, seq)
+        ) WITHOUT ROWID;
+        CREATE INDEX IF NOT EXISTS sessions_device ON sessions(device_name);
+        CREATE INDEX IF NOT EXISTS sessions_guid ON sessions(device_guid);
+        CREATE INDEX IF NOT EXISTS sessions_mode ON sessions(protocol, connection, test_type);
+        CREATE INDEX IF NOT EXISTS sessions_created ON sessions(created);
+    """
+    # Columns added after the first schema version; stores created by older versions get them on open
+    ADDED_COLUMNS = (("stopped_early", "INTEGER"), ("report_interval", "REAL"), ("report_jitter", "REAL"), ("dropped_reports", "INTEGER"))
+    GROUP_COLUMNS = ("device_name", "device_guid", "protocol", "connection", "test_type", "version")
+    STAT_COLUMNS = ("valid_samples", "invalid_samples", "avg", "jitter", "min", "max", "p50", "p99", "stopped_early",
+                    "report_interval", "report_jitter", "dropped_reports")
+
+    def __init__(self, path=None):
+        self.path = path or RESULT_STORE_FILE
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.db = sqlite3.connect(self.path, timeout=30.0)  # Multi-rig workers share the file
+        self.db.row_factory = sqlite3.Row
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute("PRAGMA foreign_keys=ON")
+        self.db.executescript(self.SCHEMA)
+        existing = {row[1] for row in self.db.execute("PRAGMA table_info(sessions)")}
+        with self.db:
+            for name, column_type in self.ADDED_COLUMNS:
+                if name not in existing:
+                    self.db.execute(f"ALTER TABLE sessions ADD COLUMN {name} {column_type}")
+
+    def close(self):
+        self.db.close()
+
+    def add_session(self, session, stats, latencies):
+        """Stores one session (metadata dict + get_statistics() result) and its latencies; returns the session id"""
+        row = dict(session, **{name: stats.get(name) for name in self.STAT_COLUMNS})
+        row.setdefault('created', time.time())
+        columns = ", ".join(row)
+        with self.db:
+            cursor = self.db.execute(f"INSERT INTO sessions ({columns}) VALUES ({', '.join('?' * len(row))})", tuple(row.values()))
+            session_id = cursor.lastrowid
+            self.db.executemany("INSERT INTO samples (session_id, seq, latency_ms) VALUES (?, ?, ?)",
+                                ((session_id, i, value) for i, value in enumerate(latencies)))
+        return session_id
+
+    def set_connection(self, session_id, connection):
+        with self.db:
+            self.db.execute("UPDATE sessions SET connection = ? WHERE id = ?", (connection, session_id))
+
+    @staticmethod
+    def _where(device=None, guid=None, protocol=None, connection=None, test_type=None, since=None):
+        """WHERE clause of the common filters (device is a case-insensitive name substring, since a Unix time)"""
+        clauses, params = [], []
+        for column, value in (("device_guid", guid), ("protocol", protocol), ("connection", connection), ("test_type", test_type)):
+            if value:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        if device:
+            clauses.append("device_name LIKE ?")
+            params.append(f"%{device}%")
+        if since is not None:
+            clauses.append("created >= ?")
+            params.append(since)
+        return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+    def sessions(self, limit=None, **filters):
+        """Matching sessions, newest first"""
+        where, params = self._where(**filters)
+        sql = f"SELECT * FROM sessions{where} ORDER BY created DESC"
+        if limit:
+            sql += f" LIMIT {int(limit)}"
+        return [dict(row) for row in self.db.execute(sql, params)]
+
+    def aggregate(self, group_by=("device_name", "protocol", "connection"), **filters):
+        """Sample-weighted averages of avg, jitter and p99 per group of matching sessions, with the best and worst
+        session average"""
+        unknown = set(group_by) - set(self.GROUP_COLUMNS)
+        if unknown:
+            raise ValueError(f"Cannot group by {', '.join(sorted(unknown))}")
+        where, params = self._where(**filters)
+        groups = ", ".join(group_by)
+        sql = (f"SELECT {groups + ', ' if groups else ''}COUNT(*) AS sessions, SUM(valid_samples) AS samples, "
+               f"SUM(avg * valid_samples) / SUM(valid_samples) AS avg, SUM(jitter * valid_samples) / SUM(valid_samples) AS jitter, "
+               f"MIN(avg) AS best_avg, MAX(avg) AS worst_avg, SUM(p99 * valid_samples) / SUM(valid_samples) AS p99 "
+               f"FROM sessions{where}{' GROUP BY ' + groups if groups else ''} ORDER BY samples DESC")
+        return [dict(row) for row in self.db.execute(sql, params)]
+
+    def samples(self, session_id):
+        return [row[0] for row in self.db.execute(
+            "SELECT latency_ms FROM samples WHERE session_id = ? ORDER BY seq", (session_id,))]
+
+    def latency_arrays(self, limit=None, **filters):
+        """Samples of all matching sessions in one query: (session ids, list of NumPy arrays)"""
+        _require_numpy()
+        where, params = self._where(**filters)
+        sql = f"SELECT id FROM sessions{where} ORDER BY created DESC" + (f" LIMIT {int(limit)}" if limit else "")
+        rows = np.array(self.db.execute(
+            f"SELECT session_id, latency_ms FROM samples WHERE session_id IN ({sql}) ORDER BY session_id, seq", params).fetchall(),
+            dtype=np.float64).reshape(-1, 2)
+        ids, starts = np.unique(rows[:, 0].astype(np.int64), return_index=True)
+        return ids.tolist(), np.split(rows[:, 1], starts[1:])
+
+# Vectorized analysis of latency lists (latency_results, SessionFile.latencies_ms(), ResultStore.samples()).
+# Many sessions are handled as one padded matrix, so a batch costs a few array passes instead of a Python loop.
+
+BOOTSTRAP_RESAMPLES = 2000          # Default bootstrap resamples for confidence intervals
+BOOTSTRAP_CHUNK_VALUES = 4_000_000  # Resampled values held in memory at once
+
+def _require_numpy():
+    if np is None:
+        raise RuntimeError("NumPy is required for the analysis functions (pip install numpy)")
+
+def _sorted_matrix(sessions):
+    """Sessions as rows of one sorted matrix padded with +inf; returns (matrix, lengths)"""
+    _require_numpy()
+    arrays = [np.asarray(values, dtype=np.float64).ravel() for values in sessions]
+    lengths = np.array([len(values) for values in arrays], dtype=np.int64)
+    matrix = np.full((len(arrays), max(1, int(lengths.max(initial=0)))), np.inf)
+    matrix[np.arange(matrix.shape[1]) < lengths[:, None]] = np.concatenate(arrays) if arrays else []
+    matrix.sort(axis=1)
+    return matrix, lengths
+
+def _summarize_sorted(matrix, lengths, lower=LOWER_QUANTILE, upper=UPPER_QUANTILE):
+    """OrderStatistics.summary() of every row of a sorted matrix, as a dict of arrays (NaN for empty rows)"""
+    rows = np.arange(len(lengths))
+    last = np.maximum(lengths - 1, 0)
+    lo = (lengths * lower).astype(np.int64)
+    hi = np.minimum(lengths, (lengths * upper).astype(np.int64) + 1)
+    finite = np.where(np.isfinite(matrix), matrix, 0.0)
+    zero = np.zeros((len(lengths), 1))
+    sums = np.concatenate((zero, np.cumsum(finite, axis=1)), axis=1)
+    squares = np.concatenate((zero, np.cumsum(finite * finite, axis=1)), axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        n = hi - lo
+        mean = (sums[rows, hi] - sums[rows, lo]) / n
+        variance = np.maximum(0.0, (squares[rows, hi] - squares[rows, lo]) / n - mean * mean)
+        raw_mean = sums[rows, lengths] / lengths
+        raw_variance = np.maximum(0.0, squares[rows, lengths] - lengths * raw_mean * raw_mean) / np.maximum(lengths - 1, 1)
+    empty = lengths == 0
+    pick = lambda index: np.where(empty, np.nan, matrix[rows, np.minimum(index, last)])
+    quantile = lambda q: pick(np.minimum(last, (lengths * q).astype(np.int64)))
+    return {
+        'valid_samples': lengths,
+        'filtered_samples': np.where(empty, 0, n),
+        'min': pick(lo),
+        'max': pick(hi - 1),
+        'avg': np.where(empty, np.nan, mean),
+        'jitter': np.where(empty, np.nan, np.sqrt(variance)),
+        'p50': quantile(0.50),
+        'p90': quantile(0.90),
+        'p99': quantile(0.99),
+        'raw_min': pick(np.zeros_like(lengths)),
+        'raw_max': pick(last),
+        'raw_avg': np.where(empty, np.nan, raw_mean),
+        'raw_jitter': np.where(empty, np.nan, np.sqrt(raw_variance)),
+    }
+
+def summarize_sessions(sessions, lower=LOWER_QUANTILE, upper=UPPER_QUANTILE):
+    """Quantile-filtered summary of many latency lists at once: dict of arrays with one entry per session.
+    Same values as get_statistics (jitter unrounded, raw_jitter is the sample standard deviation)."""
+    matrix, lengths = _sorted_matrix(sessions)
+    return _summarize_sorted(matrix, lengths, lower, upper)
+
+def summarize_latencies(values, lower=LOWER_QUANTILE, upper=UPPER_QUANTILE):
+    """summarize_sessions() of a single latency list as a dict of floats (None when empty)"""
+    summary = summarize_sessions([values], lower, upper)
+    if not summary['valid_samples'][0]:
+        return None
+    return {name: column[0].item() for name, column in summary.items()}
+
+def latency_percentiles(values, percents=(1, 5, 25, 50, 75, 90, 95, 99, 99.9)):
+    """Nearest-rank percentiles (same indexing as the p50/p90/p99 of get_statistics)"""
+    matrix, lengths = _sorted_matrix([values])
+    n = int(lengths[0])
+    if not n:
+        return {}
+    ranks = np.minimum(n - 1, (n * np.asarray(percents, dtype=np.float64) / 100.0).astype(np.int64))
+    return dict(zip(percents, matrix[0, ranks].tolist()))
+
+def latency_histogram(values, bin_ms=0.1, range_ms=None):
+    """Counts per bin of width bin_ms; returns (counts, bin edges)"""
+    _require_numpy()
+    values = np.asarray(values, dtype=np.float64)
+    if range_ms is None:
+        range_ms = (math.floor(values.min() / bin_ms) * bin_ms, (math.floor(values.max() / bin_ms) + 1) * bin_ms) if len(values) else (0.0, bin_ms)
+    bins = max(1, int(round((range_ms[1] - range_ms[0]) / bin_ms)))
+    return np.histogram(values, bins=bins, range=range_ms)
+
+def latency_ecdf(values):
+    """Empirical CDF: (sorted latencies, fraction of samples at or below each)"""
+    _require_numpy()
+    x = np.sort(np.asarray(values, dtype=np.float64))
+    return x, np.arange(1, len(x) + 1) / max(1, len(x))
+
+def _bootstrap(values, stat, resamples, rng):
+    """Bootstrap distribution of one summary statistic, resampled in memory-bounded chunks"""
+    values = np.asarray(values, dtype=np.float64)
+    n = len(values)
+    chunk = max(1, BOOTSTRAP_CHUNK_VALUES // max(1, n))
+    out = np.empty(resamples)
+    for start in range(0, resamples, chunk):
+        count = min(chunk, resamples - start)
+        matrix = np.sort(values[rng.integers(0, n, size=(count, n))], axis=1)
+        out[start:start + count] = _summarize_sorted(matrix, np.full(count, n, dtype=np.int64))[stat]
+    return out
+
+def bootstrap_ci(values, stat="avg", confidence=0.95, resamples=BOOTSTRAP_RESAMPLES, seed=None):
+    """Percentile bootstrap confidence interval of a summary statistic ('avg', 'jitter', 'p99', ...): (estimate, low, high)"""
+    _require_numpy()
+    if not len(values):
+        return None
+    estimate = summarize_latencies(values)[stat]
+    distribution = _bootstrap(values, stat, resamples, np.random.default_rng(seed))
+    tail = (1.0 - confidence) / 2 * 100
+    low, high = np.percentile(distribution, (tail, 100 - tail))
+    return estimate, float(low), float(high)
+
+def compare_latencies(a, b, stat="avg", confidence=0.95, resamples=BOOTSTRAP_RESAMPLES, seed=None):
+    """Difference b - a of a summary statistic with its bootstrap confidence interval,
+    plus the Kolmogorov-Smirnov distance between the two distributions"""
+    _require_numpy()
+    rng = np.random.default_rng(seed)
+    summary_a, summary_b = summarize_latencies(a), summarize_latencies(b)
+    difference = _bootstrap(b, stat, resamples, rng) - _bootstrap(a, stat, resamples, rng)
+    tail = (1.0 - confidence) / 2 * 100
+    low, high = np.percentile(difference, (tail, 100 - tail))
+    x_a, x_b = np.sort(np.asarray(a, dtype=np.float64)), np.sort(np.asarray(b, dtype=np.float64))
+    grid = np.concatenate((x_a, x_b))
+    ks = np.abs(np.searchsorted(x_a, grid, side="right") / len(x_a) - np.searchsorted(x_b, grid, side="right") / len(x_b)).max()
+    return {
+        'stat': stat, 'a': summary_a[stat], 'b': summary_b[stat], 'difference': summary_b[stat] - summary_a[stat],
+        'ci_low': float(low), 'ci_high': float(high), 'confidence': confidence,
+        'significant': not low <= 0.0 <= high, 'ks_distance': float(ks),
+    }
+
+
+class LinuxRealtime:
+    """Real-time mode for the measuring thread on Linux: pinning to one (preferably isolated) CPU, SCHED_FIFO
+    and mlockall. Each step is optional and depends on the privileges of the process; apply() reports what was
+    granted and restore() undoes it. Scheduling and affinity apply to the calling thread only, so the
+    serial/HID reader threads keep running on the other CPUs."""
+
+    MCL_CURRENT = 1
+    MCL_FUTURE = 2
+
+    def __init__(self, priority=REALTIME_PRIORITY, cpu=REALTIME_CPU):
+        self.priority = priority
+        self.cpu = cpu
+        self.granted = []
+        self.unavailable = []
+        self._affinity = None
+        self._policy = None
+        self._libc = None
+
+    @staticmethod
+    def isolated_cpus():
+        """CPUs isolated from the scheduler with isolcpus= (empty when there are none)"""
+        cpus = set()
+        try:
+            with open("/sys/devices/system/cpu/isolated") as f:
+                for part in f.read().strip().split(","):
+                    if "-" in part:
+                        first, last = part.split("-")
+                        cpus.update(range(int(first), int(last) + 1))
+                    elif part:
+                        cpus.add(int(part))
+        except (OSError, ValueError):
+            pass
+        return cpus
+
+    def apply(self):
+        allowed = sorted(os.sched_getaffinity(0))
+        # A SCHED_FIFO thread that spins would starve the reader threads sharing its CPU
+        if len(allowed) < 2:
+            self.unavailable.append("CPU pinning and SCHED_FIFO (need at least 2 CPUs)")
+        else:
+            isolated = [cpu for cpu in allowed if cpu in self.isolated_cpus()]
+            cpu = self.cpu if self.cpu in allowed else (isolated or allowed)[-1]
+            try:
+                os.sched_setaffinity(0, {cpu})
+                self._affinity = set(allowed)
+                self.granted.append(f"pinned to CPU {cpu}{' (isolated)' if cpu in isolated else ''}")
+            except OSError as e:
+                self.unavailable.append(f"CPU pinning ({e.strerror})")
+            try:
+                policy, param = os.sched_getscheduler(0), os.sched_getparam(0)
+                os.sched_setscheduler(0, os.SCHED_FIFO, os.sched_param(self.priority))
+                self._policy = (policy, param)
+                self.granted.append(f"SCHED_FIFO priority {self.priority}")
+            except OSError:
+                self.unavailable.append("SCHED_FIFO (needs CAP_SYS_NICE or an rtprio limit)")
+
+        # MCL_CURRENT faults in and locks every page mapped now, including the preallocated trace and
+        # statistics buffers; MCL_FUTURE only when the memlock limit cannot make later allocations fail
+        flags = self.MCL_CURRENT
+        if resource is not None and resource.getrlimit(resource.RLIMIT_MEMLOCK)[0] == resource.RLIM_INFINITY:
+            flags |= self.MCL_FUTURE
+        try:
+            libc = ctypes.CDLL(None, use_errno=True)
+            if libc.mlockall(flags) == 0:
+                self._libc = libc
+                self.granted.append("memory locked" + (" (current and future)" if flags & self.MCL_FUTURE else ""))
+            else:
+                self.unavailable.append(f"mlockall ({os.strerror(ctypes.get_errno())}; needs CAP_IPC_LOCK or a larger memlock limit)")
+        except (OSError, AttributeError):
+            self.unavailable.append("mlockall (libc not available)")
+        return self
+
+    def restore(self):
+        if self._libc is not None:
+            self._libc.munlockall()
+            self._libc = None
+        if self._policy is not None:
+            try:
+                os.sched_setscheduler(0, self._policy[0], self._policy[1])
+            except OSError:
+                pass
+            self._policy = None
+        if self._affinity is not None:
+            try:
+                os.sched_setaffinity(0, self._affinity)
+            except OSError:
+                pass
+            self._affinity = None
+
+
+class TriggerScheduler:
+    """Deadline scheduler for solenoid triggers: coarse-sleeps until shortly before the deadline,
+    then spin-waits to hit it exactly. Records scheduled vs actual fire time for every trigger."""
+
+    def __init__(self, spin_window_us=SCHEDULER_SPIN_WINDOW_US, idle_budget_us=SCHEDULER_IDLE_BUDGET_US):
+        self.spin_window_us = spin_window_us
+        self.idle_budget_us = idle_budget_us
+        self.errors_us = []
+
+    def coarse_sleep(self, deadline_us, max_sleep_s=0.001):
+        """Sleeps at most max_sleep_s, but never into the spin window before deadline_us"""
+        remaining_us = deadline_us - self.spin_window_us - time.perf_counter() * 1_000_000
+        if remaining_us > 0:
+            time.sleep(min(max_sleep_s, remaining_us / 1_000_000))
+
+    def has_idle_budget(self, deadline_us):
+        """True when there is enough time before the spin window to run idle work (rendering, logging)"""
+        return deadline_us - time.perf_counter() * 1_000_000 > self.spin_window_us + self.idle_budget_us
+
+    def wait_until(self, deadline_us, idle=None):
+        """Blocks until deadline_us (perf_counter µs). idle() is called on every coarse-phase pass;
+        it should check has_idle_budget() before doing anything slow."""
+        while deadline_us - time.perf_counter() * 1_000_000 > self.spin_window_us:
+            if idle:
+                idle()
+            self.coarse_sleep(deadline_us)
+        while time.perf_counter() * 1_000_000 < deadline_us:
+            pass
+
+    def record(self, deadline_us, actual_us):
+        self.errors_us.append(actual_us - deadline_us)
+
+    def summary(self):
+        """Returns the fire-time error distribution in ms, or None if nothing was recorded"""
+        if not self.errors_us:
+            return None
+        ordered = sorted(self.errors_us)
+        return {
+            'count': len(ordered),
+            'avg': statistics.mean(ordered) / 1000,
+            'jitter': statistics.pstdev(ordered) / 1000,
+            'p99': ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))] / 1000,
+            'max': ordered[-1] / 1000,
+        }
+
+
+class TestWindowRenderer:
+    """Draws the start screen and the live dashboard of the test window from plain snapshot dicts.
+    Used in-process, or by render_process_main() when RENDER_PROCESS is enabled.
+    Fonts, rendered labels and static layers are built once; each frame only redraws the regions whose
+    content changed and present() pushes just those rectangles to the display."""
+
+    ACCENT_BLUE = (0, 180, 255)
+    ACCENT_CYAN = (0, 255, 220)
+    TEXT_WHITE = (255, 255, 255)
+    TEXT_GRAY = (180, 190, 210)
+    TEXT_CACHE_LIMIT = 512  # Rendered text surfaces kept before the cache is reset
+    FULL_PRESENT_INTERVAL = 1.0  # Seconds between full presents (repaints a window that was covered)
+
+    def __init__(self, screen):
+        self.screen = screen
+        self._fonts = {}
+        self._texts = {}
+        self._layers = {}
+        self._regions = {}      # Region name -> content key drawn last frame
+        self._scene = None      # Static layer currently on screen
+        self._dirty = []
+        self._full_redraw = True
+        self._last_full_present = 0.0
+
+    # --- Caches --------------------------------------------------------------------------------------
+    def _font(self, size):
+        font = self._fonts.get(size)
+        if font is None:
+            font = self._fonts[size] = pygame.font.Font(None, size)
+        return font
+
+    def _text(self, text, size, color):
+        """Rendered text surface, cached by (text, size, colour)"""
+        key = (text, size, color)
+        surf = self._texts.get(key)
+        if surf is None:
+            if len(self._texts) >= self.TEXT_CACHE_LIMIT:
+                self._texts.clear()
+            surf = self._texts[key] = self._font(size).render(text, True, color)
+        return surf
+
+    def _layer(self, name):
+        layer = self._layers.get(name)
+        if layer is None:
+            layer = self._layers[name] = getattr(self, "_build_" + name)()
+        return layer
+
+    # --- Static layers -------------------------------------------------------------------------------
+    def _build_start(self):
+        layer = pygame.Surface((800, 600))
+        # Background gradient
+        for y in range(0, 600, 2):
+            c = (10 + y//60, 12 + y//50, 18 + y//30)
+            pygame.draw.rect(layer, c, (0, y, 800, 2))
+        # Subtitle
+        sub_surf = self._text("READY TO START", 36, (200, 200, 200))
+        layer.blit(sub_surf, sub_surf.get_rect(center=(400, 210)))
+        return layer
+
+    def _start_rect(self):
+        start_rect = pygame.Rect(0, 0, 240, 70)
+        start_rect.center = (self.screen.get_width() // 2, self.screen.get_height() // 2 + 50)
+        return start_rect
+
+    def _build_button(self, hover):
+        start_rect = self._start_rect()
+        area = start_rect.inflate(10, 10)
+        button = self._layer("start").subsurface(area).copy()
+        local = start_rect.move(-area.x, -area.y)
+        # Draw button with glow
+        for i in range(5):
+            pygame.draw.rect(button, (0, 50, 20), local.inflate(i*2, i*2), border_radius=15)
+        btn_color = (0, 180, 100) if hover else (0, 140, 70)
+        pygame.draw.rect(button, btn_color, local, border_radius=12)
+        label = self._text("START TEST", 36, (255, 255, 255))
+        button.blit(label, label.get_rect(center=local.center))
+        return button
+
+    def _build_button_idle(self):
+        return self._build_button(False)
+
+    def _build_button_hover(self):
+        return self._build_button(True)
+
+    def _build_monitor(self):
+        """Background, header, status card and progress track"""
+        layer = pygame.Surface((800, 600))
+        # Background gradient
+        for y in range(0, 600, 4):
+            c = (10 + y//100, 12 + y//80, 18 + y//60)
+            pygame.draw.rect(layer, c, (0, y, 800, 4))
+        # Header (Height 60)
+        pygame.draw.rect(layer, (30, 35, 50), (0, 0, 800, 60))
+        pygame.draw.line(layer, (60, 70, 90), (0, 60), (800, 60), 1)
+        header_surf = self._text("PROMETHEUS 82 | PERFORMANCE MONITOR", 32, self.ACCENT_BLUE)
+        # Vertically center header text
+        layer.blit(header_surf, (25, 30 - header_surf.get_height() // 2))
+        # Test Status Card
+        card_rect = pygame.Rect(25, 80, 750, 100)
+        pygame.draw.rect(layer, (20, 25, 35), card_rect, border_radius=15)
+        pygame.draw.rect(layer, (50, 60, 80), card_rect, width=1, border_radius=15)
+        # Progress bar track
+        pygame.draw.rect(layer, (40, 45, 55), (50, 145, 700, 12), border_radius=6)
+        return layer
+
+    def _build_monitor_dashboard(self):
+        """Monitor layer plus the latency dashboard card and its label"""
+        layer = self._layer("monitor").copy()
+        dash_rect = pygame.Rect(25, 200, 750, 360)
+        pygame.draw.rect(layer, (15, 20, 28), dash_rect, border_radius=20)
+        pygame.draw.rect(layer, (40, 50, 70), dash_rect, width=1, border_radius=20)
+        lat_label = self._text("AVERAGE RESPONSE TIME", 36, self.TEXT_GRAY)
+        layer.blit(lat_label, (dash_rect.centerx - lat_label.get_width()//2, 250))
+        return layer
+
+    def _build_badge_finished(self):
+        badge = pygame.Surface((95, 28))
+        badge.blit(self._layer("monitor"), (0, 0), pygame.Rect(680, 16, 95, 28))
+        pygame.draw.rect(badge, (0, 30, 10), badge.get_rect(), border_radius=6)
+        pygame.draw.rect(badge, (0, 150, 70), badge.get_rect(), width=1, border_radius=6)
+        badge_surf = self._text("FINISHED", 24, (0, 255, 120))
+        badge.blit(badge_surf, (47 - badge_surf.get_width()//2, 7))
+        return badge
+
+    def _build_badge_live(self):
+        """LIVE badge without its pulsing border"""
+        badge = pygame.Surface((65, 28))
+        badge.blit(self._layer("monitor"), (0, 0), pygame.Rect(710, 16, 65, 28))
+        pygame.draw.rect(badge, (30, 0, 0), badge.get_rect(), border_radius=6)
+        # Red dot inside badge
+        pygame.draw.circle(badge, (255, 40, 60), (12, 14), 4)
+        badge.blit(self._text("LIVE", 24, (255, 60, 80)), (22, 7))
+        return badge
+
+    # --- Frame composition ---------------------------------------------------------------------------
+    def _set_scene(self, name):
+        """Switches the static layer; a new scene is drawn in full"""
+        if self._scene != name:
+            self._scene = name
+            self._regions.clear()
+            self._full_redraw = True
+            self.screen.blit(self._layer(name), (0, 0))
+
+    def _region(self, name, rect, key):
+        """True when a region must be redrawn; restores its background and marks it dirty"""
+        if self._regions.get(name) == key and not self._full_redraw:
+            return False
+        self._regions[name] = key
+        rect = pygame.Rect(rect)
+        self.screen.blit(self._layer(self._scene), rect, rect)
+        self._dirty.append(rect)
+        return True
+
+    def present(self):
+        """Pushes this frame to the display: only the dirty rectangles unless the scene changed"""
+        now = time.perf_counter()
+        if self._full_redraw or now - self._last_full_present >= self.FULL_PRESENT_INTERVAL:
+            pygame.display.flip()
+            self._last_full_present = now
+        elif self._dirty:
+            pygame.display.update(self._dirty)
+        self._dirty = []
+        self._full_redraw = False
+
+    def draw_start_screen(self, test_type, key_label=None):
+        """Draws one frame of the start screen and returns the START TEST button rect"""
+        self._set_scene("start")
+        start_rect = self._start_rect()
+
+        # Animated title glow
+        glow_alpha = int(abs(math.sin(time.time() * 2)) * 100) + 155
+        if self._region("title", (150, 115, 500, 70), glow_alpha):
+            title_surf = self._text("PROMETHEUS 82", 72, (0, glow_alpha, 255))
+            self.screen.blit(title_surf, title_surf.get_rect(center=(400, 150)))
+
+        if test_type == TEST_TYPE_KEYBOARD:
+            msg = "Press any key to test, then press Start"
+            if key_label is not None:
+                msg = f"Selected key: {key_label.upper()}"
+            if self._region("message", (0, 262, 800, 36), msg):
+                msg_surf = self._text(msg, 36, (0, 255, 150))
+                self.screen.blit(msg_surf, msg_surf.get_rect(center=(400, 280)))
+
+        # Button hover effect
+        hover = start_rect.collidepoint(pygame.mouse.get_pos())
+        area = start_rect.inflate(10, 10)
+        if self._region("button", area, hover):
+            self.screen.blit(self._layer("button_hover" if hover else "button_idle"), area)
+        return start_rect
+
+    def draw_dashboard(self, snapshot):
+        """Draws one frame of the test dashboard (see LatencyTester._dashboard_snapshot for the fields)"""
+        test_type = snapshot['test_type']
+        iterations = snapshot['iterations']
+        count = snapshot['count']
+        average_latency = snapshot['average']
+        live = snapshot['live']
+        finished = snapshot['finished']
+
+        self._set_scene("monitor" if average_latency is None else "monitor_dashboard")
+
+        if test_type == TEST_TYPE_HARDWARE:
+            status_text = "HARDWARE TEST: RUNNING..."
+            status_color = (255, 180, 0)
+        elif snapshot['calibrating']:
+            status_text = "STICK CALIBRATION IN PROGRESS..."
+            status_color = self.ACCENT_CYAN
+        else:
+            status_text = f"{test_type.upper()} TEST: {count} / {iterations}"
+            status_color = self.TEXT_WHITE
+        if self._region("status", (50, 100, 700, 30), (status_text, status_color)):
+            self.screen.blit(self._text(status_text, 32, status_color), (50, 105))
+
+        # Progress Bar
+        bar_x, bar_y = 50, 145
+        bar_w, bar_h = 700, 12
+        progress_w = int(count / iterations * bar_w) if iterations > 0 else 0
+        if self._region("progress", (bar_x, bar_y, bar_w, bar_h), progress_w) and progress_w > 0:
+            pygame.draw.rect(self.screen, self.ACCENT_BLUE, (bar_x, bar_y, min(progress_w, bar_w), bar_h), border_radius=6)
+
+        # Latency Dashboard
+        if average_latency is not None:
+            val_text = f"{average_latency:.2f}"
+            if self._region("value", (40, 300, 720, 130), val_text):
+                val_surf = self._text(val_text, 120, self.ACCENT_CYAN)
+                unit_surf = self._text("ms", 48, self.ACCENT_BLUE)
+                total_w = val_surf.get_width() + unit_surf.get_width() + 8
+                start_x = 400 - total_w // 2
+                # Align ms precisely to the baseline of the large digits
+                val_y = 320
+                unit_y = val_y + (val_surf.get_height() - unit_surf.get_height()) - 5 # Manual adjustment for font padding
+                self.screen.blit(val_surf, (start_x, val_y))
+                self.screen.blit(unit_surf, (start_x + val_surf.get_width() + 8, unit_y))
+
+            # Stats breakdown with fixed positions to prevent jumping
+            if live:
+                stat_texts = (f"MIN: {live['min']:.2f}ms", f"MAX: {live['max']:.2f}ms", f"JITTER: {live['jitter']:.2f}ms")
+                if self._region("stats", (40, 445, 720, 32), stat_texts):
+                    # Positions based on thirds of the card
+                    for text, x in zip(stat_texts, (100, 330, 550)):
+                        self.screen.blit(self._text(text, 36, self.TEXT_GRAY), (x, 450))
+
+                # Percentiles of all valid samples
+                pct_text = f"P50: {live['p50']:.2f}ms    P90: {live['p90']:.2f}ms    P99: {live['p99']:.2f}ms    ({int(LOWER_QUANTILE*100)}%-{int(UPPER_QUANTILE*100)}% filtered)"
+                if self._region("percentiles", (40, 500, 720, 26), pct_text):
+                    pct_surf = self._text(pct_text, 28, (120, 130, 150))
+                    self.screen.blit(pct_surf, (400 - pct_surf.get_width() // 2, 505))
+
+            # Sparkline of the most recent samples
+            recent = snapshot.get('recent')
+            if recent and len(recent) >= 2 and self._region("sparkline", (48, 530, 704, 25), (len(recent), recent[0], recent[-1], count)):
+                low, high = min(recent), max(recent)
+                span = (high - low) or 1.0
+                step = 700 / (len(recent) - 1)
+                points = [(50 + i * step, 552 - (value - low) / span * 20) for i, value in enumerate(recent)]
+                pygame.draw.lines(self.screen, (0, 120, 170), False, points, 1)
+
+        # Status Badge (vertically centered in header)
+        if finished:
+            if self._region("badge", (670, 14, 108, 32), "finished"):
+                self.screen.blit(self._layer("badge_finished"), (680, 16))
+        else:
+            pulse = int(abs(math.sin(time.time() * 2)) * 50) + 100
+            if self._region("badge", (670, 14, 108, 32), pulse):
+                self.screen.blit(self._layer("badge_live"), (710, 16))
+                pygame.draw.rect(self.screen, (pulse, 20, 40), (710, 16, 65, 28), width=1, border_radius=6)
+
+        # Instruction at the bottom
+        if self._region("hint", (0, 568, 800, 28), finished):
+            if finished:
+                hint_surf = self._text("TEST COMPLETE - CONTINUE IN CONSOLE TO SAVE RESULTS", 24, (0, 255, 180))
+            else:
+                hint_surf = self._text("KEEP WINDOW ACTIVE AND ON TOP TO CAPTURE INPUTS", 24, (150, 150, 50))
+            self.screen.blit(hint_surf, (400 - hint_surf.get_width() // 2, 575))
+
+
+class SharedDashboard:
+    """Test progress, live statistics and recent samples shared with the render process.
+    LatencyTester writes the header and the sample ring under a sequence counter that is odd while a write
+    is in progress; the render process copies them and retries if the counter moved. The control block
+    (start, quit, selected key) is written only by the render process."""
+
+    HEADER = struct.Struct("<QBBxxIII7dQ")  # seq, test type, flags, iterations, count, invalid, average + live stats, ring head
+    CONTROL = struct.Struct("<BBxxI32s")    # started, quit requested, key press counter, key label
+    TEST_TYPES = (TEST_TYPE_STICK, TEST_TYPE_BUTTON, TEST_TYPE_HARDWARE, TEST_TYPE_KEYBOARD)
+    LIVE_FIELDS = ('min', 'max', 'jitter', 'p50', 'p90', 'p99')
+    FLAG_AVERAGE, FLAG_LIVE, FLAG_CALIBRATING, FLAG_FINISHED, FLAG_CLOSED = 1, 2, 4, 8, 16
+
+    def __init__(self, name=None, ring_size=RENDER_RING_SIZE):
+        self.ring_size = ring_size
+        size = self.HEADER.size + self.CONTROL.size + ring_size * 8
+        self.owner = name is None
+        self._shm = shared_memory.SharedMemory(name=name, create=self.owner, size=size if self.owner else 0)
+        self._buf = self._shm.buf
+        self._ring = self._buf[self.HEADER.size + self.CONTROL.size:size].cast('d')
+        self._seq = 0
+        self._head = 0
+        self._key_presses = 0
+
+    @property
+    def name(self):
+        return self._shm.name
+
+    # --- Tester side ---------------------------------------------------------------------------------
+    def publish(self, snapshot, samples=()):
+        """Writes a new snapshot and appends samples to the ring (only the newest ring_size are kept)"""
+        flags = 0
+        average = snapshot['average']
+        live = snapshot['live']
+        if average is not None:
+            flags |= self.FLAG_AVERAGE
+        if live:
+            flags |= self.FLAG_LIVE
+        if snapshot['calibrating']:
+            flags |= self.FLAG_CALIBRATING
+        if snapshot['finished']:
+            flags |= self.FLAG_FINISHED
+        stats = [live[field] for field in self.LIVE_FIELDS] if live else [0.0] * len(self.LIVE_FIELDS)
+
+        self._seq += 1  # Odd: readers retry until the write is complete
+        struct.pack_into("<Q", self._buf, 0, self._seq)
+        skipped = max(0, len(samples) - self.ring_size)
+        self._head += skipped
+        for value in samples[skipped:]:
+            self._ring[self._head % self.ring_size] = value
+            self._head += 1
+        self.HEADER.pack_into(self._buf, 0, self._seq, self.TEST_TYPES.index(snapshot['test_type']), flags,
+                              snapshot['iterations'], snapshot['count'], snapshot['invalid'],
+                              average if average is not None else 0.0, *stats, self._head)
+        self._seq += 1
+        struct.pack_into("<Q", self._buf, 0, self._seq)
+
+    def mark_closed(self):
+        """Asks the render process to close its window"""
+        self._seq += 1
+        struct.pack_into("<Q", self._buf, 0, self._seq)
+        self._buf[9] |= self.FLAG_CLOSED
+        self._seq += 1
+        struct.pack_into("<Q", self._buf, 0, self._seq)
+
+    def read_control(self):
+        """Returns (started, quit requested, key press counter, key label) as set by the render process"""
+        started, quit_requested, key_presses, label = self.CONTROL.unpack_from(self._buf, self.HEADER.size)
+        return bool(started), bool(quit_requested), key_presses, label.rstrip(b"\0").decode("utf-8", "replace")
+
+    # --- Render process side -------------------------------------------------------------------------
+    def snapshot(self, attempts=100):
+        """Consistent copy of the tester's last snapshot, or None if every attempt overlapped a write"""
+        for _ in range(attempts):
+            header = self.HEADER.unpack_from(self._buf, 0)
+            if header[0] & 1:
+                time.sleep(0)
+                continue
+            head = header[-1]
+            n = min(head, self.ring_size)
+            recent = [self._ring[i % self.ring_size] for i in range(head - n, head)]
+            if struct.unpack_from("<Q", self._buf, 0)[0] == header[0]:
+                break
+        else:
+            return None
+        _, type_code, flags, iterations, count, invalid, average, *stats = header[:-1]
+        return {
+            'test_type': self.TEST_TYPES[type_code],
+            'iterations': iterations,
+            'count': count,
+            'invalid': invalid,
+            'calibrating': bool(flags & self.FLAG_CALIBRATING),
+            'finished': bool(flags & self.FLAG_FINISHED),
+            'closed': bool(flags & self.FLAG_CLOSED),
+            'average': average if flags & self.FLAG_AVERAGE else None,
+            'live': dict(zip(self.LIVE_FIELDS, stats), avg=average) if flags & self.FLAG_LIVE else None,
+            'recent': recent,
+        }
+
+    def _write_control(self, offset, fmt, value):
+        struct.pack_into(fmt, self._buf, self.HEADER.size + offset, value)
+
+    def request_start(self):
+        self._write_control(0, "<B", 1)
+
+    def request_quit(self):
+        self._write_control(1, "<B", 1)
+
+    def report_key(self, label):
+        """Publishes the label of the key selected on the start screen (label first, then the counter)"""
+        self._write_control(8, "32s", label.encode("utf-8")[:32])
+        self._key_presses += 1
+        self._write_control(4, "<I", self._key_presses)
+
+    def close(self):
+        self._ring.release()
+        self._buf = None
+        self._shm.close()
+        if self.owner:
+            try:
+                self._shm.unlink()
+            except FileNotFoundError:
+                pass
+
+
+def render_process_main(shm_name, ring_size=RENDER_RING_SIZE):
+    """Entry point of the render process: owns the test window and draws SharedDashboard snapshots"""
+    dashboard = SharedDashboard(name=shm_name, ring_size=ring_size)
+    pygame.display.init()
+    pygame.font.init()
+    try:
+        icon = load_window_icon()
+        if icon:
+            pygame.display.set_icon(icon)
+        screen = pygame.display.set_mode((800, 600))
+        pygame.display.set_caption("Prometheus 82 - Testing")
+        renderer = TestWindowRenderer(screen)
+        clock = pygame.time.Clock()
+        started = False
+        key_label = None
+        start_rect = None
+        while True:
+            snapshot = dashboard.snapshot()
+            if snapshot is None:
+                clock.tick(RENDER_PROCESS_FPS)
+                continue
+            if snapshot['closed']:
+                return
+            for event in pygame.event.get():
+                if event.type == QUIT:
+                    if not started:
+                        dashboard.request_quit()
+                    return
+                if started:
+                    continue
+                if event.type == KEYDOWN:
+                    if snapshot['test_type'] == TEST_TYPE_KEYBOARD and key_label is None and event.key not in (K_RETURN, K_SPACE):
+                        key_label = pygame.key.name(event.key)
+                        dashboard.report_key(key_label)
+                    if event.key in (K_RETURN, K_SPACE):
+                        started = True
+                if event.type == MOUSEBUTTONDOWN and start_rect is not None and start_rect.collidepoint(event.pos):
+                    started = True
+                if started:
+                    dashboard.request_start()
+            if started:
+                renderer.draw_dashboard(snapshot)
+            else:
+                start_rect = renderer.draw_start_screen(snapshot['test_type'], key_label)
+            renderer.present()
+            clock.tick(RENDER_PROCESS_FPS)
+    finally:
+        dashboard.close()
+        pygame.quit()
+
+
 class LatencyTester:
-    def __init__(self, gamepad, serial_port, test_type, contact_delay=CONTACT_DELAY, iterations=TEST_ITERATIONS, protocol=None):
+    def __init__(self, gamepad, serial_port, test_type, contact_delay=CONTACT_DELAY, iterations=TEST_ITERATIONS, protocol=None, keyboard=None, clock_sync=None, headless=False, release_events=False):
         self.joystick = gamepad
+        self.release_events = release_events  # Firmware sends 'L' on contact release: enables the adaptive interval
+        self._heat = 0.0             # Solenoid heat of this session (on-time seconds, decayed to _heat_time_us)
+        self._heat_time_us = None
+        self._release_us = None      # Contact release time of the current cycle ('L')
+        self._ready_us = None        # Release seen and input back at rest: earliest base for the next trigger
+        self.headless = headless     # No test window: start immediately and report progress on the console
+        self.keyboard = keyboard     # EvdevKeyboard for focus-independent keyboard tests (Linux)
+        self.clock_sync = clock_sync # BoardClockSync when the firmware sends micros() with 'S' and 'R'
+        self._sync_send_us = None    # Send time of the outstanding clock sync 'D'
+        self._last_sync_time = 0.0
         self.serial = serial_port
+        if serial_port is not None and SERIAL_CAPTURE_THREAD and not isinstance(serial_port, SerialCaptureEngine):
+            self.serial = SerialCaptureEngine(serial_port)
+            self.serial.start()
         self.test_type = test_type
         self.contact_delay = contact_delay  # Use calibrated contact delay
         self.s_time_us = 0           # Timestamp (µs) captured when 'S' signal is received from Arduino
@@ -667,6 +2951,7 @@ class LatencyTester:
         self.last_trigger_time_us = 0  # Last trigger time in microseconds
         self.stick_axes = None
         self.primary_axis = None  # Calibrated primary axis from first solenoid strike
+        self.axis_rest = None        # Axis values at rest, captured before the first hit (stick detection)
         self.axis_direction = None  # Direction of primary axis (1 for positive, -1 for negative)
         self.button_to_test = None
         self.key_to_test = None
@@ -676,6 +2961,8 @@ class LatencyTester:
         self.max_latency_us = self.test_interval_us - self.pulse_duration_us
         self.latency_results = []
         self.latency_sum = 0.0
+        self.running_stats = RunningStats()  # Unfiltered mean/jitter/min/max, updated in O(1) per sample
+        self.order_stats = None               # Quantile-filtered live statistics, created once the interval is known
         self._skip_first_measurement = True
         self._started = False
         self._last_render_time = 0.0
@@ -684,16 +2971,58 @@ class LatencyTester:
         self._timeout_skipped = False
         self.test_aborted = False
         self._protocol = protocol
+        self._capture_advance_sum_us = 0.0  # Sum of (poll time - thread capture time) for S bytes
+        self._capture_advance_count = 0
+        self._capture_advance_max_us = 0.0
+        self._arrival_us = None      # Host arrival time of the last event byte (before board timestamps are applied)
+        self._wake = threading.Event()  # Set by reader threads when new S or input data arrives
+        for source in (self.serial, self.joystick, self.keyboard):
+            if hasattr(source, "wake_event"):
+                source.wake_event = self._wake
+        self._key_label = None
+        self._event_driven = False
+        self._scheduler = TriggerScheduler()
+        self.trace = CycleTrace()    # Per-cycle record of every trigger, exported with the results
+        self._last_scheduled_us = 0.0  # Deadline (µs) of the last fired trigger; next one is one interval later
         self.set_pulse_duration(PULSE_DURATION)  # Use milliseconds for Arduino compatibility
+        self.order_stats = OrderStatistics(ORDER_STATS_LOW_MS, self.max_latency_us / 1000.0)
         self.iterations = iterations
-        self._bg_surface = None  # Pre-rendered background
+        self._renderer = None        # TestWindowRenderer for the in-process window
+        self._dashboard = None       # SharedDashboard when the window is drawn by a render process
+        self._render_process = None
+        self._published_count = 0    # Samples already handed to the render process
+        self._last_progress_time = 0.0
+        self._final_progress_reported = False
+        self.progress_sink = None    # Headless: callable that receives the progress records instead of the console
+        self.connection = None       # Cable, Dongle or Bluetooth when known; stored with the result
+        self.store_session_id = None # Row of this session in the result store
+        self.stopped_early = False   # Sequential mode reached its confidence target before `iterations`
+        self.report_timeline = None  # Report timestamps of a direct gamepad backend (report-rate estimation)
+        self.report_rate_idle = None # Estimate from the reports seen before the measurements
+        self._measure_start_ns = None
+        if REPORT_RATE_MONITOR and hasattr(self.joystick, "report_timeline"):
+            if self.joystick.report_timeline is None:
+                self.joystick.report_timeline = ReportTimeline(continuous=getattr(self.joystick, "CONTINUOUS_REPORTS", False))
+            self.report_timeline = self.joystick.report_timeline
 
     def limit_iterations_for_fallback_pulse(self):
         if self.test_type == TEST_TYPE_STICK and self.iterations > STICK_SETUP_FALLBACK_MAX_ITERATIONS:
             self.iterations = STICK_SETUP_FALLBACK_MAX_ITERATIONS
             print_info(f"Stronger solenoid pulse mode is limited to {self.iterations} measurements to reduce heating.")
 
+    def _use_render_process(self):
+        """True when the test window should be drawn by a separate process (RENDER_PROCESS)"""
+        if not RENDER_PROCESS or self.headless:
+            return False
+        # pygame keyboard events only reach the focused window's process; evdev keyboards need no window
+        return self.test_type != TEST_TYPE_KEYBOARD or self.keyboard is not None
+
     def open_test_window(self):
+        if self.headless:
+            return
+        if self._use_render_process():
+            self._start_render_process()
+            return
         while True:
             try:
                 if not pygame.display.get_init():
@@ -708,240 +3037,178 @@ class LatencyTester:
                     pygame.font.init()
                 self._screen = pygame.display.get_surface()
                 self._font = pygame.font.Font(None, 28)
+                if self._renderer is None or self._renderer.screen is not self._screen:
+                    self._renderer = TestWindowRenderer(self._screen)
                 break
             except Exception:
                 time.sleep(0.5)
 
+    def _start_render_process(self):
+        """Starts the render process; from here on this process never touches the display"""
+        if self._dashboard is not None:
+            return
+        self._dashboard = SharedDashboard()
+        self._published_count = 0
+        self._publish_dashboard(None)
+        context = multiprocessing.get_context("spawn")
+        self._render_process = context.Process(target=render_process_main, args=(self._dashboard.name, self._dashboard.ring_size), daemon=True)
+        self._render_process.start()
+
+    def close_render_process(self):
+        """Closes the render process window and releases the shared memory"""
+        if self._dashboard is None:
+            return
+        self._dashboard.mark_closed()
+        self._render_process.join(timeout=2.0)
+        if self._render_process.is_alive():
+            self._render_process.terminate()
+        self._dashboard.close()
+        self._dashboard = None
+        self._render_process = None
+
     def wait_for_start(self):
-        if not hasattr(self, "_screen") or self._screen is None:
+        if self.headless:
+            self._start_headless()
+            return
+        if self._dashboard is None and getattr(self, "_screen", None) is None:
             self.open_test_window()
         if getattr(self, "_started", False):
             return
         self._started = False
-        
-        # UI Colors
-        BG_COLOR = (10, 12, 18)
-        ACCENT_COLOR = (0, 200, 255)
-        
-        start_rect = pygame.Rect(0, 0, 240, 70)
-        start_rect.center = (self._screen.get_width() // 2, self._screen.get_height() // 2 + 50)
-        
-        title_font = pygame.font.Font(None, 72)
-        info_font = pygame.font.Font(None, 36)
-        
+
+        if self._dashboard is not None:
+            # The start screen runs in the render process; follow its control block
+            key_presses = 0
+            while not self._started:
+                started, quit_requested, presses, label = self._dashboard.read_control()
+                if quit_requested:
+                    self.close_render_process()
+                    pygame.quit()
+                    sys.exit()
+                if presses != key_presses and self.keyboard is not None and self.keyboard.last_key_code is not None:
+                    key_presses = presses
+                    if self.key_to_test is None:
+                        self.key_to_test = self.keyboard.last_key_code
+                        self._key_label = label
+                self._started = started
+                time.sleep(0.01)
+            return
+
         clock = pygame.time.Clock()
         while not self._started:
-            time_val = time.time()
+            start_rect = self._renderer.draw_start_screen(self.test_type, self._selected_key_label())
             for event in pygame.event.get():
                 if event.type == QUIT:
                     pygame.quit()
                     sys.exit()
                 if event.type == KEYDOWN:
                     if self.test_type == TEST_TYPE_KEYBOARD and self.key_to_test is None and event.key not in (K_RETURN, K_SPACE):
-                        self.key_to_test = event.key
+                        # With evdev the tested key is the Linux key code the kernel reported for this press
+                        self.key_to_test = self.keyboard.last_key_code if self.keyboard else event.key
+                        self._key_label = pygame.key.name(event.key)
                     if event.key in (K_RETURN, K_SPACE):
                         self._started = True
                 if event.type == MOUSEBUTTONDOWN:
                     if start_rect.collidepoint(event.pos):
                         self._started = True
-            
-            # Background gradient
-            for y in range(0, 600, 2):
-                c = (10 + y//60, 12 + y//50, 18 + y//30)
-                pygame.draw.rect(self._screen, c, (0, y, 800, 2))
-                
-            # Animated title glow
-            glow_alpha = int(abs(math.sin(time_val * 2)) * 100) + 155
-            title_surf = title_font.render("PROMETHEUS 82", True, (0, glow_alpha, 255))
-            title_rect = title_surf.get_rect(center=(400, 150))
-            self._screen.blit(title_surf, title_rect)
-            
-            # Subtitle
-            sub_text = "READY TO START"
-            sub_surf = info_font.render(sub_text, True, (200, 200, 200))
-            self._screen.blit(sub_surf, sub_surf.get_rect(center=(400, 210)))
-
-            if self.test_type == TEST_TYPE_KEYBOARD:
-                msg = "Press any key to test, then press Start"
-                if self.key_to_test is not None:
-                    try:
-                        key_name = pygame.key.name(self.key_to_test)
-                    except Exception:
-                        key_name = str(self.key_to_test)
-                    msg = f"Selected key: {key_name.upper()}"
-                msg_surf = info_font.render(msg, True, (0, 255, 150))
-                self._screen.blit(msg_surf, msg_surf.get_rect(center=(400, 280)))
-
-            # Button hover effect
-            mouse_pos = pygame.mouse.get_pos()
-            btn_color = (0, 180, 100) if start_rect.collidepoint(mouse_pos) else (0, 140, 70)
-            
-            # Draw button with glow
-            for i in range(5):
-                alpha_rect = start_rect.inflate(i*2, i*2)
-                pygame.draw.rect(self._screen, (0, 50, 20), alpha_rect, border_radius=15)
-                
-            pygame.draw.rect(self._screen, btn_color, start_rect, border_radius=12)
-            label = info_font.render("START TEST", True, (255, 255, 255))
-            label_pos = label.get_rect(center=start_rect.center)
-            self._screen.blit(label, label_pos)
-            
-            pygame.display.flip()
+
+            self._renderer.present()
             clock.tick(60)
 
+    def _start_headless(self):
+        """Headless start: select the keyboard key from the next evdev key press, then start right away"""
+        if self._started:
+            return
+        if self.test_type == TEST_TYPE_KEYBOARD and self.key_to_test is None and self.keyboard is not None:
+            print_info("Press the keyboard key to test...")
+            seen_ns = self.keyboard.last_key_ns
+            while self.keyboard.last_key_ns == seen_ns:
+                time.sleep(0.01)
+            self.key_to_test = self.keyboard.last_key_code
+            self._key_label = f"key code {self.key_to_test}"
+            print(f"Selected {self._key_label}")
+        print_info("Headless mode: starting measurements.")
+        self._started = True
+
+    def _selected_key_label(self):
+        if self.key_to_test is None:
+            return None
+        try:
+            return self._key_label or pygame.key.name(self.key_to_test)
+        except Exception:
+            return str(self.key_to_test)
+
     def close_test_window(self):
         return
 
-    def _pre_render_bg(self):
-        """Pre-renders the static background and header to save CPU"""
-        if self._bg_surface is not None:
-            return
-        self._bg_surface = pygame.Surface((800, 600))
-        # Background gradient
-        for y in range(0, 600, 4):
-            c = (10 + y//100, 12 + y//80, 18 + y//60)
-            pygame.draw.rect(self._bg_surface, c, (0, y, 800, 4))
-        # Header (Height 60)
-        pygame.draw.rect(self._bg_surface, (30, 35, 50), (0, 0, 800, 60))
-        pygame.draw.line(self._bg_surface, (60, 70, 90), (0, 60), (800, 60), 1)
-        title_font = pygame.font.Font(None, 32)
-        ACCENT_BLUE = (0, 180, 255)
-        header_surf = title_font.render("PROMETHEUS 82 | PERFORMANCE MONITOR", True, ACCENT_BLUE)
-        # Vertically center header text
-        self._bg_surface.blit(header_surf, (25, 30 - header_surf.get_height() // 2))
-
-    def render_test_window(self, average_latency=None):
-        if not hasattr(self, "_screen") or self._screen is None:
-            return
-            
-        # UI Colors
-        ACCENT_BLUE = (0, 180, 255)
-        ACCENT_CYAN = (0, 255, 220)
-        TEXT_WHITE = (255, 255, 255)
-        TEXT_GRAY = (180, 190, 210)
-        
-        # Draw pre-rendered background
-        self._pre_render_bg()
-        self._screen.blit(self._bg_surface, (0, 0))
-        
-        title_font = pygame.font.Font(None, 32)
-        
-        # Test Status Card
-        card_rect = pygame.Rect(25, 80, 750, 100)
-        pygame.draw.rect(self._screen, (20, 25, 35), card_rect, border_radius=15)
-        pygame.draw.rect(self._screen, (50, 60, 80), card_rect, width=1, border_radius=15)
-        
-        if self.test_type == TEST_TYPE_HARDWARE:
-            status_text = "HARDWARE TEST: RUNNING..."
-            status_color = (255, 180, 0)
-        elif self.test_type == TEST_TYPE_STICK and getattr(self, "_started", False) and len(self.latency_results) == 0:
-            status_text = "STICK CALIBRATION IN PROGRESS..."
-            status_color = ACCENT_CYAN
-        else:
-            status_text = f"{self.test_type.upper()} TEST: {len(self.latency_results)} / {self.iterations}"
-            status_color = TEXT_WHITE
-            
-        status_surf = title_font.render(status_text, True, status_color)
-        self._screen.blit(status_surf, (50, 105))
-        
-        # Progress Bar with Glow and Animation
-        bar_x, bar_y = 50, 145
-        bar_w, bar_h = 700, 12
-        pygame.draw.rect(self._screen, (40, 45, 55), (bar_x, bar_y, bar_w, bar_h), border_radius=6)
-        
-        if self.iterations > 0:
-            progress_pct = len(self.latency_results) / self.iterations
-            progress_w = int(progress_pct * bar_w)
-            if progress_w > 0:
-                # Gradient for progress bar
-                pygame.draw.rect(self._screen, ACCENT_BLUE, (bar_x, bar_y, progress_w, bar_h), border_radius=6)
+    def _dashboard_snapshot(self, average_latency=None):
+        """Progress and live statistics as drawn by TestWindowRenderer.draw_dashboard"""
+        # Live quantile-filtered statistics (O(log n) per frame)
+        live = self.order_stats.summary() if average_latency is not None and self.order_stats is not None else None
+        count = len(self.latency_results)
+        return {
+            'test_type': self.test_type,
+            'iterations': self.iterations,
+            'count': count,
+            'invalid': self.invalid_measurements,
+            'calibrating': self.test_type == TEST_TYPE_STICK and self._started and count == 0,
+            'finished': count >= self.iterations and self.iterations > 0,
+            'average': live['avg'] if live else average_latency,
+            'live': live,
+        }
 
-        # Latency Dashboard
-        if average_latency is not None:
-            dash_rect = pygame.Rect(25, 200, 750, 360)
-            pygame.draw.rect(self._screen, (15, 20, 28), dash_rect, border_radius=20)
-            pygame.draw.rect(self._screen, (40, 50, 70), dash_rect, width=1, border_radius=20)
-            
-            # Glow for latency text
-            label_font = pygame.font.Font(None, 36)
-            lat_label = label_font.render("AVERAGE RESPONSE TIME", True, TEXT_GRAY)
-            self._screen.blit(lat_label, (dash_rect.centerx - lat_label.get_width()//2, 250))
-            
-            val_font = pygame.font.Font(None, 120)
-            val_text = f"{average_latency:.2f}"
-            unit_text = "ms"
-            
-            val_surf = val_font.render(val_text, True, ACCENT_CYAN)
-            unit_font = pygame.font.Font(None, 48)
-            unit_surf = unit_font.render(unit_text, True, ACCENT_BLUE)
-            
-            total_w = val_surf.get_width() + unit_surf.get_width() + 8
-            start_x = dash_rect.centerx - total_w // 2
-            
-            # Align ms precisely to the baseline of the large digits
-            val_y = 320
-            unit_y = val_y + (val_surf.get_height() - unit_surf.get_height()) - 5 # Manual adjustment for font padding
-            
-            self._screen.blit(val_surf, (start_x, val_y))
-            self._screen.blit(unit_surf, (start_x + val_surf.get_width() + 8, unit_y))
-            
-            # Stats breakdown with fixed positions to prevent jumping
-            if self.latency_results:
-                min_lat = min(self.latency_results)
-                max_lat = max(self.latency_results)
-                
-                # Calculate jitter (standard deviation)
-                jitter = statistics.stdev(self.latency_results) if len(self.latency_results) > 1 else 0.0
-                
-                # Render each stat at a fixed offset
-                min_surf = label_font.render(f"MIN: {min_lat:.2f}ms", True, TEXT_GRAY)
-                max_surf = label_font.render(f"MAX: {max_lat:.2f}ms", True, TEXT_GRAY)
-                jitter_surf = label_font.render(f"JITTER: {jitter:.2f}ms", True, TEXT_GRAY)
-                
-                # Positions based on thirds of the card
-                self._screen.blit(min_surf, (100, 480))
-                self._screen.blit(max_surf, (330, 480))
-                self._screen.blit(jitter_surf, (550, 480))
-            
-        # Check if test is finished
-        is_finished = len(self.latency_results) >= self.iterations and self.iterations > 0
-        
-        # Status Badge (vertically centered in header)
-        if is_finished:
-            # FINISHED Badge
-            badge_rect = pygame.Rect(680, 16, 95, 28)
-            pygame.draw.rect(self._screen, (0, 30, 10), badge_rect, border_radius=6)
-            pygame.draw.rect(self._screen, (0, 150, 70), badge_rect, width=1, border_radius=6)
-            badge_font = pygame.font.Font(None, 24)
-            badge_surf = badge_font.render("FINISHED", True, (0, 255, 120))
-            self._screen.blit(badge_surf, (badge_rect.centerx - badge_surf.get_width()//2, 23))
-        else:
-            # LIVE Badge
-            pulse = int(abs(math.sin(time.time() * 2)) * 50) + 100
-            badge_rect = pygame.Rect(710, 16, 65, 28)
-            pygame.draw.rect(self._screen, (30, 0, 0), badge_rect, border_radius=6)
-            pygame.draw.rect(self._screen, (pulse, 20, 40), badge_rect, width=1, border_radius=6)
-            
-            # Red dot inside badge
-            pygame.draw.circle(self._screen, (255, 40, 60), (722, 30), 4)
-            
-            badge_font = pygame.font.Font(None, 24)
-            badge_surf = badge_font.render("LIVE", True, (255, 60, 80))
-            self._screen.blit(badge_surf, (732, 23))
+    def _publish_dashboard(self, average_latency):
+        """Hands the current snapshot and any new samples to the render process (no drawing here)"""
+        samples = self.latency_results[self._published_count:]
+        self._published_count = len(self.latency_results)
+        self._dashboard.publish(self._dashboard_snapshot(average_latency), samples)
+
+    def _report_progress(self, average_latency=None):
+        """Headless replacement for the test window: one progress line or JSON record per HEADLESS_PROGRESS_INTERVAL"""
+        snapshot = self._dashboard_snapshot(average_latency)
+        now = time.perf_counter()
+        if snapshot['finished']:
+            if self._final_progress_reported:
+                return
+            self._final_progress_reported = True
+        elif now - self._last_progress_time < HEADLESS_PROGRESS_INTERVAL:
+            return
+        self._last_progress_time = now
+        live = snapshot['live']
+        if HEADLESS_PROGRESS == "json" or self.progress_sink is not None:
+            record = {
+                'event': 'finished' if snapshot['finished'] else 'progress',
+                'test_type': snapshot['test_type'],
+                'count': snapshot['count'],
+                'iterations': snapshot['iterations'],
+                'invalid': snapshot['invalid'],
+                'average': round(snapshot['average'], 4) if snapshot['average'] is not None else None,
+            }
+            if live:
+                record.update({key: round(live[key], 4) for key in ('min', 'max', 'jitter', 'p50', 'p90', 'p99')})
+            if self.progress_sink is not None:
+                self.progress_sink(record)
+            else:
+                async_log(json.dumps(record))
+            return
+        line = f"Progress: {snapshot['count']}/{snapshot['iterations']} valid, {snapshot['invalid']} invalid"
+        if live:
+            line += f" | avg {live['avg']:.2f} ms, jitter {live['jitter']:.2f} ms, p99 {live['p99']:.2f} ms"
+        async_log(line)
 
-        # Instruction at the bottom
-        hint_font = pygame.font.Font(None, 24)
-        if is_finished:
-            hint_text = "TEST COMPLETE - CONTINUE IN CONSOLE TO SAVE RESULTS"
-            hint_color = (0, 255, 180)
-        else:
-            hint_text = "KEEP WINDOW ACTIVE AND ON TOP TO CAPTURE INPUTS"
-            hint_color = (150, 150, 50)
-            
-        hint_surf = hint_font.render(hint_text, True, hint_color)
-        self._screen.blit(hint_surf, (400 - hint_surf.get_width() // 2, 575))
-        
-        pygame.display.flip()
+    def render_test_window(self, average_latency=None):
+        if self.headless:
+            self._report_progress(average_latency)
+            return
+        if self._dashboard is not None:
+            self._publish_dashboard(average_latency)
+            return
+        if getattr(self, "_screen", None) is None:
+            return
+        snapshot = self._dashboard_snapshot(average_latency)
+        snapshot['recent'] = self.latency_results[-RENDER_RING_SIZE:]
+        self._renderer.draw_dashboard(snapshot)
+        self._renderer.present()
 
     def check_stick_setup(self, iterations=5):
         if self.test_type != TEST_TYPE_STICK:
@@ -969,13 +3236,15 @@ class LatencyTester:
         invalid_deflection_count = 0
         invalid_contact_count = 0
         try:
-            self.serial.reset_input_buffer()
+            self._discard_serial_input()
             self.serial.reset_output_buffer()
         except Exception:
             pass
+        if not self.stick_axes:
+            self.capture_axis_rest()  # Before the first hit
             
         for i in range(iterations + 1):
-            pygame.event.clear()
+            clear_pygame_events()
             baseline_axes = []
             if self.joystick:
                 baseline_axes = [self.joystick.get_axis(a) for a in range(self.joystick.get_numaxes())]
@@ -987,7 +3256,7 @@ class LatencyTester:
                 if not self.stick_axes:
                     self.detect_active_stick()
                 else:
-                    pygame.event.clear()
+                    clear_pygame_events()
                     
                 if self.joystick:
                     axes = self.stick_axes if self.stick_axes else range(self.joystick.get_numaxes())
@@ -1004,6 +3273,7 @@ class LatencyTester:
 
             if self.serial:
                 self.serial.write(b'T')
+                self._note_pulse(time.perf_counter() * 1_000_000)
                 try:
                     self.serial.flush()
                 except Exception:
@@ -1013,8 +3283,9 @@ class LatencyTester:
             contact_time_us = None
             t0 = time.perf_counter()
             while time.perf_counter() - t0 < 1.0:
-                if self.serial and self.serial.in_waiting and self.serial.read() == b'S':
-                    contact_time_us = time.perf_counter() * 1000000
+                b, ts_us = self._read_serial_byte()
+                if b == b'S':
+                    contact_time_us = ts_us
                     break
                 update_deflection()
                 try:
@@ -1038,11 +3309,10 @@ class LatencyTester:
                         self.serial.flush()
                         tQ = time.perf_counter()
                         while time.perf_counter() - tQ < 0.200:
-                            if self.serial.in_waiting:
-                                resp = self.serial.read()
-                                if resp in (b'H', b'U'):
-                                    hold_ok = (resp == b'H')
-                                    break
+                            resp, _ = self._read_serial_byte()
+                            if resp in (b'H', b'U'):
+                                hold_ok = (resp == b'H')
+                                break
                             
                             update_deflection()
                             time.sleep(0.001)
@@ -1106,64 +3376,65 @@ class LatencyTester:
             return False
         
         for _ in range(3):  # Send command and value (high byte, low byte)
-            self.serial.reset_input_buffer()
+            self._discard_serial_input()
             self.serial.reset_output_buffer()
             self.serial.write(b'P')
             self.serial.write(bytes([(duration_ms >> 8) & 0xFF, duration_ms & 0xFF]))
             self.serial.flush()
             start = time.time()
             while time.time() - start < 1.0:  # 1 second timeout
-                if self.serial.in_waiting and self.serial.read() == b'A':
+                if self._read_serial_byte()[0] == b'A':
                     print(f"Pulse duration successfully set to {duration_ms} ms ({self.pulse_duration_us} µs)")
                     return True
                 time.sleep(0.001)
         print_error("Failed to set pulse duration after 3 attempts. Continuing with default value.")
         return False
 
+    def capture_axis_rest(self):
+        """Records the current axis values as the rest position that stick detection compares against"""
+        if not self.joystick:
+            return
+        if isinstance(self.joystick, DIRECT_INPUT_BACKENDS):
+            self.joystick.update()
+        else:
+            clear_pygame_events()
+        self.axis_rest = [self.joystick.get_axis(axis) for axis in range(self.joystick.get_numaxes())]
+
     def detect_active_stick(self):
-        """Detects active stick movement beyond threshold and dynamically determines the axis pair."""
+        """Detects active stick movement beyond threshold and dynamically determines the axis pair.
+        An axis only counts when it also moved STICK_DETECT_DEFLECTION away from its rest value, so triggers
+        and axes resting at an extreme are never taken for the stick."""
         if not self.joystick:
             return False
-        if isinstance(self.joystick, SteamControllerDirect):
-            self.joystick.update()
-            for axis in range(self.joystick.get_numaxes()):
-                val = self.joystick.get_axis(axis)
-                if abs(val) > STICK_THRESHOLD:
-                    self.primary_axis = axis
-                    if axis % 2 == 0:
-                        partner_axis = axis + 1
-                    else:
-                        partner_axis = axis - 1
-                    if 0 <= partner_axis < self.joystick.get_numaxes():
-                        self.stick_axes = sorted([axis, partner_axis])
-                    else:
-                        self.stick_axes = [axis]
-                    return True
+        if self.axis_rest is None:
+            self.capture_axis_rest()
             return False
-        for event in pygame.event.get():
-            if event.type == JOYAXISMOTION and event.joy == self.joystick.get_id():
-                axis = event.axis
-                val = event.value
-                if abs(val) > STICK_THRESHOLD:
-                    self.primary_axis = axis
-                    
-                    if axis % 2 == 0:
-                        partner_axis = axis + 1
-                    else:
-                        partner_axis = axis - 1
-                    
-                    if 0 <= partner_axis < self.joystick.get_numaxes():
-                        self.stick_axes = sorted([axis, partner_axis])
-                    else:
-                        self.stick_axes = [axis]
-                    return True
+        if isinstance(self.joystick, DIRECT_INPUT_BACKENDS):
+            self.joystick.update()
+            moved = [(axis, self.joystick.get_axis(axis)) for axis in range(self.joystick.get_numaxes())]
+        else:
+            moved = [(event.axis, event.value) for event in pygame.event.get()
+                     if event.type == JOYAXISMOTION and event.joy == self.joystick.get_id()]
+        for axis, val in moved:
+            rest = self.axis_rest[axis] if axis < len(self.axis_rest) else 0.0
+            if abs(val) > STICK_THRESHOLD and abs(val - rest) >= STICK_DETECT_DEFLECTION:
+                self.primary_axis = axis
+                if hasattr(self.joystick, "axis_partner"):
+                    partner_axis = self.joystick.axis_partner(axis)  # evdev order puts triggers between the sticks
+                else:
+                    partner_axis = axis + 1 if axis % 2 == 0 else axis - 1
+                if partner_axis is not None and 0 <= partner_axis < self.joystick.get_numaxes():
+                    self.stick_axes = sorted([axis, partner_axis])
+                else:
+                    self.stick_axes = [axis]
+                return True
         return False
 
     def detect_active_button(self):
         """Detects button press events"""
         if not self.joystick:
             return False
-        if isinstance(self.joystick, SteamControllerDirect):
+        if isinstance(self.joystick, DIRECT_INPUT_BACKENDS):
             self.joystick.update()
         for i in range(min(4, self.joystick.get_numbuttons())):
             if self.joystick.get_button(i):
@@ -1173,6 +3444,12 @@ class LatencyTester:
 
     def detect_active_key(self):
         """Detects keyboard key press events"""
+        if self.keyboard:
+            for code in (EvdevDevice.KEY_SPACE, EvdevDevice.KEY_ENTER):
+                if self.keyboard.is_pressed(code):
+                    self.key_to_test = code
+                    return True
+            return False
         keys = pygame.key.get_pressed()
         for k in (K_SPACE, K_RETURN):
             if keys[k]:
@@ -1182,7 +3459,7 @@ class LatencyTester:
 
     def is_button_pressed(self):
         """Checks if the selected button is pressed"""
-        if isinstance(self.joystick, SteamControllerDirect):
+        if isinstance(self.joystick, DIRECT_INPUT_BACKENDS):
             self.joystick.update()
         return self.button_to_test is not None and self.joystick and self.joystick.get_button(self.button_to_test)
 
@@ -1190,6 +3467,8 @@ class LatencyTester:
         """Checks if the selected keyboard key is pressed"""
         if self.key_to_test is None:
             return False
+        if self.keyboard:
+            return self.keyboard.is_pressed(self.key_to_test)
         keys = pygame.key.get_pressed()
         return keys[self.key_to_test]
 
@@ -1203,7 +3482,7 @@ class LatencyTester:
         """Checks if stick is at extreme position, auto-locking to the primary axis on first hit."""
         if not self.stick_axes or not self.joystick:
             return False
-        if isinstance(self.joystick, SteamControllerDirect):
+        if isinstance(self.joystick, DIRECT_INPUT_BACKENDS):
             self.joystick.update()
         
         # If we already know which axis is being hit, check only that one
@@ -1220,16 +3499,38 @@ class LatencyTester:
 
     def trigger_solenoid(self):
         """Sends command to Prometheus to activate the solenoid.
-        Flushes the serial input buffer before sending 'T' to discard any stale 'S'
-        bytes left from the previous cycle (contact bounce, etc.).
+        Discards any stale 'S' events left from the previous cycle (contact bounce, etc.)
+        before sending 'T'.
         s_time_us (latency reference) is set later when the fresh 'S' is received."""
         if self.serial:
-            self.serial.reset_input_buffer()  # Discard stale 'S' bytes from previous cycle
+            self._discard_serial_input()  # Discard stale 'S' bytes from previous cycle
             self.serial.write(b'T')
         self.last_trigger_time_us = time.perf_counter() * 1_000_000  # T: timestamp for interval control
+        self._note_pulse(self.last_trigger_time_us)
+        for source in (self.joystick, self.keyboard):
+            if hasattr(source, "arm"):
+                source.arm()         # Timestamped backends: only edges after T count for this cycle
         self._cycle_active = True    # Open measurement window
         self._s_received = False     # Reset cycle flags
         self._g_received = False
+        self._release_us = None
+        self._ready_us = None
+
+    def _note_pulse(self, time_us):
+        """Adds one solenoid pulse to the session heat (decayed since the previous pulse)"""
+        if self._heat_time_us is not None:
+            self._heat *= math.exp((self._heat_time_us - time_us) / (THERMAL_TAU_S * 1_000_000))
+        self._heat += self.pulse_duration_us / 1_000_000
+        self._heat_time_us = time_us
+
+    def record_heat(self):
+        """Charges the heat of the pulses fired so far to the solenoid's thermal store"""
+        if self._heat_time_us is None:
+            return
+        now_us = time.perf_counter() * 1_000_000
+        heat = self._heat * math.exp((self._heat_time_us - now_us) / (THERMAL_TAU_S * 1_000_000))
+        self._heat, self._heat_time_us = 0.0, None
+        save_solenoid_heat(heat, self.test_type)
 
     def test_hardware(self):
         """Tests the solenoid and sensor functionality"""
@@ -1247,75 +3548,58 @@ class LatencyTester:
         sensor_press_times = []
         successful_detections = 0
         
-        self.serial.reset_input_buffer()
+        self._discard_serial_input()
         self.serial.reset_output_buffer()
         
-        # Synchronize start time
-        start_loop_time = time.perf_counter()
-        
-        for i in range(iterations):
-            # Calculate when the next shot should happen
-            next_shot_time = start_loop_time + (i + 1) * interval_s
-            
-            # Fire solenoid (blindly, based on time)
-            self.trigger_solenoid()
-            
-            # Wait until the next shot time, while listening for sensor response
-            detected_in_cycle = False
-            while time.perf_counter() < next_shot_time:
-                if self.serial.in_waiting:
-                    try:
-                        b = self.serial.read()
-                        if b == b'S':
-                            # Record time immediately
-                            now = time.perf_counter()
-                            sensor_press_times.append(now)
-                            successful_detections += 1
-                            detected_in_cycle = True
-                            
-                            # If we have at least 2 presses, we can calculate and print the interval immediately
-                            if len(sensor_press_times) > 1:
-                                interval_ms = (sensor_press_times[-1] - sensor_press_times[-2]) * 1000
-                                idx = len(sensor_press_times) - 1
-                                print(f"Interval {idx}: {interval_ms:.2f} ms")
-                                
-                    except Exception:
-                        pass
-                
-                # Keep window responsive
+        deadline_us = 0.0
+
+        def listen():
+            """Collects sensor presses and keeps the window responsive while waiting for the next shot"""
+            nonlocal successful_detections
+            while self.serial.in_waiting:
+                try:
+                    b, ts_us = self._read_serial_byte()
+                except Exception:
+                    break
+                if b != b'S':
+                    continue
+                # Record arrival time (captured by the reader thread when enabled)
+                sensor_press_times.append(ts_us / 1_000_000)
+                successful_detections += 1
+
+                # If we have at least 2 presses, we can calculate and print the interval immediately
+                if len(sensor_press_times) > 1:
+                    interval_ms = (sensor_press_times[-1] - sensor_press_times[-2]) * 1000
+                    idx = len(sensor_press_times) - 1
+                    print(f"Interval {idx}: {interval_ms:.2f} ms")
+            if self._scheduler.has_idle_budget(deadline_us):
                 try:
                     self.render_test_window(None)
                 except Exception:
                     pass
-                
-                # Prevent CPU hogging
-                time.sleep(0.001)
-            
-            if not detected_in_cycle:
-                # Optional: print failure if needed
-                pass
-        
-        # Wait a little extra after the last shot for any straggling response
-        end_wait = time.perf_counter() + 0.1
-        while time.perf_counter() < end_wait:
-             if self.serial.in_waiting:
-                 try:
-                     if self.serial.read() == b'S':
-                         now = time.perf_counter()
-                         sensor_press_times.append(now)
-                         successful_detections += 1
-                         # Print interval if we have enough points
-                         if len(sensor_press_times) > 1:
-                            interval_ms = (sensor_press_times[-1] - sensor_press_times[-2]) * 1000
-                            idx = len(sensor_press_times) - 1
-                            print(f"Interval {idx}: {interval_ms:.2f} ms")
-                 except Exception:
-                     pass
-             time.sleep(0.001)
+
+        # Synchronize start time: shots are fired on a fixed grid, not relative to the previous shot
+        start_loop_us = time.perf_counter() * 1_000_000
+
+        for i in range(iterations):
+            deadline_us = start_loop_us + i * self.test_interval_us
+            self._scheduler.wait_until(deadline_us, idle=listen)
+            # Fire solenoid (blindly, based on time)
+            self.trigger_solenoid()
+            self._scheduler.record(deadline_us, self.last_trigger_time_us)
+
+        # Wait out the last interval plus a little extra for any straggling response
+        deadline_us = start_loop_us + iterations * self.test_interval_us + 100_000
+        while time.perf_counter() * 1_000_000 < deadline_us:
+            listen()
+            time.sleep(0.001)
 
         print(f"\n{Fore.CYAN}Hardware Test Results:{Fore.RESET}")
         print(f"Total shots: {iterations}")
         print(f"Detected hits: {successful_detections}")
+        trigger_timing = self._scheduler.summary()
+        if trigger_timing:
+            print(f"Trigger scheduling error: avg {trigger_timing['avg']*1000:+.0f} µs, p99 {trigger_timing['p99']*1000:+.0f} µs, max {trigger_timing['max']*1000:+.0f} µs (host side)")
         
         timing_warning = False
         avg_interval = 0
@@ -1355,9 +3639,140 @@ class LatencyTester:
         else:
             print(f"{Fore.RED}Hardware test failed: Check solenoid and sensor connections or hardware integrity.{Fore.RESET}")
 
+        self.record_heat()
         self.close_test_window()
         return successful_detections >= (iterations - 2), timing_warning
 
+    def _trigger_deadline_us(self):
+        deadline_us = self._last_scheduled_us + self.test_interval_us
+        if self._ready_us is not None:
+            # Adaptive interval: settle after release/rest, but keep the solenoid under its duty-cycle cap
+            earliest_us = max(self._ready_us + ADAPTIVE_MARGIN_MS * 1000,
+                              self.last_trigger_time_us + self.pulse_duration_us / ADAPTIVE_MAX_DUTY)
+            return min(deadline_us, earliest_us)
+        return deadline_us
+
+    def _adaptive_interval(self):
+        return ADAPTIVE_INTERVAL and self.release_events
+
+    def _input_at_rest(self):
+        """True when the tested input has returned to its rest state"""
+        if self.test_type == TEST_TYPE_STICK:
+            if self.primary_axis is None or not self.joystick:
+                return False
+            if isinstance(self.joystick, DIRECT_INPUT_BACKENDS):
+                self.joystick.update()
+            return abs(self.joystick.get_axis(self.primary_axis)) < ADAPTIVE_STICK_REST
+        if self.test_type == TEST_TYPE_BUTTON:
+            return self.button_to_test is not None and not self.is_button_pressed()
+        if self.test_type == TEST_TYPE_KEYBOARD:
+            return self.key_to_test is not None and not self.is_key_pressed()
+        return False
+
+    def _service_release(self):
+        """Idle-phase work of the adaptive interval: waits for the contact release 'L', then for the input to rest"""
+        while self._release_us is None:
+            b, ts_us = self._read_serial_byte()
+            if b is None:
+                return
+            if b == b'L':
+                self._release_us = ts_us
+        if self._ready_us is None and self._input_at_rest():
+            self._ready_us = time.perf_counter() * 1_000_000
+
+    def _fire_scheduled_trigger(self):
+        """Fires the solenoid for the current deadline and records how late it actually fired"""
+        scheduled_us = self._trigger_deadline_us()
+        self.trigger_solenoid()
+        self._scheduler.record(scheduled_us, self.last_trigger_time_us)
+        self.trace.begin(self.last_trigger_time_us, self.pulse_duration_us)
+        # Stay on the grid unless the host stalled for a whole interval, then restart it to avoid a burst of shots
+        if self.last_trigger_time_us - scheduled_us < self.test_interval_us:
+            self._last_scheduled_us = scheduled_us
+        else:
+            self._last_scheduled_us = self.last_trigger_time_us
+
+    def _read_serial_byte(self):
+        """Returns (byte, timestamp µs) of the next Arduino event, or (None, None) if nothing is waiting.
+        With the capture engine the timestamp is the arrival time recorded by the reader thread.
+        With board timestamps, 'S' is stamped with the board's contact time mapped onto the host clock."""
+        if isinstance(self.serial, SerialCaptureEngine):
+            event = self.serial.read_event()
+            if event is None:
+                return None, None
+            b, ts_us = event[0], event[1] / 1000.0
+        else:
+            if not self.serial or not self.serial.in_waiting:
+                return None, None
+            b, ts_us = self.serial.read(), time.perf_counter() * 1_000_000
+        self._arrival_us = ts_us
+        if self.clock_sync is not None and b in (b'S', b'R', b'L'):
+            payload = self.serial.read(4)
+            if len(payload) < 4:
+                return None, None
+            board_us = int.from_bytes(payload, "little")
+            if b == b'R':
+                if self._sync_send_us is not None:
+                    self.clock_sync.add_sample(self._sync_send_us, ts_us, board_us)
+                    self._sync_send_us = None
+            elif self.clock_sync.ready:
+                ts_us = self.clock_sync.to_host_us(board_us)
+        return b, ts_us
+
+    def _discard_serial_input(self):
+        """Drops stale Arduino bytes. With board timestamps 'S', 'R' and 'L' are 5-byte frames, so whole frames
+        are consumed through _read_serial_byte: a buffer reset could cut a frame after its header and leave
+        payload bytes that would later be read as events."""
+        if self.clock_sync is None:
+            self.serial.reset_input_buffer()
+            return
+        while self._read_serial_byte()[0] is not None:
+            pass
+
+    def _service_clock_sync(self, deadline_us):
+        """Idle-phase work: consumes pending sync replies and sends a new 'D' round trip when one is due"""
+        if self.clock_sync is None:
+            return
+        while self.serial.in_waiting and self._sync_send_us is not None:
+            self._read_serial_byte()
+        now = time.perf_counter()
+        if now - self._last_sync_time >= CLOCK_SYNC_INTERVAL and self._scheduler.has_idle_budget(deadline_us):
+            self._last_sync_time = now
+            self._sync_send_us = time.perf_counter() * 1_000_000
+            self.serial.write(b'D')
+            self.serial.flush()
+
+    def _note_capture_advance(self, capture_time_us):
+        """Tracks how much earlier the thread-captured S timestamp is than the main loop poll"""
+        if not isinstance(self.serial, SerialCaptureEngine):
+            return
+        advance_us = time.perf_counter() * 1_000_000 - capture_time_us
+        self._capture_advance_sum_us += advance_us
+        self._capture_advance_count += 1
+        if advance_us > self._capture_advance_max_us:
+            self._capture_advance_max_us = advance_us
+
+    def stop_serial_capture(self):
+        """Stops the serial reader thread and hands the port back for direct polling"""
+        if isinstance(self.serial, SerialCaptureEngine):
+            self.serial.stop()
+            self.serial = self.serial.ser
+
+    def _uses_event_timestamps(self):
+        """True when both S and G are timestamped by reader threads, so the loop may block instead of spin"""
+        if not isinstance(self.serial, SerialCaptureEngine):
+            return False
+        source = self.keyboard if self.test_type == TEST_TYPE_KEYBOARD else self.joystick
+        return hasattr(source, "has_event_timestamps") and source.has_event_timestamps()
+
+    def _input_edge_time_us(self, kind, index):
+        """Returns the input backend's timestamp (µs) of the first edge since the last trigger, or None when
+        the backend only supports polling (Pygame) or no edge was reported yet"""
+        edge_time_us = getattr(self.joystick, "edge_time_us", None)
+        if edge_time_us is None or index is None:
+            return None
+        return edge_time_us(kind, index)
+
     def _calculate_latency(self, input_time_us):
         """Calculates latency from timestamps: input_time_us minus s_time_us.
         Both values are captured with time.perf_counter() * 1_000_000 (microseconds)."""
@@ -1378,18 +3793,28 @@ class LatencyTester:
         if self.test_type == TEST_TYPE_STICK:
             if not self.stick_axes and self.detect_active_stick():
                 return None  # axis just identified, not a measurement hit
+            edge_us = self._input_edge_time_us("axis", self.primary_axis)
+            if edge_us is not None:
+                return edge_us  # G timestamp from the report that crossed the threshold
             if self.is_stick_at_extreme():
                 return time.perf_counter() * 1_000_000  # G timestamp
 
         elif self.test_type == TEST_TYPE_BUTTON:
             if self.button_to_test is None and self.detect_active_button():
                 return None
+            edge_us = self._input_edge_time_us("button", self.button_to_test)
+            if edge_us is not None:
+                return edge_us  # G timestamp from the report with the press edge
             if self.is_button_pressed():
                 return time.perf_counter() * 1_000_000  # G timestamp
 
         elif self.test_type == TEST_TYPE_KEYBOARD:
             if self.key_to_test is None and self.detect_active_key():
                 return None
+            if self.keyboard:
+                edge_us = self.keyboard.edge_time_us("key", self.key_to_test)
+                if edge_us is not None:
+                    return edge_us  # G timestamp from the kernel key event
             if self.is_key_pressed():
                 return time.perf_counter() * 1_000_000  # G timestamp
 
@@ -1399,38 +3824,152 @@ class LatencyTester:
         """Calculates test statistics"""
         if not self.latency_results:
             return None
-        filtered_results = sorted(self.latency_results)[int(len(self.latency_results) * LOWER_QUANTILE):int(len(self.latency_results) * UPPER_QUANTILE) + 1]
+        if self.order_stats.count != len(self.latency_results):  # Results were edited outside test_loop
+            self.order_stats = OrderStatistics(ORDER_STATS_LOW_MS, self.max_latency_us / 1000.0)
+            for value in self.latency_results:
+                self.order_stats.add(value)
+        summary = self.order_stats.summary()
         return {
             'total_samples': len(self.latency_results) + self.invalid_measurements,
             'valid_samples': len(self.latency_results),
             'invalid_samples': self.invalid_measurements,
-            'filtered_samples': len(filtered_results),
-            'min': min(filtered_results),
-            'max': max(filtered_results),
-            'avg': statistics.mean(filtered_results),
-            'jitter': round(statistics.pstdev(filtered_results) if len(filtered_results) > 0 else 0.0, 2),
-            'filtered_results': filtered_results,
+            'filtered_samples': summary['filtered_samples'],
+            'min': summary['min'],
+            'max': summary['max'],
+            'avg': summary['avg'],
+            'jitter': round(summary['jitter'], 2),
+            'filtered_results': self.order_stats.filtered_values(),
+            'p50': summary['p50'],
+            'p90': summary['p90'],
+            'p99': summary['p99'],
+            'raw_min': self.running_stats.min,
+            'raw_max': self.running_stats.max,
+            'raw_avg': self.running_stats.mean,
+            'raw_jitter': round(self.running_stats.stdev, 2),
             'pulse_duration': self.pulse_duration_us / 1000,
-            'contact_delay': self.contact_delay
+            'contact_delay': self.contact_delay,
+            'timestamp_source': 'board' if self.clock_sync is not None and self.clock_sync.ready else 'host',
+            'clock_drift_ppm': round(self.clock_sync.drift_ppm, 2) if self.clock_sync is not None and self.clock_sync.ready else None,
+            's_capture_advance': round(self._capture_advance_sum_us / self._capture_advance_count / 1000, 3) if self._capture_advance_count else None,
+            's_capture_advance_max': round(self._capture_advance_max_us / 1000, 3) if self._capture_advance_count else None,
+            'adaptive_interval': self._adaptive_interval(),
+            'cycle_interval_avg': self.trace.mean_interval_ms(),
+            'stopped_early': self.stopped_early,
+            **self._report_rate_statistics(),
+            **self._confidence_statistics(),
+            **self._trigger_timing_statistics()
+        }
+
+    def _confidence_statistics(self):
+        mean_ci, p99_ci = self.confidence_intervals()
+        return {
+            'avg_ci95': round(mean_ci, 4) if mean_ci is not None else None,
+            'p99_ci95_low': p99_ci[0] if p99_ci else None,
+            'p99_ci95_high': p99_ci[1] if p99_ci else None,
+        }
+
+    def store_result(self):
+        """Archives the finished session in the result store; returns its session id"""
+        if not RESULT_STORE_FILE or not self.latency_results:
+            return None
+        stats = self.get_statistics()
+        session = {
+            'version': VERSION, 'test_type': self.test_type,
+            'device_name': self.joystick.get_name() if self.joystick else ("Keyboard" if self.test_type == TEST_TYPE_KEYBOARD else None),
+            'device_guid': self.joystick.get_guid() if self.joystick else None,
+            'protocol': server_protocol_name(self._protocol) if self.joystick else None,
+            'connection': self.connection, 'pulse_duration': stats['pulse_duration'], 'contact_delay': stats['contact_delay'],
+            'timestamp_source': stats['timestamp_source'], 'iterations': self.iterations,
+            'session_file': self.trace.sink.filename if self.trace.sink is not None else None,
+        }
+        try:
+            with contextlib.closing(ResultStore()) as store:
+                self.store_session_id = store.add_session(session, stats, self.latency_results)
+        except sqlite3.Error as e:
+            print_error(f"Saving the result to {RESULT_STORE_FILE} failed: {e}")
+        return self.store_session_id
+
+    def _probe_report_rate(self):
+        """Estimates the idle report rate before the measurements (waits up to REPORT_PROBE_S for reports)"""
+        deadline = time.perf_counter() + REPORT_PROBE_S
+        while self.report_timeline.estimate() is None and time.perf_counter() < deadline:
+            time.sleep(0.02)
+        self.report_rate_idle = self.report_timeline.estimate()
+        self._measure_start_ns = time.perf_counter_ns()
+        if self.report_rate_idle is not None:
+            print_info(f"Controller {self.report_rate_idle['report_source']} every {self.report_rate_idle['report_interval']:.2f} ms "
+                       f"({self.report_rate_idle['report_rate_hz']:.0f} Hz, jitter {self.report_rate_idle['report_jitter']:.2f} ms) before the test.")
+
+    def _report_rate_statistics(self):
+        """Report interval, rate, jitter and dropped reports during the measurements (None without a direct backend)"""
+        during = self.report_timeline.estimate(self._measure_start_ns) if self.report_timeline is not None else None
+        stats = {key: None for key in ('report_interval', 'report_rate_hz', 'report_jitter', 'dropped_reports', 'report_count', 'report_source')}
+        stats.update(during or {})
+        stats['report_interval_idle'] = self.report_rate_idle['report_interval'] if self.report_rate_idle else None
+        return stats
+
+    def confidence_intervals(self):
+        """95% CI half-width of the filtered mean (normal approximation with the filtered jitter) and the
+        distribution-free order-statistic interval of p99 as (low, high), or None while it is still unbounded"""
+        summary = self.order_stats.summary()
+        if summary is None or summary['filtered_samples'] < 2:
+            return None, None
+        mean_ci = EARLY_STOP_Z * summary['jitter'] / math.sqrt(summary['filtered_samples'])
+        count = self.order_stats.count
+        spread = EARLY_STOP_Z * math.sqrt(count * 0.99 * 0.01)
+        lo, hi = math.floor(count * 0.99 - spread), math.ceil(count * 0.99 + spread)
+        p99_ci = (self.order_stats.value_at(lo), self.order_stats.value_at(hi)) if lo >= 0 and hi < count else None
+        return mean_ci, p99_ci
+
+    def _early_stop_reached(self):
+        """Sequential mode: checked every EARLY_STOP_CHECK_EVERY valid samples once the minimum is reached"""
+        count = len(self.latency_results)
+        if not EARLY_STOP or count < EARLY_STOP_MIN_SAMPLES or count % EARLY_STOP_CHECK_EVERY:
+            return False
+        mean_ci, p99_ci = self.confidence_intervals()
+        if mean_ci is None or mean_ci > EARLY_STOP_CI_MS:
+            return False
+        if EARLY_STOP_P99_CI_MS is not None and (p99_ci is None or (p99_ci[1] - p99_ci[0]) / 2 > EARLY_STOP_P99_CI_MS):
+            return False
+        return count < self.iterations  # Reaching the maximum is a normal finish
+
+    def _trigger_timing_statistics(self):
+        """Scheduled vs actual trigger time distribution (ms, positive = late)"""
+        timing = self._scheduler.summary()
+        if not timing:
+            return {'trigger_error_avg': None, 'trigger_error_jitter': None, 'trigger_error_p99': None, 'trigger_error_max': None}
+        return {
+            'trigger_error_avg': round(timing['avg'], 4),
+            'trigger_error_jitter': round(timing['jitter'], 4),
+            'trigger_error_p99': round(timing['p99'], 4),
+            'trigger_error_max': round(timing['max'], 4),
         }
 
     def test_loop(self):
         """Main test loop for stick or button tests with high-precision optimizations"""
         global LAST_RENDER_CALL
         LAST_RENDER_CALL = None
-        print("\nPreparing test window...")
-        self.open_test_window()
-        print_info("Test window ready. Switch to the graphical window and press START TEST to begin.")
+        if not self.headless:
+            print("\nPreparing test window...")
+            self.open_test_window()
+            print_info("Test window ready. Switch to the graphical window and press START TEST to begin.")
         self.wait_for_start()
         
         if self.test_type == TEST_TYPE_STICK:
             ok = self.check_stick_setup(iterations=5)
             if not ok:
+                self.record_heat()
+                self.close_render_process()
                 if pygame.display.get_init() and pygame.display.get_surface() is not None:
                     pygame.display.quit()
                 return
                 
-        print(f"\nStarting {self.iterations} measurements with microsecond precision...\n")
+        if EARLY_STOP and self.iterations > EARLY_STOP_MIN_SAMPLES:
+            target = f"average within ±{EARLY_STOP_CI_MS:.2f} ms" + (f", p99 within ±{EARLY_STOP_P99_CI_MS:.2f} ms" if EARLY_STOP_P99_CI_MS is not None else "")
+            print(f"\nStarting {EARLY_STOP_MIN_SAMPLES}-{self.iterations} measurements with microsecond precision "
+                  f"(stops once the 95% CI is narrow enough: {target})...\n")
+        else:
+            print(f"\nStarting {self.iterations} measurements with microsecond precision...\n")
         
         # --- High Precision Mode: Start ---
         # 1. Set High Process Priority (Windows)
@@ -1444,32 +3983,62 @@ class LatencyTester:
         # 2. Disable Garbage Collector
         gc.collect()
         gc.disable()
+
+        # 3. Shorten the GIL switch interval so reader threads can timestamp S/G while this loop spins
+        switch_interval = sys.getswitchinterval()
+        sys.setswitchinterval(GIL_SWITCH_INTERVAL)
+
+        # 4. Real-time scheduling, CPU pinning and locked memory (Linux, optional)
+        realtime = None
+        if LINUX_REALTIME and platform.system() == 'Linux':
+            realtime = LinuxRealtime().apply()
+            if realtime.granted:
+                print_info("Real-time mode: " + ", ".join(realtime.granted) + ".")
+            if realtime.unavailable:
+                print(f"{Fore.YELLOW}Real-time mode unavailable: {'; '.join(realtime.unavailable)}.{Fore.RESET}")
         
+        self._event_driven = self._uses_event_timestamps()
+        adaptive = self._adaptive_interval()
+        if self.report_timeline is not None:
+            self._probe_report_rate()
+        if adaptive:
+            print_info(f"Adaptive interval: next trigger {ADAPTIVE_MARGIN_MS:.0f} ms after contact release and input rest "
+                       f"(at least {self.pulse_duration_us / ADAPTIVE_MAX_DUTY / 1000:.0f} ms, at most {self.test_interval_us / 1000:.0f} ms).")
         try:
-            self.trigger_solenoid()
+            self._last_scheduled_us = time.perf_counter() * 1_000_000 - self.test_interval_us
+            self._fire_scheduled_trigger()
             self._last_loop_time_us = time.perf_counter() * 1_000_000
-            while len(self.latency_results) < self.iterations:
+            while len(self.latency_results) < self.iterations and not self.stopped_early:
                 current_time_us = time.perf_counter() * 1_000_000
                 loop_delta_us = current_time_us - self._last_loop_time_us
                 self._last_loop_time_us = current_time_us
+                self.trace.note_loop(loop_delta_us)
 
-                # --- Trigger: fire next solenoid when interval elapsed and cycle is idle ---
+                # --- Trigger: fire next solenoid on its deadline once the cycle is idle (sleep, then spin) ---
                 if not self._cycle_active:
-                    if current_time_us - self.last_trigger_time_us >= self.test_interval_us:
-                        self.trigger_solenoid()
+                    deadline_us = self._trigger_deadline_us()
+                    if current_time_us >= deadline_us - self._scheduler.spin_window_us:
+                        self._scheduler.wait_until(deadline_us)
+                        self._fire_scheduled_trigger()
                         current_time_us = time.perf_counter() * 1_000_000
                         self._last_loop_time_us = current_time_us
 
                 if self._cycle_active:
                     # --- S: capture Arduino contact timestamp (independently) ---
                     s_found_now = False
-                    if not self._s_received and self.serial and self.serial.in_waiting:
-                        while self.serial.in_waiting:
-                            if self.serial.read() == b'S':
-                                self.s_time_us = time.perf_counter() * 1_000_000  # S timestamp
+                    if not self._s_received and self.serial:
+                        while True:
+                            b, ts_us = self._read_serial_byte()
+                            if b is None:
+                                break
+                            if b == b'S':
+                                self.s_time_us = ts_us  # S timestamp
+                                self._note_capture_advance(self._arrival_us)  # Arrival, not the board contact time
                                 self._s_received = True
                                 s_found_now = True
                                 break
+                            if b == b'L':
+                                self._release_us = ts_us  # Release without an 'S' (contact missed by the interrupt)
 
                     # --- G: capture gamepad timestamp (independently, no waiting for S) ---
                     g_found_now = False
@@ -1484,13 +4053,14 @@ class LatencyTester:
                     if self._s_received and self._g_received:
                         latency_ms = (self.g_time_us - self.s_time_us) / 1000.0 + self.contact_delay
 
-                        is_simultaneous = s_found_now and g_found_now
+                        # Only polled timestamps can collapse into one loop pass; reader-thread timestamps cannot
+                        is_simultaneous = s_found_now and g_found_now and not self._event_driven
                         is_glitch = False
                         
                         if is_simultaneous:
                             if len(self.latency_results) >= 3:
-                                running_avg = self.latency_sum / len(self.latency_results)
-                                running_jitter = statistics.stdev(self.latency_results) if len(self.latency_results) > 1 else 0.0
+                                running_avg = self.running_stats.mean
+                                running_jitter = self.running_stats.stdev
                                 # Dynamic threshold: 3x standard deviation (jitter), minimum 0.2 ms for 8000Hz precision
                                 threshold = max(0.2, 3.0 * running_jitter)
                                 if abs(latency_ms - running_avg) > threshold:
@@ -1500,16 +4070,23 @@ class LatencyTester:
 
                         if self._skip_first_measurement:
                             self._skip_first_measurement = False
+                            self.trace.close(CycleTrace.SKIPPED, self.s_time_us, self.g_time_us)
                         elif is_glitch:
                             self.invalid_measurements += 1
+                            self.trace.close(CycleTrace.GLITCH, self.s_time_us, self.g_time_us)
                             # OS jitter / USB batching caused simultaneous timestamps that don't fit the gamepad's profile
                         elif latency_ms <= self.max_latency_us / 1000.0:
+                            self.trace.close(CycleTrace.VALID, self.s_time_us, self.g_time_us)
                             self.latency_results.append(latency_ms)
                             self.latency_sum += latency_ms
+                            self.running_stats.add(latency_ms)
+                            self.order_stats.add(latency_ms)
                             self._consecutive_timeouts = 0
                             self.log_progress(latency_ms, early_g=(self.g_time_us < self.s_time_us))
+                            self.stopped_early = self._early_stop_reached()
                         else:
                             self.invalid_measurements += 1
+                            self.trace.close(CycleTrace.TOO_LATE, self.s_time_us, self.g_time_us)
                             print(f"Invalid measurement: {latency_ms:.2f} ms (> {self.max_latency_us/1000:.2f} ms)")
 
                         self._cycle_active = False  # Close cycle
@@ -1519,12 +4096,16 @@ class LatencyTester:
                         missing = []
                         if not self._s_received: missing.append("S (Arduino)")
                         if not self._g_received: missing.append("G (gamepad)")
+                        s_us = self.s_time_us if self._s_received else 0.0
+                        g_us = self.g_time_us if self._g_received else 0.0
                         if not self._timeout_skipped:
                             self._timeout_skipped = True
+                            self.trace.close(CycleTrace.TIMEOUT_IGNORED, s_us, g_us)
                             print(f"Invalid measurement: timeout — missing {', '.join(missing)} (ignored once)")
                         else:
                             self.invalid_measurements += 1
                             self._consecutive_timeouts += 1
+                            self.trace.close(CycleTrace.TIMEOUT, s_us, g_us)
                             print(f"Invalid measurement: timeout — missing {', '.join(missing)}")
                         self._cycle_active = False
 
@@ -1541,25 +4122,47 @@ class LatencyTester:
                             self.limit_iterations_for_fallback_pulse()
 
                 # Pygame event pump - use clear to prevent queue overflow
-                pygame.event.clear()
+                clear_pygame_events()
 
                 # UI rendering (only during idle phase to avoid timing interference)
-                is_active_phase = self._cycle_active or (current_time_us - self.last_trigger_time_us < self.max_latency_us)
+                # With the adaptive interval the idle phase starts as soon as the cycle is complete
+                is_active_phase = self._cycle_active or (not adaptive and current_time_us - self.last_trigger_time_us < self.max_latency_us)
                 if not is_active_phase:
-                    time.sleep(0.001)
+                    if adaptive:
+                        self._service_release()
+                    deadline_us = self._trigger_deadline_us()
                     try:
                         now = time.perf_counter()
-                        if now - self._last_render_time >= 1.0 / 30.0:
-                            average_latency = self.latency_sum / len(self.latency_results) if self.latency_results else None
+                        if now - self._last_render_time >= 1.0 / 30.0 and self._scheduler.has_idle_budget(deadline_us):
+                            average_latency = self.running_stats.mean if self.running_stats.count else None
                             self.render_test_window(average_latency)
                             self._last_render_time = now
+                            self.trace.add_render((time.perf_counter() - now) * 1_000_000)
                     except Exception:
                         pass
+                    if self.trace.pending and self._scheduler.has_idle_budget(deadline_us):
+                        self.trace.flush()  # Records of earlier cycles, after this cycle's close()
+                    self._service_clock_sync(deadline_us)
+                    self._scheduler.coarse_sleep(deadline_us)  # Never sleeps into the spin window
+                elif self._event_driven:
+                    # S and G are timestamped by reader threads: block until new data instead of spinning
+                    self._wake.wait(0.001)
+                    self._wake.clear()
                         
         finally:
             # --- High Precision Mode: End ---
             # 1. Enable Garbage Collector
             gc.enable()
+
+            # 3. Restore the GIL switch interval
+            sys.setswitchinterval(switch_interval)
+
+            # 4. Leave real-time mode
+            if realtime is not None:
+                realtime.restore()
+
+            # The last cycle is complete once the loop exits
+            self.trace.flush(final=True)
             
             # 2. Restore Normal Process Priority (Windows)
             if platform.system() == 'Windows':
@@ -1570,20 +4173,22 @@ class LatencyTester:
                     pass
                     
         # Final render with results
-        average_latency = self.latency_sum / len(self.latency_results) if self.latency_results else None
+        average_latency = self.running_stats.mean if self.running_stats.count else None
         self.render_test_window(average_latency)
         
         # Set background render call for the console input loops
         LAST_RENDER_CALL = lambda: self.render_test_window(average_latency)
 
-        # Start cooling period immediately after measurements finish (even if aborted)
-        total_hits = len(self.latency_results) + self.invalid_measurements
-        if total_hits > 0:
-            # Use requested iterations if successful, or actual hits if aborted
-            save_test_completion_time(self.iterations if not self.test_aborted else total_hits, self.test_type)
+        if self.stopped_early:
+            mean_ci, p99_ci = self.confidence_intervals()
+            print_info(f"Stopped early after {len(self.latency_results)} of {self.iterations} measurements: "
+                       f"average ±{mean_ci:.3f} ms" + (f", p99 {p99_ci[0]:.2f}-{p99_ci[1]:.2f} ms" if p99_ci else "") + " (95% CI).")
+
+        # Charge the solenoid heat immediately after measurements finish (even if aborted)
+        self.record_heat()
         
         if not self.test_aborted:
-            pass
+            self.store_result()
 
         self.close_test_window()
 
@@ -1631,7 +4236,8 @@ def detect_gamepad_mode(joystick):
     """Detect gamepad mode (XInput, DInput, Sony, Switch) based on name and axes at rest"""
     time.sleep(0.1)  # Wait for initialization
     for _ in range(10):  # Warmup
-        pygame.event.pump()
+        if pygame.display.get_init():
+            pygame.event.pump()
         [joystick.get_axis(i) for i in range(joystick.get_numaxes())]
         time.sleep(0.01)
     
@@ -1648,6 +4254,122 @@ def generate_short_id(length=12):
     """Generates a random short ID"""
     return ''.join(random.choice(string.ascii_letters + string.digits) for _ in range(length))
 
+def gamepad_options():
+    """Available gamepads as (kind, label, device) tuples: direct Steam HID, Linux evdev nodes, then Pygame joysticks"""
+    options = []
+    direct_steam_devices = SteamControllerDirect.available_devices()
+    if direct_steam_devices:
+        is_dongle = direct_steam_devices[0].get("product_id") == SteamControllerDirect.SC2026_DONGLE_PID
+        steam_name = "Steam Controller 2026 (Direct HID Puck)" if is_dongle else "Steam Controller 2026 (Direct HID USB)"
+        options.append(("steam", steam_name, None))
+
+    evdev_gamepads = EvdevDevice.available_devices("gamepad") if LINUX_EVDEV_INPUT and platform.system() == 'Linux' else []
+    for dev in evdev_gamepads:
+        options.append(("evdev", f"{dev['name']} (evdev {dev['path']})", dev["path"]))
+
+    # On Linux the evdev nodes already cover the Pygame joysticks; headless runs with a direct backend skip Pygame entirely
+    if not evdev_gamepads and not (HEADLESS and direct_steam_devices):
+        if HEADLESS:
+            init_pygame_input()
+        for i in range(pygame.joystick.get_count()):
+            pj = pygame.joystick.Joystick(i)
+            options.append(("pygame", pj.get_name(), pj))
+    return options
+
+def open_gamepad_option(option):
+    """Opens a gamepad returned by gamepad_options(); None when the device cannot be opened"""
+    opt_type, name, dev = option
+    if opt_type == "steam":
+        try:
+            return SteamControllerDirect.open_first()
+        except (RuntimeError, OSError) as e:
+            print_error(f"Failed to open Steam Controller direct HID: {e}")
+    elif opt_type == "evdev":
+        try:
+            return EvdevDevice.open_device(dev)
+        except (RuntimeError, OSError) as e:
+            print_error(f"Failed to open evdev device {dev}: {e}")
+    else:
+        return dev
+    return None
+
+def prometheus_ports():
+    """Serial ports that can be a Prometheus 82 (Bluetooth serial ports are filtered out)"""
+    return [p for p in list_ports.comports() if "bluetooth" not in p.description.lower()]
+
+def read_board_banner(ser, timeout=5.0):
+    """Waits for the board's 'R' ready signal and 'V<version>' banner; returns (ready, firmware version or None)"""
+    start_time = time.time()
+    ready = False
+    fw_version = None
+    while time.time() - start_time < timeout:
+        if ser.in_waiting:
+            b = ser.read()
+            if b == b'R':
+                ready = True
+            elif b == b'V':
+                buf = b""
+                t0 = time.time()
+                while time.time() - t0 < 1.0:
+                    if ser.in_waiting:
+                        c = ser.read()
+                        if c in (b'\n', b'\r'):
+                            break
+                        buf += c
+                    else:
+                        time.sleep(0.001)
+                try:
+                    fw_version = buf.decode("ascii").strip()
+                except Exception:
+                    fw_version = None
+                break
+        else:
+            time.sleep(0.001)
+    return ready, fw_version
+
+def version_tuple(s):
+    try:
+        return tuple(int(x) for x in s.split("."))
+    except Exception:
+        return (0,)
+
+def setup_board_timing(ser, fw_version):
+    """Enables board timestamps when the firmware supports them and calibrates the contact delay.
+    Returns (clock_sync or None, contact delay in ms)."""
+    # Firmware v1.2.0+ can timestamp 'S' with its own clock; older firmware keeps the arrival-time protocol
+    clock_sync = None
+    if BOARD_TIMESTAMPS and version_tuple(fw_version) >= version_tuple(TIMESTAMP_ARDUINO_VERSION):
+        if enable_board_timestamps(ser):
+            clock_sync = BoardClockSync()
+        else:
+            print_error("Firmware did not acknowledge timestamp mode. Using arrival-time measurements.")
+
+    # Test Arduino latency and update the contact delay
+    contact_delay = CONTACT_DELAY
+    avg_latency = test_arduino_latency(ser, clock_sync)
+    if avg_latency is None:
+        print_error(f"Calibrating Arduino latency failed. Using default CONTACT_DELAY ({CONTACT_DELAY} ms).")
+    else:
+        contact_delay = avg_latency
+        print(f"\nSet CONTACT_DELAY to {contact_delay:.3f} ms")
+    if clock_sync is not None and clock_sync.ready:
+        # 'S' is reconstructed at the moment of contact, so no transfer delay has to be added back
+        contact_delay = 0.0
+        print("S events carry board timestamps: contact delay correction is not needed (0.000 ms)")
+    return clock_sync, contact_delay
+
+def setup_release_events(ser, fw_version):
+    """Enables the contact release events used by the adaptive interval; False when it is off or unsupported"""
+    if not ADAPTIVE_INTERVAL:
+        return False
+    if version_tuple(fw_version) < version_tuple(RELEASE_ARDUINO_VERSION):
+        print_error(f"Adaptive interval needs Arduino firmware v{RELEASE_ARDUINO_VERSION} or newer. Using the fixed interval.")
+        return False
+    if not enable_release_events(ser):
+        print_error("Firmware did not acknowledge release events. Using the fixed interval.")
+        return False
+    return True
+
 def restart_current_program():
     try:
         stop_async_logger()
@@ -1666,45 +4388,779 @@ def restart_current_program():
         pass
     os.execv(sys.executable, [sys.executable] + sys.argv)
 
+# Exit codes of unattended runs
+EXIT_OK = 0                         # Every session completed with results
+EXIT_FAILED = 1                     # A session was aborted, had no valid results or failed the hardware check
+EXIT_USAGE = 2                      # Invalid arguments or configuration file (same code as argparse)
+EXIT_NO_DEVICE = 3                  # Gamepad, keyboard or Prometheus 82 port not found
+EXIT_BOARD = 4                      # Board did not answer or its firmware is outdated
+EXIT_INTERRUPTED = 130              # Stopped with Ctrl+C
+
+def build_cli_parser():
+    parser = argparse.ArgumentParser(
+        description="Prometheus 82 latency tester. Without --test the interactive console menu is used.")
+    parser.add_argument("--headless", action="store_true", help="No test window; progress goes to the console (implied by --test)")
+    parser.add_argument("--realtime", action="store_true", help="Linux: SCHED_FIFO, CPU pinning and locked memory while measuring")
+    parser.add_argument("--adaptive", action="store_true",
+                        help="Fire the next trigger once the contact is released and the input is at rest (firmware v1.3.0+)")
+    parser.add_argument("--config", help="JSON file with defaults for the options below, e.g. {\"test\": \"button\", \"sessions\": 5}")
+    parser.add_argument("--list", action="store_true", help="List gamepads and serial ports, then exit")
+    parser.add_argument("--test", choices=(TEST_TYPE_STICK, TEST_TYPE_BUTTON, TEST_TYPE_KEYBOARD, TEST_TYPE_HARDWARE),
+                        help="Run unattended sessions of this test type without prompts")
+    parser.add_argument("--device", help="Gamepad number from --list or part of its name (default: the only gamepad)")
+    parser.add_argument("--port", help="Serial port of the Prometheus 82 (default: the only suitable port)")
+    parser.add_argument("--rig", action="append", metavar="PORT[=DEVICE]",
+                        help="Multi-rig mode: one measurement process per Prometheus 82 port and gamepad (repeat for each rig)")
+    parser.add_argument("--iterations", type=int, default=TEST_ITERATIONS, help="Measurements per session (10-400)")
+    parser.add_argument("--sessions", type=int, default=1, help="Sessions to run back to back")
+    parser.add_argument("--stop-ci", type=float, nargs="?", const=EARLY_STOP_CI_MS, metavar="MS",
+                        help=f"Sequential mode: --iterations is the maximum; stop once the 95%% CI of the average is within ±MS "
+                             f"(default {EARLY_STOP_CI_MS})")
+    parser.add_argument("--stop-p99-ci", type=float, metavar="MS", help="With --stop-ci: also require the p99 CI within ±MS")
+    parser.add_argument("--stop-min", type=int, default=EARLY_STOP_MIN_SAMPLES, help="With --stop-ci: valid samples before stopping is allowed")
+    parser.add_argument("--key", type=int, help="evdev key code for keyboard tests (default: the next key press)")
+    parser.add_argument("--export", nargs="*", choices=("json", "csv", "trace"), default=["json"],
+                        help="Result files written after each session (the binary session file is written to SESSION_DIR)")
+    parser.add_argument("--output-dir", default=".", help="Directory for exported results")
+    parser.add_argument("--delay-encoding", choices=("text", "compact"), default=DELAY_LIST_ENCODING,
+                        help=f"Delay lists in exports and uploads: comma-separated text or compact {DELAY_LIST_TAG} base64 (0.1 µs)")
+    parser.add_argument("--cooling", choices=("wait", "ignore", "fail"), default="wait",
+                        help="What to do when the solenoid has not cooled down before a session")
+    parser.add_argument("--upload-name", metavar="NAME",
+                        help="Upload each stick/button result with 200+ valid samples to Gamepadla under this gamepad name")
+    parser.add_argument("--connection", choices=("cable", "dongle", "bluetooth"),
+                        help="Gamepad connection, stored with every result (needed by --upload-name; a filter with --query)")
+    parser.add_argument("--upload-pending", action="store_true",
+                        help=f"Upload the results waiting in {UPLOAD_SPOOL_DIR}/ (e.g. after a network outage), then exit")
+    parser.add_argument("--upload-url", help="Result endpoint for uploads (default: Gamepadla)")
+    parser.add_argument("--store", default=RESULT_STORE_FILE, help="SQLite result store every completed session is saved to")
+    parser.add_argument("--query", action="store_true",
+                        help="Print stored sessions matching --device (name part), --protocol, --connection, --test and --since, then exit")
+    parser.add_argument("--group-by", nargs="*", choices=ResultStore.GROUP_COLUMNS,
+                        help="With --query: print sample-weighted averages per group instead of single sessions")
+    parser.add_argument("--protocol", help="With --query: detected protocol, e.g. XInput, Sony, Switch, Steam")
+    parser.add_argument("--since", help="With --query: only sessions from this date on (YYYY-MM-DD)")
+    parser.add_argument("--limit", type=int, default=50, help="With --query: sessions listed at most")
+    parser.add_argument("--compare", nargs=2, type=int, metavar=("ID_A", "ID_B"),
+                        help="Compare two stored sessions (ids from --query) with bootstrap confidence intervals, then exit (NumPy)")
+    return parser
+
+def config_defaults(parser, config):
+    """Checks config file values like the command line would (type, choices, lists for multi-value options)
+    and returns them converted; set_defaults() alone would accept anything"""
+    actions = {action.dest: action for action in parser._actions}
+    defaults = {}
+    for key, value in config.items():
+        action = actions[key]
+        option = action.option_strings[0] if action.option_strings else key
+
+        def convert(item):
+            if action.type is not None and item is not None and not isinstance(item, bool):
+                try:
+                    item = action.type(str(item))
+                except (TypeError, ValueError):
+                    parser.error(f"Config option {key}: invalid value {item!r} for {option}")
+            elif action.type is None and isinstance(item, (int, float)) and not isinstance(item, bool):
+                item = str(item)     # e.g. "device": 2, as typed on the command line
+            elif action.type is None and not isinstance(item, str):
+                parser.error(f"Config option {key}: {option} expects text, not {item!r}")
+            if action.choices is not None and item not in action.choices:
+                parser.error(f"Config option {key}: invalid choice {item!r} (choose from {', '.join(map(str, action.choices))})")
+            return item
+
+        if action.nargs == 0:  # store_true flags
+            if not isinstance(value, bool):
+                parser.error(f"Config option {key}: {option} expects true or false, not {value!r}")
+            defaults[key] = value
+        elif value is None:
+            defaults[key] = None
+        elif action.nargs in ("*", "+") or isinstance(action.nargs, int) or isinstance(action, argparse._AppendAction):
+            if not isinstance(value, list):
+                parser.error(f"Config option {key}: {option} expects a list, not {value!r}")
+            if isinstance(action.nargs, int) and len(value) != action.nargs:
+                parser.error(f"Config option {key}: {option} expects {action.nargs} values")
+            defaults[key] = [convert(item) for item in value]
+        else:
+            defaults[key] = convert(value)
+    return defaults
+
+def parse_cli_args(argv=None):
+    """Command-line options, with defaults taken from --config (JSON keys are the option names with underscores)"""
+    parser = build_cli_parser()
+    args = parser.parse_args(argv)
+    if args.config:
+        try:
+            with open(args.config) as f:
+                config = json.load(f)
+        except (OSError, ValueError) as e:
+            parser.error(f"Reading config file {args.config}: {e}")
+        if not isinstance(config, dict):
+            parser.error(f"Config file {args.config} must contain a JSON object")
+        known = {action.dest for action in parser._actions} - {"help", "config"}
+        unknown = sorted(set(config) - known)
+        if unknown:
+            parser.error(f"Unknown config option(s): {', '.join(unknown)}")
+        parser.set_defaults(**config_defaults(parser, config))
+        args = parser.parse_args(argv)  # Command-line options override the config file
+    if args.test and args.test != TEST_TYPE_HARDWARE and not 10 <= args.iterations <= 400:
+        parser.error("--iterations must be between 10 and 400")
+    if args.sessions < 1:
+        parser.error("--sessions must be at least 1")
+    if args.stop_ci is not None and args.stop_ci <= 0:
+        parser.error("--stop-ci must be positive")
+    if args.stop_p99_ci is not None and args.stop_ci is None:
+        parser.error("--stop-p99-ci needs --stop-ci")
+    if args.rig and not args.test:
+        parser.error("--rig needs --test")
+    if args.upload_name and args.test not in (TEST_TYPE_STICK, TEST_TYPE_BUTTON):
+        parser.error("--upload-name needs --test stick or --test button")
+    if args.upload_name and not args.connection:
+        parser.error("--upload-name needs --connection")
+    if args.since:
+        try:
+            args.since = time.mktime(time.strptime(args.since, "%Y-%m-%d"))
+        except ValueError:
+            parser.error("--since must be a date like 2025-01-31")
+    return args
+
+def wait_for_cooling(test_type, policy):
+    """Applies the --cooling policy before an unattended session; False when the session must not run"""
+    remaining = get_cooling_remaining_seconds(test_type)
+    if remaining < 40:  # Same threshold as the interactive warning
+        return True
+    if policy == "ignore":
+        print(f"\n{Fore.YELLOW}WARNING: Device has not cooled yet ({remaining} s remaining); continuing because cooling is ignored.{Fore.RESET}")
+        return True
+    if policy == "fail":
+        print_error(f"Device has not cooled yet ({remaining} s remaining).")
+        return False
+    print_info(f"Waiting {remaining} s for the solenoid to cool down...")
+    while get_cooling_remaining_seconds(test_type) >= 40:
+        time.sleep(1.0)
+    return True
+
+def export_to_json(stats, metadata, raw_results, directory="."):
+    filename = new_result_file(directory, "latency_test", ".json")
+    if DELAY_LIST_ENCODING == "compact":
+        stats = dict(stats, filtered_results=encode_delay_list(stats['filtered_results']))
+        raw_results = encode_delay_list(raw_results)
+    with open(filename, 'w') as f:
+        json.dump(dict(metadata, stats=stats, raw_results=raw_results), f, indent=2)
+    print(f"Data saved to file {filename}")
+    return filename
+
+class UploadQueue:
+    """Gamepadla uploads through a durable on-disk spool.
+    Every result is written to UPLOAD_SPOOL_DIR before it is sent and removed only once the server accepted it,
+    so results survive network outages and restarts. Requests share one pooled requests.Session with explicit
+    timeouts; transient failures are retried with exponential backoff, rejected results move to 'rejected/'."""
+
+    SENT, RETRY, REJECTED = "sent", "retry", "rejected"
+
+    def __init__(self, url=None, spool_dir=None, timeout=UPLOAD_TIMEOUT, attempts=UPLOAD_ATTEMPTS,
+                 backoff_s=UPLOAD_BACKOFF_S, backoff_max_s=UPLOAD_BACKOFF_MAX_S):
+        self.url = url or UPLOAD_URL
+        self.spool_dir = spool_dir or UPLOAD_SPOOL_DIR
+        self.timeout = timeout
+        self.attempts = attempts
+        self.backoff_s = backoff_s
+        self.backoff_max_s = backoff_max_s
+        self.on_sent = None          # Called with the upload data of every accepted result (background flushes)
+        self._session = None
+        self._lock = threading.Lock()  # One request at a time; keeps the menu and the background flush apart
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def session(self):
+        if self._session is None:
+            self._session = requests.Session()
+            adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=2)
+            self._session.mount("https://", adapter)
+            self._session.mount("http://", adapter)
+        return self._session
+
+    def close(self):
+        self.stop()
+        if self._session is not None:
+            self._session.close()
+            self._session = None
+
+    def _write(self, path, entry):
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(entry, f)
+        os.replace(tmp_path, path)
+
+    def enqueue(self, data):
+        """Spools one result; returns its spool file"""
+        os.makedirs(self.spool_dir, exist_ok=True)
+        path = os.path.join(self.spool_dir, f"{time.time_ns()}_{data.get('test_key', 'result')}.json")
+        self._write(path, {'url': self.url, 'data': data, 'created': time.time(), 'attempts': 0, 'last_error': None})
+        return path
+
+    def pending(self):
+        """Spooled results in the order they were queued"""
+        return sorted(glob.glob(os.path.join(self.spool_dir, "*.json")))
+
+    def _post(self, entry):
+        """One upload attempt: (SENT | RETRY | REJECTED, detail)"""
+        try:
+            response = self.session.post(entry['url'], data=entry['data'], timeout=self.timeout)
+        except requests.exceptions.RequestException as e:
+            return self.RETRY, type(e).__name__
+        if response.status_code == 200:
+            return self.SENT, None
+        detail = f"HTTP {response.status_code}"
+        if response.status_code in (408, 429) or response.status_code >= 500:
+            return self.RETRY, detail
+        return self.REJECTED, detail
+
+    def upload(self, path, attempts=None):
+        """Sends one spooled result, retrying transient failures with exponential backoff.
+        Returns (SENT | RETRY | REJECTED, detail); RETRY leaves the result in the spool."""
+        attempts = self.attempts if attempts is None else attempts
+        result, detail = self.RETRY, None
+        for attempt in range(attempts):
+            if attempt and self._stop.wait(min(self.backoff_max_s, self.backoff_s * 2 ** (attempt - 1))):
+                break
+            with self._lock:
+                try:
+                    with open(path) as f:
+                        entry = json.load(f)
+                except FileNotFoundError:
+                    return self.SENT, None  # Sent by the other flush meanwhile
+                except ValueError as e:
+                    result, detail = self.REJECTED, f"unreadable spool file: {e}"
+                    entry = None
+                else:
+                    entry.setdefault('url', self.url)
+                    result, detail = self._post(entry)
+                if result == self.SENT:
+                    os.remove(path)
+                elif result == self.REJECTED:
+                    rejected_dir = os.path.join(self.spool_dir, "rejected")
+                    os.makedirs(rejected_dir, exist_ok=True)
+                    os.replace(path, os.path.join(rejected_dir, os.path.basename(path)))
+                else:
+                    entry['attempts'] += 1
+                    entry['last_error'] = detail
+                    self._write(path, entry)
+            if result != self.RETRY:
+                break
+        return result, detail
+
+    def flush(self, attempts=None, on_result=None):
+        """Batch upload of every spooled result; returns the number of results per outcome.
+        on_result, when given, receives (path, outcome, detail) for each result."""
+        counts = {self.SENT: 0, self.RETRY: 0, self.REJECTED: 0}
+        for path in self.pending():
+            if self._stop.is_set():
+                break
+            try:
+                with open(path) as f:
+                    data = json.load(f).get('data', {})
+            except (OSError, ValueError):
+                data = {}
+            result, detail = self.upload(path, attempts)
+            counts[result] += 1
+            if on_result is not None:
+                on_result(path, result, detail)
+            if result == self.SENT and self.on_sent is not None and data:
+                self.on_sent(data)
+        return counts
+
+    def start(self, interval_s=UPLOAD_FLUSH_INTERVAL_S):
+        """Flushes the spool in a background thread: one attempt per result and pass, passes back off while failing"""
+        if self._thread is not None:
+            return
+        self._stop.clear()
+
+        def run():
+            failures = 0
+            while not self._stop.is_set():
+                counts = self.flush(attempts=1)
+                failures = failures + 1 if counts[self.RETRY] else 0
+                if not self.pending() and not failures:
+                    break  # Spool is empty; enqueue + start() again for new results
+                delay = min(self.backoff_max_s, self.backoff_s * 2 ** failures) if failures else interval_s
+                self._stop.wait(delay)
+            self._thread = None
+
+        self._thread = threading.Thread(target=run, name="p82-upload", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout=sum(self.timeout))  # At most one request is in flight
+        self._thread = None
+
+def gamepadla_upload_data(stats, latency_results, test_type, name, connection, driver, detected_mode):
+    """Form fields of one Gamepadla result under a new test key"""
+    return {
+        'test_key': generate_short_id(), 'version': VERSION, 'url': 'https://gamepadla.com',
+        'date': time.strftime('%Y-%m-%d %H:%M:%S', time.localtime()),
+        'driver': driver, 'connection': connection,
+        'mode': server_protocol_name(detected_mode),
+        'name': name, 'os_name': platform.system(), 'os_version': platform.uname().version,
+        'min_latency': round(stats['min'], 2), 'max_latency': round(stats['max'], 2),
+        'avg_latency': round(stats['avg'], 2), 'jitter': stats['jitter'],
+        'mathod': 'PNCS' if test_type == TEST_TYPE_STICK else 'PNCB', # mathod name is not a mistake!
+        'delay_list': format_delay_list(latency_results),
+        'stick_threshold': STICK_THRESHOLD if test_type == TEST_TYPE_STICK else None,
+        'contact_delay': stats['contact_delay'], 'pulse_duration': stats['pulse_duration']
+    }
+
+def run_upload_batch(args):
+    """--upload-pending: sends every spooled result; EXIT_OK once the spool is empty"""
+    uploads = UploadQueue(args.upload_url)
+    pending = uploads.pending()
+    if not pending:
+        print_info("No spooled results to upload.")
+        return EXIT_OK
+    print(f"Uploading {len(pending)} spooled result(s) to {uploads.url}")
+
+    def report(path, result, detail):
+        print(f"  {os.path.basename(path)}: {result}{f' ({detail})' if detail else ''}")
+
+    try:
+        counts = uploads.flush(on_result=report)
+    finally:
+        uploads.close()
+    print(f"{counts[UploadQueue.SENT]} sent, {counts[UploadQueue.RETRY]} still spooled, {counts[UploadQueue.REJECTED]} rejected")
+    return EXIT_OK if not counts[UploadQueue.RETRY] and not counts[UploadQueue.REJECTED] else EXIT_FAILED
+
+def run_query(args):
+    """--query: prints matching sessions (or per-group averages with --group-by) from the result store"""
+    if not os.path.exists(args.store):
+        print_error(f"No result store at {args.store}.")
+        return EXIT_USAGE
+    filters = {'device': args.device, 'protocol': args.protocol, 'test_type': args.test, 'since': args.since,
+               'connection': args.connection.capitalize() if args.connection else None}
+    with contextlib.closing(ResultStore(args.store)) as store:
+        if args.group_by is not None:
+            rows = store.aggregate(args.group_by, **filters)
+            labels = list(args.group_by)
+        else:
+            rows = store.sessions(args.limit, **filters)
+            for row in rows:
+                row['date'] = time.strftime('%Y-%m-%d %H:%M', time.localtime(row['created']))
+            labels = ["id", "date", "device_name", "protocol", "connection", "test_type"]
+    if not rows:
+        print_info("No stored sessions match.")
+        return EXIT_OK
+    columns = labels + (["sessions", "samples", "avg", "jitter", "best_avg", "worst_avg", "p99"] if args.group_by is not None
+                        else ["valid_samples", "avg", "jitter", "p99"])
+    widths = [max(len(column), *(len(f"{row[column]:.2f}" if isinstance(row[column], float) else str(row[column])) for row in rows))
+              for column in columns]
+    print("  ".join(column.ljust(width) for column, width in zip(columns, widths)))
+    for row in rows:
+        print("  ".join((f"{row[column]:.2f}" if isinstance(row[column], float) else str(row[column])).ljust(width)
+                        for column, width in zip(columns, widths)))
+    return EXIT_OK
+
+def run_compare(args):
+    """--compare: summaries of two stored sessions and the bootstrap interval of their differences"""
+    if np is None:
+        print_error("--compare needs NumPy (pip install numpy).")
+        return EXIT_USAGE
+    if not os.path.exists(args.store):
+        print_error(f"No result store at {args.store}.")
+        return EXIT_USAGE
+    with contextlib.closing(ResultStore(args.store)) as store:
+        a, b = (store.samples(session_id) for session_id in args.compare)
+    if not a or not b:
+        print_error(f"Session {args.compare[0] if not a else args.compare[1]} has no stored samples.")
+        return EXIT_USAGE
+    summary_a, summary_b = summarize_latencies(a), summarize_latencies(b)
+    print(f"{'':<10}{'#' + str(args.compare[0]):>12}{'#' + str(args.compare[1]):>12}{'B - A':>10}   95% CI of B - A")
+    for stat in ("avg", "jitter", "p50", "p99"):
+        result = compare_latencies(a, b, stat, seed=82)
+        flag = " *" if result['significant'] else ""
+        print(f"{stat:<10}{summary_a[stat]:>12.3f}{summary_b[stat]:>12.3f}{result['difference']:>+10.3f}   "
+              f"[{result['ci_low']:+.3f}, {result['ci_high']:+.3f}]{flag}")
+    print(f"Samples: {len(a)} / {len(b)}, Kolmogorov-Smirnov distance {result['ks_distance']:.3f} (* = interval excludes 0)")
+    return EXIT_OK
+
+def run_unattended(args, on_event=None):
+    """Runs args.sessions back-to-back sessions without any prompt; returns the process exit code.
+    on_event, when given, receives the progress records and one 'result' record per session."""
+    if args.list:
+        options = gamepad_options()
+        print("Gamepads:")
+        for i, (_, label, _) in enumerate(options):
+            print(f"{i + 1}: {label}")
+        print("Serial ports:")
+        for p in prometheus_ports():
+            print(f"{p.device} - {p.description}")
+        return EXIT_OK
+
+    joystick = None
+    keyboard = None
+    detected_mode = None
+    uploads = UploadQueue(args.upload_url) if args.upload_name else None
+    try:
+        if args.test in (TEST_TYPE_STICK, TEST_TYPE_BUTTON):
+            options = gamepad_options()
+            if args.device:
+                options = [opt for i, opt in enumerate(options) if args.device == str(i + 1) or args.device.lower() in opt[1].lower()]
+            if len(options) != 1:
+                print_error(f"{'No gamepad' if not options else 'More than one gamepad'} matches; use --device (see --list).")
+                return EXIT_NO_DEVICE
+            joystick = open_gamepad_option(options[0])
+            if not joystick:
+                return EXIT_NO_DEVICE
+            joystick.init()
+            detected_mode = detect_gamepad_mode(joystick)
+            print(f"Gamepad: {joystick.get_name()} ({detected_mode})")
+
+        port = args.port
+        if port is None:
+            ports = prometheus_ports()
+            if len(ports) != 1:
+                print_error(f"{'No suitable serial port' if not ports else 'More than one serial port'} found; use --port (see --list).")
+                return EXIT_NO_DEVICE
+            port = ports[0].device
+
+        try:
+            ser = serial.Serial(port, 115200, timeout=1)
+        except serial.SerialException as e:
+            print_error(f"Opening port failed: {e}")
+            return EXIT_NO_DEVICE
+        with ser:
+            ser.reset_input_buffer()
+            ser.reset_output_buffer()
+            ready, fw_version = read_board_banner(ser)
+            if not ready or not fw_version:
+                print_error("Prometheus did not send its ready signal and firmware version. Check the connection and firmware.")
+                return EXIT_BOARD
+            if version_tuple(fw_version) < version_tuple(REQUIRED_ARDUINO_VERSION):
+                print_error(f"Arduino firmware v{fw_version} is outdated. Please update to at least v{REQUIRED_ARDUINO_VERSION}.")
+                return EXIT_BOARD
+            print(f"\nPrometheus 82 connected on {port}, Arduino FW v{fw_version}")
+            clock_sync, contact_delay = setup_board_timing(ser, fw_version)
+            release_events = setup_release_events(ser, fw_version)
+
+            if args.test == TEST_TYPE_KEYBOARD:
+                keyboard = EvdevKeyboard.open_all() if LINUX_EVDEV_INPUT and platform.system() == 'Linux' else None
+                if not keyboard:
+                    print_error("Unattended keyboard tests need readable evdev keyboards (Linux /dev/input).")
+                    return EXIT_NO_DEVICE
+
+            if "csv" in args.export or "trace" in args.export or "json" in args.export:
+                os.makedirs(args.output_dir, exist_ok=True)
+            device_name = joystick.get_name() if joystick else ("Keyboard" if keyboard else "N/A")
+            for session in range(1, args.sessions + 1):
+                print(f"\n{Style.BRIGHT}Session {session}/{args.sessions}{Style.RESET_ALL}")
+                if args.test != TEST_TYPE_HARDWARE and not wait_for_cooling(args.test, args.cooling):
+                    return EXIT_FAILED
+                tester = LatencyTester(joystick, ser, args.test, contact_delay, args.iterations, detected_mode, keyboard, clock_sync,
+                                       headless=True, release_events=release_events)
+                if args.connection:
+                    tester.connection = args.connection.capitalize()
+                if args.key is not None:
+                    tester.key_to_test = args.key
+                    tester._key_label = f"key code {args.key}"
+                if on_event is not None:
+                    tester.progress_sink = lambda record, session=session: on_event(dict(record, session=session))
+                try:
+                    if args.test == TEST_TYPE_HARDWARE:
+                        test_passed, timing_warning = tester.test_hardware()
+                        if not test_passed:
+                            print_error("Hardware issues detected.")
+                            return EXIT_FAILED
+                        continue
+                    try:
+                        tester.trace.sink = open_session_writer(
+                            args.test, device_name, joystick.get_guid() if joystick else None, server_protocol_name(detected_mode),
+                            contact_delay, tester.pulse_duration_us / 1000.0, args.iterations, 'board' if clock_sync is not None else 'host')
+                    except OSError as e:
+                        print_error(f"Session file disabled: {e}")
+                    tester.test_loop()
+                    stats = tester.get_statistics()
+                    if tester.test_aborted or not stats:
+                        print_error(f"Session {session} {'was aborted' if tester.test_aborted else 'produced no valid measurements'}.")
+                        return EXIT_FAILED
+                    print(f"Average {stats['avg']:.2f} ms, jitter {stats['jitter']:.2f} ms, "
+                          f"{stats['valid_samples']} valid / {stats['invalid_samples']} invalid"
+                          + (" (stopped early)" if stats['stopped_early'] else ""))
+                    if stats['report_interval'] is not None:
+                        print(f"Report interval {stats['report_interval']:.3f} ms ({stats['report_rate_hz']:.0f} Hz, {stats['report_source']})")
+                    if report_rate_warning(stats):
+                        print_error(report_rate_warning(stats))
+                    if on_event is not None:
+                        on_event({'event': 'result', 'session': session, 'avg': stats['avg'], 'jitter': stats['jitter'],
+                                  'p99': stats['p99'], 'valid': stats['valid_samples'], 'invalid': stats['invalid_samples'],
+                                  'stopped_early': stats['stopped_early'], 'report_interval': stats['report_interval']})
+                    filename = None
+                    if "csv" in args.export or "trace" in args.export:
+                        filename = export_to_csv(stats, device_name, tester.latency_results, args.output_dir)
+                    if "trace" in args.export:
+                        trace_file = tester.trace.export_csv(filename.replace(".csv", "_trace.csv"), stats['contact_delay'])
+                        print(f"Per-cycle trace saved to file {trace_file}")
+                    if "json" in args.export:
+                        metadata = {
+                            'version': VERSION, 'date': time.strftime('%Y-%m-%d %H:%M:%S', time.localtime()),
+                            'session': session, 'test_type': args.test, 'device': device_name,
+                            'guid': joystick.get_guid() if joystick else None, 'protocol': server_protocol_name(detected_mode),
+                            'port': port, 'firmware': fw_version, 'iterations': args.iterations,
+                            'session_file': tester.trace.sink.filename if tester.trace.sink is not None else None,
+                        }
+                        export_to_json(stats, metadata, tester.latency_results, args.output_dir)
+                    if uploads is not None:
+                        if stats['valid_samples'] < 200:
+                            print_error(f"Not uploaded: Gamepadla needs at least 200 valid measurements ({stats['valid_samples']}).")
+                        else:
+                            data = gamepadla_upload_data(stats, tester.latency_results, args.test, args.upload_name,
+                                                         tester.connection, device_name, detected_mode)
+                            result, detail = uploads.upload(uploads.enqueue(data))
+                            if result == UploadQueue.SENT:
+                                print(f"Uploaded: {UPLOAD_RESULT_URL.format(data['test_key'])}")
+                            elif result == UploadQueue.RETRY:
+                                print_error(f"Upload failed ({detail}); the result stays spooled for --upload-pending.")
+                            else:
+                                print_error(f"Server rejected the result ({detail}).")
+                finally:
+                    tester.stop_serial_capture()
+                    if tester.trace.sink is not None:
+                        tester.trace.sink.close()
+            return EXIT_OK
+    except KeyboardInterrupt:
+        print("\nTest interrupted by user.")
+        return EXIT_INTERRUPTED
+    finally:
+        if uploads is not None:
+            uploads.close()
+        if isinstance(joystick, DIRECT_INPUT_BACKENDS):
+            joystick.close()
+        if keyboard:
+            keyboard.close()
+
+def available_cpus():
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+def rig_cpus(count):
+    """A list of up to MULTI_RIG_CPUS_PER_RIG CPUs for each rig worker, so its reader and logger threads do not
+    share a core with the measuring thread (which --realtime pins to one of them). The first allowed CPU is left
+    to the coordinator when there are enough of them; with fewer CPUs than rigs, rigs share single CPUs."""
+    cpus = available_cpus()
+    if MULTI_RIG_CPUS:
+        cpus = [cpu for cpu in MULTI_RIG_CPUS if cpu in cpus] or cpus
+    workers = cpus[1:] if len(cpus) > count else cpus
+    if len(workers) < count:
+        return [[workers[i % len(workers)]] for i in range(count)]
+    per_rig = max(1, min(MULTI_RIG_CPUS_PER_RIG, len(workers) // count))
+    return [workers[i * per_rig:(i + 1) * per_rig] for i in range(count)]
+
+def set_cpu_affinity(cpus):
+    """Restricts the current process (and the threads it starts afterwards) to the given CPUs; False when the
+    platform does not allow it"""
+    try:
+        if hasattr(os, "sched_setaffinity"):
+            os.sched_setaffinity(0, set(cpus))
+            return True
+        if platform.system() == 'Windows':
+            mask = sum(1 << cpu for cpu in set(cpus))
+            return bool(ctypes.windll.kernel32.SetProcessAffinityMask(ctypes.windll.kernel32.GetCurrentProcess(), mask))
+    except (OSError, AttributeError):
+        pass
+    return False
+
+def rig_worker(index, args, cpus, events):
+    """Multi-rig worker process: one port and controller with its own timing loop, restricted to `cpus`.
+    Console output goes to a per-rig log; progress and results are sent to the coordinator through `events`."""
+    global HEADLESS, LINUX_REALTIME, ADAPTIVE_INTERVAL, DELAY_LIST_ENCODING, RESULT_STORE_FILE, THERMAL_STORE_FILE_BUTTON, THERMAL_STORE_FILE_STICK
+    global EARLY_STOP, EARLY_STOP_CI_MS, EARLY_STOP_P99_CI_MS, EARLY_STOP_MIN_SAMPLES, SESSION_DIR
+    HEADLESS = True
+    # Spawned workers start from the module defaults
+    LINUX_REALTIME = LINUX_REALTIME or args.realtime
+    ADAPTIVE_INTERVAL = ADAPTIVE_INTERVAL or args.adaptive
+    DELAY_LIST_ENCODING = args.delay_encoding
+    RESULT_STORE_FILE = args.store
+    if args.stop_ci is not None:
+        EARLY_STOP, EARLY_STOP_CI_MS = True, args.stop_ci
+    EARLY_STOP_P99_CI_MS, EARLY_STOP_MIN_SAMPLES = args.stop_p99_ci, args.stop_min
+    os.environ.setdefault("SDL_JOYSTICK_ALLOW_BACKGROUND_EVENTS", "1")
+    # Every rig has its own solenoids, so every rig has its own thermal stores
+    suffix = "".join(c if c.isalnum() else "_" for c in args.port)
+    THERMAL_STORE_FILE_BUTTON = os.path.join(_TEMP_DIR, f'p82_solenoid_heat_button_{suffix}.json')
+    THERMAL_STORE_FILE_STICK = os.path.join(_TEMP_DIR, f'p82_solenoid_heat_stick_{suffix}.json')
+    pinned = set_cpu_affinity(cpus)
+    os.makedirs(args.output_dir, exist_ok=True)
+    log_file = os.path.join(args.output_dir, f"rig{index + 1}_{suffix}.log")
+    # Exports and session files of each rig go to its own subdirectory
+    args.output_dir = os.path.join(args.output_dir, f"rig{index + 1}_{suffix}")
+    if SESSION_DIR:
+        SESSION_DIR = os.path.join(SESSION_DIR, f"rig{index + 1}_{suffix}")
+    code = EXIT_FAILED
+    with open(log_file, "w", buffering=1) as log:
+        sys.stdout = sys.stderr = log
+        events.put((index, {'event': 'started', 'pid': os.getpid(), 'cpus': cpus if pinned else None, 'log': log_file}))
+        start_async_logger()
+        try:
+            code = run_unattended(args, lambda record: events.put((index, record)))
+        except KeyboardInterrupt:
+            code = EXIT_INTERRUPTED
+        except Exception as e:
+            print_error(f"Rig {index + 1}: {e}")
+        finally:
+            stop_async_logger()
+            events.put((index, {'event': 'exit', 'code': code}))
+
+def run_multi_rig(args):
+    """Runs one worker process per --rig PORT[=DEVICE] and aggregates their progress and results.
+    Returns the highest worker exit code."""
+    rigs = []
+    for spec in args.rig:
+        port, _, device = spec.partition("=")
+        rigs.append(argparse.Namespace(**dict(vars(args), port=port, device=device or args.device, rig=None)))
+    cpus = rig_cpus(len(rigs))
+    shared = {cpu for rig_set in cpus for cpu in rig_set}
+    if len(shared) < sum(len(rig_set) for rig_set in cpus):
+        print(f"\n{Fore.YELLOW}Warning: {len(rigs)} rigs share {len(shared)} CPU(s); their timing loops will interfere.{Fore.RESET}")
+    elif args.realtime and any(len(rig_set) < 2 for rig_set in cpus):
+        print(f"\n{Fore.YELLOW}Warning: fewer than 2 CPUs per rig; --realtime cannot pin the measuring threads.{Fore.RESET}")
+    ctx = multiprocessing.get_context("spawn")
+    events = ctx.Queue()
+    workers = [ctx.Process(target=rig_worker, args=(i, rig, cpus[i], events), name=f"p82-rig{i + 1}", daemon=True)
+               for i, rig in enumerate(rigs)]
+    status = [{'session': 0, 'count': 0, 'iterations': args.iterations, 'average': None} for _ in rigs]
+    results = [[] for _ in rigs]
+    codes = [None] * len(rigs)
+    for i, worker in enumerate(workers):
+        worker.start()
+        print_info(f"Rig {i + 1}: {rigs[i].port} on CPU {','.join(map(str, cpus[i]))} (pid {worker.pid})")
+    last_report = time.perf_counter()
+    try:
+        while any(code is None for code in codes):
+            try:
+                index, record = events.get(timeout=0.5)
+            except queue.Empty:
+                for i, worker in enumerate(workers):
+                    if codes[i] is None and not worker.is_alive():
+                        codes[i] = worker.exitcode or EXIT_FAILED  # Died without reporting
+                continue
+            event = record['event']
+            if event == 'exit':
+                codes[index] = record['code']
+                print(f"Rig {index + 1} finished with exit code {record['code']}")
+            elif event == 'started':
+                if record['cpus'] is None:
+                    print(f"{Fore.YELLOW}Rig {index + 1}: CPU affinity is not available on this platform.{Fore.RESET}")
+                print(f"Rig {index + 1} log: {record['log']}")
+            elif event == 'result':
+                results[index].append(record)
+                print(f"Rig {index + 1} session {record['session']}: avg {record['avg']:.2f} ms, jitter {record['jitter']:.2f} ms, "
+                      f"p99 {record['p99']:.2f} ms ({record['valid']} valid, {record['invalid']} invalid)")
+            else:
+                status[index].update(record)
+            now = time.perf_counter()
+            if now - last_report >= HEADLESS_PROGRESS_INTERVAL:
+                last_report = now
+                print(" | ".join(
+                    f"rig{i + 1} s{st['session']} {st['count']}/{st['iterations']}" + (f" {st['average']:.2f} ms" if st['average'] is not None else "")
+                    for i, st in enumerate(status)))
+    except KeyboardInterrupt:
+        print("\nTest interrupted by user.")
+        codes = [EXIT_INTERRUPTED if code is None else code for code in codes]
+    finally:
+        for worker in workers:
+            worker.join(timeout=5.0)
+            if worker.is_alive():
+                worker.terminate()
+
+    print(f"\n{Style.BRIGHT}Multi-rig summary{Style.RESET_ALL}")
+    for i, rig in enumerate(rigs):
+        averages = [record['avg'] for record in results[i]]
+        summary = f"{len(averages)} session(s), mean avg {statistics.mean(averages):.2f} ms" if averages else "no results"
+        print(f"Rig {i + 1} ({rig.port}): {summary}, exit code {codes[i]}")
+    return max(codes)
+
 if __name__ == "__main__":
+    multiprocessing.freeze_support()  # Render process in frozen (PyInstaller) builds
+    print_banner()
     wait_on_exit = True
-    pygame.init()
+    cli_args = parse_cli_args()
+    unattended = bool(cli_args.test or cli_args.list or cli_args.upload_pending or cli_args.query or cli_args.compare)
+    if cli_args.headless or unattended:
+        HEADLESS = True
+    if cli_args.realtime:
+        LINUX_REALTIME = True
+    if cli_args.adaptive:
+        ADAPTIVE_INTERVAL = True
+    DELAY_LIST_ENCODING = cli_args.delay_encoding
+    RESULT_STORE_FILE = cli_args.store
+    if cli_args.stop_ci is not None:
+        EARLY_STOP, EARLY_STOP_CI_MS = True, cli_args.stop_ci
+    EARLY_STOP_P99_CI_MS, EARLY_STOP_MIN_SAMPLES = cli_args.stop_p99_ci, cli_args.stop_min
+    if RENDER_PROCESS or HEADLESS:
+        # No window in this process: joystick events must arrive without focus
+        os.environ.setdefault("SDL_JOYSTICK_ALLOW_BACKGROUND_EVENTS", "1")
+    if not HEADLESS:
+        pygame.init()
+        pygame.joystick.init()
     init(autoreset=True) # Initialize colorama
-    pygame.joystick.init()
     start_async_logger()
+    if unattended:
+        try:
+            if cli_args.compare:
+                exit_code = run_compare(cli_args)
+            elif cli_args.query:
+                exit_code = run_query(cli_args)
+            elif cli_args.upload_pending:
+                exit_code = run_upload_batch(cli_args)
+            else:
+                exit_code = run_multi_rig(cli_args) if cli_args.rig else run_unattended(cli_args)
+        finally:
+            stop_async_logger()
+            pygame.quit()
+        sys.exit(exit_code)
+    # Results spooled by earlier runs are sent in the background while this session runs
+    upload_queue = UploadQueue(cli_args.upload_url)
+    upload_queue.on_sent = lambda data: async_log(f"Spooled result sent: {UPLOAD_RESULT_URL.format(data.get('test_key'))}")
+    if upload_queue.pending():
+        print_info(f"Sending {len(upload_queue.pending())} spooled Gamepadla result(s) in the background.")
+        upload_queue.start()
     try:
-        if not pygame.display.get_init():
+        if not HEADLESS and not pygame.display.get_init():
             pygame.display.init()
-        if pygame.display.get_surface() is None:
-            # Load and set window icon
-            icon = load_window_icon()
-            if icon:
-                pygame.display.set_icon(icon)
-            pygame.display.set_mode((800, 600))
-            pygame.display.set_caption("Prometheus 82 - Testing")
-            pygame.font.init()
-        # Show premium initial instructions in the Pygame window
-        screen = pygame.display.get_surface()
-        font_large = pygame.font.Font(None, 48)
-        font_small = pygame.font.Font(None, 32)
+        # With RENDER_PROCESS the test window is opened by the render process when a test starts;
+        # headless runs never open one
+        if not RENDER_PROCESS and not HEADLESS:
+            if pygame.display.get_surface() is None:
+                # Load and set window icon
+                icon = load_window_icon()
+                if icon:
+                    pygame.display.set_icon(icon)
+                pygame.display.set_mode((800, 600))
+                pygame.display.set_caption("Prometheus 82 - Testing")
+                pygame.font.init()
+            # Show premium initial instructions in the Pygame window
+            screen = pygame.display.get_surface()
+            font_large = pygame.font.Font(None, 48)
+            font_small = pygame.font.Font(None, 32)
         
-        # Background gradient
-        for y in range(0, 600, 4):
-            c = (15 + y//100, 20 + y//80, 30 + y//60)
-            pygame.draw.rect(screen, c, (0, y, 800, 4))
+            # Background gradient
+            for y in range(0, 600, 4):
+                c = (15 + y//100, 20 + y//80, 30 + y//60)
+                pygame.draw.rect(screen, c, (0, y, 800, 4))
             
-        msg1 = "PROMETHEUS 82 IS READY"
-        msg2 = "Please go to the console to configure the test."
-        msg3 = "Do not close this window."
+            msg1 = "PROMETHEUS 82 IS READY"
+            msg2 = "Please go to the console to configure the test."
+            msg3 = "Do not close this window."
         
-        surf1 = font_large.render(msg1, True, (0, 200, 255))
-        surf2 = font_small.render(msg2, True, (200, 200, 200))
-        surf3 = font_small.render(msg3, True, (150, 150, 50))
+            surf1 = font_large.render(msg1, True, (0, 200, 255))
+            surf2 = font_small.render(msg2, True, (200, 200, 200))
+            surf3 = font_small.render(msg3, True, (150, 150, 50))
         
-        screen.blit(surf1, (400 - surf1.get_width()//2, 240))
-        screen.blit(surf2, (400 - surf2.get_width()//2, 300))
-        screen.blit(surf3, (400 - surf3.get_width()//2, 550))
-        pygame.display.flip()
+            screen.blit(surf1, (400 - surf1.get_width()//2, 240))
+            screen.blit(surf2, (400 - surf2.get_width()//2, 300))
+            screen.blit(surf3, (400 - surf3.get_width()//2, 550))
+            pygame.display.flip()
     except Exception as e:
         print_error(f"Couldn't create window at startup: {e}")
     
@@ -1712,18 +5168,9 @@ if __name__ == "__main__":
     
     # Select gamepad
     joystick = None
+    keyboard = None
     detected_mode = None
-    direct_steam_devices = SteamControllerDirect.available_devices()
-    
-    options = []
-    if direct_steam_devices:
-        is_dongle = direct_steam_devices[0].get("product_id") == SteamControllerDirect.SC2026_DONGLE_PID
-        steam_name = "Steam Controller 2026 (Direct HID Puck)" if is_dongle else "Steam Controller 2026 (Direct HID USB)"
-        options.append(("steam", steam_name, None))
-        
-    for i in range(pygame.joystick.get_count()):
-        pj = pygame.joystick.Joystick(i)
-        options.append(("pygame", pj.get_name(), pj))
+    options = gamepad_options()
 
     if len(options) == 0:
         print_error("No gamepad found! Some features will be unavailable.")
@@ -1752,15 +5199,7 @@ if __name__ == "__main__":
                     print_error("Invalid input! Please enter a number.")
             prefix = "Selected"
 
-        opt_type, name, dev = options[choice]
-        if opt_type == "steam":
-            try:
-                joystick = SteamControllerDirect.open_first()
-            except (RuntimeError, OSError) as e:
-                print_error(f"Failed to open Steam Controller direct HID: {e}")
-        else:
-            joystick = dev
-            
+        joystick = open_gamepad_option(options[choice])
         if joystick:
             print(f"\n{prefix} gamepad: {joystick.get_name()}")
 
@@ -1805,10 +5244,16 @@ if __name__ == "__main__":
 
     # Select iterations (affects cooling timeout)
     if test_type in (TEST_TYPE_STICK, TEST_TYPE_BUTTON, TEST_TYPE_KEYBOARD):
-        menu_iters = "Select number of iterations:\n1: 400 (For Gamepadla.com validation)\n2: 200\n3: 100\nOr enter a custom number between 10 and 400."
+        menu_iters = ("Select number of iterations:\n1: 400 (For Gamepadla.com validation)\n2: 200\n3: 100\n"
+                      f"4: {EARLY_STOP_MIN_SAMPLES}-400, stops once the average is known within ±{EARLY_STOP_CI_MS:.2f} ms\n"
+                      "Or enter a custom number between 10 and 400.")
         while True:
             try:
-                iter_input = get_input_with_countdown("Enter your choice (1/2/3 or custom 10-400): ", menu_iters).strip()
+                iter_input = get_input_with_countdown("Enter your choice (1/2/3/4 or custom 10-400): ", menu_iters).strip()
+                if iter_input == '4':
+                    TEST_ITERATIONS = 400
+                    EARLY_STOP = True
+                    break
                 if iter_input == '1':
                     TEST_ITERATIONS = 400
                     break
@@ -1826,14 +5271,10 @@ if __name__ == "__main__":
                     else:
                         print_error("Invalid number! Please enter a value between 10 and 400.")
             except ValueError:
-                print_error("Invalid input! Please enter 1, 2, 3, or a number.")
+                print_error("Invalid input! Please enter 1, 2, 3, 4, or a number.")
 
     # Setup serial connection
-    # --- MODIFICATION START ---
-    all_ports = list_ports.comports()
-    # Filter out ports that have "Bluetooth" in their description (case-insensitive)
-    ports = [p for p in all_ports if "bluetooth" not in p.description.lower()]
-
+    ports = prometheus_ports()
     if not ports:
         print_error("No suitable COM ports found. Perhaps you have not connected Prometheus 82 to your computer.")
         get_input_with_countdown("Press Enter to close...", show_cooling=False)
@@ -1857,39 +5298,13 @@ if __name__ == "__main__":
                     print_error(f"Please select a number between 1 and {len(ports)}.")
             except ValueError:
                 print_error("Invalid input! Please enter a number.")
-    # --- MODIFICATION END ---
 
     try:
         with serial.Serial(port.device, 115200, timeout=1) as ser:
             ser.reset_input_buffer()
             ser.reset_output_buffer()
             
-            start_time = time.time()
-            ready = False
-            fw_version = None
-            while time.time() - start_time < 5:
-                if ser.in_waiting:
-                    b = ser.read()
-                    if b == b'R':
-                        ready = True
-                    elif b == b'V':
-                        buf = b""
-                        t0 = time.time()
-                        while time.time() - t0 < 1.0:
-                            if ser.in_waiting:
-                                c = ser.read()
-                                if c in (b'\n', b'\r'):
-                                    break
-                                buf += c
-                            else:
-                                time.sleep(0.001)
-                        try:
-                            fw_version = buf.decode("ascii").strip()
-                        except Exception:
-                            fw_version = None
-                        break
-                else:
-                    time.sleep(0.001)
+            ready, fw_version = read_board_banner(ser)
             if not ready:
                 print_error("Prometheus did not send ready signal ('R'). Check connection or Prometheus code.")
                 input("Press Enter to close...")
@@ -1900,31 +5315,31 @@ if __name__ == "__main__":
                 input("Press Enter to close...")
                 pygame.quit()
                 sys.exit()
-            def _ver_tuple(s):
-                try:
-                    return tuple(int(x) for x in s.split("."))
-                except Exception:
-                    return (0,)
-            if _ver_tuple(fw_version) < _ver_tuple(REQUIRED_ARDUINO_VERSION):
+            if version_tuple(fw_version) < version_tuple(REQUIRED_ARDUINO_VERSION):
                 print_error(f"Arduino firmware v{fw_version} is outdated. Please update to at least v{REQUIRED_ARDUINO_VERSION}.\nhttps://github.com/cakama3a/Prometheus82?tab=readme-ov-file#how-to-use-prometheus-82")
                 get_input_with_countdown("Press Enter to close...", show_cooling=False)
                 pygame.quit()
                 sys.exit()
             print(f"\nPrometheus 82 connected on {port.device} ({port.description}), Arduino FW v{fw_version}")
 
-            # Test Arduino latency and update CONTACT_DELAY
-            avg_latency = test_arduino_latency(ser)
-            if avg_latency is None:
-                print_error(f"Calibrating Arduino latency failed. Using default CONTACT_DELAY ({CONTACT_DELAY} ms).")
-                
-            else:
-                CONTACT_DELAY = avg_latency
-                print(f"\nSet CONTACT_DELAY to {CONTACT_DELAY:.3f} ms")
-
-            tester = LatencyTester(joystick, ser, test_type, CONTACT_DELAY, TEST_ITERATIONS, detected_mode)
+            clock_sync, CONTACT_DELAY = setup_board_timing(ser, fw_version)
+            release_events = setup_release_events(ser, fw_version)
+
+            if test_type == TEST_TYPE_KEYBOARD and LINUX_EVDEV_INPUT and platform.system() == 'Linux':
+                keyboard = EvdevKeyboard.open_all()
+                if keyboard:
+                    print_info("Reading keyboard events from /dev/input (kernel timestamps, window focus not required).")
+            if test_type == TEST_TYPE_KEYBOARD and HEADLESS and not keyboard:
+                print_error("Headless keyboard tests need readable evdev keyboards (Linux /dev/input); Pygame key events need the test window.")
+                sys.exit(1)
+            tester = LatencyTester(joystick, ser, test_type, CONTACT_DELAY, TEST_ITERATIONS, detected_mode, keyboard, clock_sync,
+                                   headless=HEADLESS, release_events=release_events)
+            upload_queue.stop()  # No background uploads competing for the GIL while measuring; resumed in the menu
             try:
                 if test_type == TEST_TYPE_HARDWARE:
                     test_passed, timing_warning = tester.test_hardware()
+                    if upload_queue.pending():
+                        upload_queue.start()
                     
                     # Hardware test completed
                     
@@ -1946,8 +5361,20 @@ if __name__ == "__main__":
                         print(f"Guide: {Fore.LIGHTRED_EX}https://youtu.be/MLsXo8Si730{Fore.RESET}")
                     elif test_type == TEST_TYPE_KEYBOARD:
                         print("\nKeyboard key will be selected when the test window opens. Press your key at the prompt.")
+
+                    try:
+                        tester.trace.sink = open_session_writer(
+                            test_type, joystick.get_name() if joystick else "Keyboard", joystick.get_guid() if joystick else None,
+                            server_protocol_name(detected_mode), CONTACT_DELAY, tester.pulse_duration_us / 1000.0, TEST_ITERATIONS,
+                            'board' if clock_sync is not None else 'host')
+                        if tester.trace.sink is not None:
+                            print_info(f"Recording session to {tester.trace.sink.filename}")
+                    except OSError as e:
+                        print_error(f"Session file disabled: {e}")
                     
                     tester.test_loop()
+                    if upload_queue.pending():
+                        upload_queue.start()  # Idle again: resume the background flush
                     
                     # Test completed
                     if getattr(tester, "test_aborted", False):
@@ -1963,17 +5390,37 @@ if __name__ == "__main__":
                         print(f"{'Max latency:':<26}{stats['max']:>8.2f} ms")
                         print(f"{Style.BRIGHT}{Fore.CYAN}" + f"{'Average latency:':<26}{stats['avg']:>8.2f} ms{Fore.RESET}" + f"{Style.RESET_ALL}")
                         print(f"{'Jitter:':<26}{stats['jitter']:>8.2f} ms")
+                        print(f"{'P50 / P90 / P99:':<26}{stats['p50']:>8.2f} / {stats['p90']:.2f} / {stats['p99']:.2f} ms")
                         print(f"{Style.BRIGHT}{Fore.CYAN}" + "="*37 + f"{Fore.RESET}{Style.RESET_ALL}")
                         print(f"{Fore.LIGHTBLACK_EX}* Statistics are calculated using {int(LOWER_QUANTILE*100)}%-{int(UPPER_QUANTILE*100)}% quantile filtering.{Fore.RESET}")
                         print(f"\n{Style.BRIGHT}Measurement Details{Style.RESET_ALL}")
-                        print(f"{'Iterations:':<26}{tester.iterations:>8}")
+                        if stats['stopped_early']:
+                            print(f"{'Iterations:':<26}{stats['total_samples']:>8} of max {tester.iterations} (stopped early)")
+                        else:
+                            print(f"{'Iterations:':<26}{tester.iterations:>8}")
+                        if stats['avg_ci95'] is not None:
+                            print(f"{'Average 95% CI:':<26}{'±' + format(stats['avg_ci95'], '.3f'):>8} ms")
                         print(f"{'Total measurements:':<26}{stats['total_samples']:>8}")
                         print(f"{'Valid measurements:':<26}{stats['valid_samples']:>8}")
                         print(f"{'Invalid measurements:':<26}{stats['invalid_samples']:>8} (>{stats['pulse_duration']*(RATIO-1):.1f} ms)")
                         print(f"{'Filtered count:':<26}{stats['filtered_samples']:>8}")
                         print(f"{'Pulse duration:':<26}{stats['pulse_duration']:>8.1f} ms")
                         print(f"{'Contact delay:':<26}{stats['contact_delay']:>8.3f} ms")
+                        if stats['timestamp_source'] == 'board':
+                            print(f"{'S timestamps:':<26}{'board':>8} (clock drift {stats['clock_drift_ppm']:+.1f} ppm)")
+                        if stats['adaptive_interval'] and stats['cycle_interval_avg'] is not None:
+                            print(f"{'Cycle interval:':<26}{stats['cycle_interval_avg']:>8.1f} ms (adaptive, fixed {stats['pulse_duration'] * RATIO:.0f} ms)")
+                        if stats['trigger_error_avg'] is not None:
+                            print(f"{'Trigger timing error:':<26}{stats['trigger_error_avg']:>8.3f} ms (p99 {stats['trigger_error_p99']:.3f} ms, max {stats['trigger_error_max']:.3f} ms)")
+                        if stats['s_capture_advance'] is not None:
+                            print(f"{'S capture advance:':<26}{stats['s_capture_advance']:>8.3f} ms (max {stats['s_capture_advance_max']:.3f} ms vs. loop polling)")
         
+                        if stats['report_interval'] is not None:
+                            dropped = f", {stats['dropped_reports']} dropped" if stats['dropped_reports'] is not None else ""
+                            print(f"{'Report interval:':<26}{stats['report_interval']:>8.3f} ms ({stats['report_rate_hz']:.0f} Hz, "
+                                  f"jitter {stats['report_jitter']:.3f} ms{dropped}; {stats['report_source']})")
+                        if report_rate_warning(stats):
+                            print(f"\n{Fore.RED}Warning: {report_rate_warning(stats)}{Fore.RESET}")
                         if stats['contact_delay'] > 1.2:
                             print(f"\n{Fore.RED}Warning: Tester's inherent latency ({stats['contact_delay']:.3f} ms) exceeds recommended 1.2 ms, which may affect results.{Fore.RESET}")
 
@@ -2013,7 +5460,6 @@ if __name__ == "__main__":
                                     print(f"{Fore.YELLOW}Warning: This result has already been opened on Gamepadla.com. Restart the test to send a new result.{Fore.RESET}")
                                     continue
                                 while True:
-                                    test_key = generate_short_id()
                                     gamepad_name = get_input_with_countdown("Enter gamepad name (max 60 chars): ", show_cooling=False, max_len=60).strip()
                                     
                                     if not gamepad_name:
@@ -2027,40 +5473,49 @@ if __name__ == "__main__":
                                         print_error("Invalid choice. Please enter 1, 2, or 3.")
                                         
                                     connection = {"1": "Cable", "2": "Dongle", "3": "Bluetooth"}[conn_choice]
-                                    data = {
-                                        'test_key': test_key, 'version': VERSION, 'url': 'https://gamepadla.com',
-                                        'date': time.strftime('%Y-%m-%d %H:%M:%S', time.localtime()),
-                                        'driver': joystick.get_name() if joystick else "N/A", 'connection': connection,
-                                        'mode': server_protocol_name(detected_mode),
-                                        'name': gamepad_name, 'os_name': platform.system(), 'os_version': platform.uname().version,
-                                        'min_latency': round(stats['min'], 2), 'max_latency': round(stats['max'], 2),
-                                        'avg_latency': round(stats['avg'], 2), 'jitter': stats['jitter'],
-                                        'mathod': 'PNCS' if test_type == TEST_TYPE_STICK else 'PNCB', # mathod name is not a mistake!
-                                        'delay_list': ', '.join(str(round(x, 2)) for x in tester.latency_results),
-                                        'stick_threshold': STICK_THRESHOLD if test_type == TEST_TYPE_STICK else None,
-                                        'contact_delay': stats['contact_delay'], 'pulse_duration': stats['pulse_duration']
-                                    }
+                                    if tester.store_session_id is not None:
+                                        try:
+                                            with contextlib.closing(ResultStore()) as store:
+                                                store.set_connection(tester.store_session_id, connection)
+                                        except sqlite3.Error as e:
+                                            print_error(f"Updating the result store failed: {e}")
+                                    data = gamepadla_upload_data(stats, tester.latency_results, test_type, gamepad_name, connection,
+                                                                 joystick.get_name() if joystick else "N/A", detected_mode)
                                     try:
-                                        response = requests.post('https://gamepadla.com/scripts/poster.php', data=data)
-                                        if response.status_code == 200:
+                                        spool_path = upload_queue.enqueue(data)
+                                    except OSError as e:
+                                        print_error(f"Spooling the result for upload failed: {e}")
+                                        break
+                                    while True:
+                                        result, detail = upload_queue.upload(spool_path)
+                                        if result == UploadQueue.SENT:
                                             print("Test results successfully sent to the server.")
-                                            webbrowser.open(f'https://gamepadla.com/result/{test_key}/')
+                                            webbrowser.open(UPLOAD_RESULT_URL.format(data['test_key']))
                                             uploaded_to_gamepadla = True
                                             break
-                                        print(f"\nServer error. Status code: {response.status_code}")
-                                    except requests.exceptions.RequestException:
-                                        print("\nNo internet connection or server is unreachable")
-                                    if get_input_with_countdown("\nDo you want to try sending the data again? (Y/N): ", show_cooling=False).upper() != 'Y':
-                                        break
+                                        if result == UploadQueue.REJECTED:
+                                            print_error(f"Server rejected the test results ({detail}).")
+                                            break
+                                        print(f"\nNo internet connection or server is unreachable ({detail})")
+                                        if get_input_with_countdown("\nDo you want to try sending the data again? (Y/N): ", show_cooling=False).upper() != 'Y':
+                                            print_info(f"The result stays in {upload_queue.spool_dir} and is sent in the background "
+                                                       f"or with --upload-pending.")
+                                            upload_queue.start()
+                                            uploaded_to_gamepadla = True
+                                            break
+                                    break
                             elif choice == 2:
                                 if exported_to_csv:
                                     print(f"{Fore.YELLOW}Warning: This result has already been exported to CSV. Restart the test to export a new result.{Fore.RESET}")
                                     continue
-                                export_to_csv(stats, joystick.get_name() if joystick else "N/A", tester.latency_results)
+                                filename = export_to_csv(stats, joystick.get_name() if joystick else "N/A", tester.latency_results)
+                                trace_file = tester.trace.export_csv(filename.replace(".csv", "_trace.csv"), stats['contact_delay'])
+                                print(f"Per-cycle trace saved to file {trace_file}")
                                 exported_to_csv = True
                                 continue
                             elif choice == 3:
                                 print("\nRestarting with a fresh test session...")
+                                tester.close_render_process()
                                 restart_current_program()
                             elif choice == 4:
                                 wait_on_exit = False
@@ -2069,16 +5524,24 @@ if __name__ == "__main__":
                             continue
             except KeyboardInterrupt:
                 print("\nTest interrupted by user.")
+            finally:
+                tester.stop_serial_capture()
+                tester.close_render_process()
+                if tester.trace.sink is not None:
+                    tester.trace.sink.close()
     except serial.SerialException as e:
         print_error(f"Opening port failed: {e}")
     except Exception as e:
         print_error(f"While setting up COM port: {e}")
     finally:
         try:
-            if isinstance(joystick, SteamControllerDirect):
+            if isinstance(joystick, DIRECT_INPUT_BACKENDS):
                 joystick.close()
+            if keyboard:
+                keyboard.close()
         except Exception:
             pass
+        upload_queue.close()
         stop_async_logger()
         pygame.quit()
         if wait_on_exit:
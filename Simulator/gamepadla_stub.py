@@ -0,0 +1,141 @@
+import os
+import sys
+import time
+import argparse
+import tempfile
+import threading
+from urllib.parse import parse_qs
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+import Python as p82  # Main Prometheus 82 program (upload queue under test)
+
+
+class GamepadlaStub:
+    """Local stand-in for the Gamepadla result endpoint.
+    Accepts form posts like poster.php; `failures` is a list of status codes (or "drop" to close the connection
+    without a reply) returned for the next requests before posts are accepted again."""
+
+    def __init__(self, failures=(), delay_s=0.0):
+        self.failures = list(failures)
+        self.delay_s = delay_s
+        self.received = []           # Form fields of every accepted post
+        self.requests = 0
+        self._lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # Keep-alive, so connection reuse can be seen in the request log
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                with stub._lock:
+                    stub.requests += 1
+                    failure = stub.failures.pop(0) if stub.failures else None
+                if stub.delay_s:
+                    time.sleep(stub.delay_s)
+                if failure == "drop":
+                    self.close_connection = True
+                    return
+                status = failure or 200
+                if status == 200:
+                    fields = {k: v[0] for k, v in parse_qs(body.decode()).items()}
+                    with stub._lock:
+                        stub.received.append(fields)
+                self.send_response(status)
+                self.send_header("Content-Length", "2")
+                self.end_headers()
+                self.wfile.write(b"OK")
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/scripts/poster.php"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, name="gamepadla-stub", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def fake_result(index):
+    stats = {'min': 3.1, 'max': 6.4, 'avg': 4.2, 'jitter': 0.6, 'contact_delay': 0.0, 'pulse_duration': 40.0}
+    return p82.gamepadla_upload_data(stats, [4.0 + i / 100 for i in range(200)], p82.TEST_TYPE_BUTTON,
+                                     f"Stub Gamepad {index}", "Cable", "Virtual", None)
+
+
+def check(label, ok):
+    print(f"  {'ok  ' if ok else 'FAIL'} {label}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Exercise the upload queue (retries, spool, batch flush) against a local Gamepadla stub")
+    parser.add_argument("--results", type=int, default=5, help="Results spooled for the batch flush")
+    args = parser.parse_args()
+
+    ok = True
+    with tempfile.TemporaryDirectory() as spool_dir:
+        # Transient server errors and dropped connections are retried with backoff, 4xx is rejected
+        stub = GamepadlaStub(failures=[503, "drop", 429]).start()
+        uploads = p82.UploadQueue(stub.url, spool_dir, timeout=(1.0, 2.0), backoff_s=0.05)
+        try:
+            print("Retries:")
+            result, _ = uploads.upload(uploads.enqueue(fake_result(0)))
+            ok &= check("accepted after 503, dropped connection and 429", result == uploads.SENT and len(stub.received) == 1)
+            ok &= check("spool is empty after the upload", not uploads.pending())
+            stub.failures = [400]
+            result, _ = uploads.upload(uploads.enqueue(fake_result(1)))
+            ok &= check("400 moves the result to rejected/", result == uploads.REJECTED
+                        and len(os.listdir(os.path.join(spool_dir, "rejected"))) == 1)
+
+            print("Offline spool and batch flush:")
+            stub.failures = [503] * 1000
+            for i in range(args.results):
+                uploads.upload(uploads.enqueue(fake_result(10 + i)), attempts=2)
+            ok &= check(f"{args.results} results stay spooled while the server is down", len(uploads.pending()) == args.results)
+            stub.failures = []
+            restarted = p82.UploadQueue(stub.url, spool_dir, timeout=(1.0, 2.0), backoff_s=0.05)  # As after a restart
+            counts = restarted.flush()
+            restarted.close()
+            names = [fields['name'] for fields in stub.received[1:]]
+            ok &= check("batch flush sends every spooled result once, in order",
+                        counts[uploads.SENT] == args.results and names == [f"Stub Gamepad {10 + i}" for i in range(args.results)])
+
+            print("Background flush:")
+            stub.failures = [503, 503]
+            uploads.enqueue(fake_result(99))
+            uploads.start(interval_s=0.05)
+            deadline = time.perf_counter() + 5.0
+            while uploads.pending() and time.perf_counter() < deadline:
+                time.sleep(0.05)
+            ok &= check("background thread delivers the result after two failures", not uploads.pending())
+
+            print("Paused during a test:")
+            stub.failures = [503]
+            uploads.enqueue(fake_result(100))
+            uploads.start(interval_s=0.05)
+            uploads.stop()  # As before test_loop
+            sent = len(stub.received)
+            time.sleep(0.3)
+            ok &= check("no uploads while stopped", len(stub.received) == sent and len(uploads.pending()) == 1)
+            uploads.start(interval_s=0.05)  # Back in the menu
+            deadline = time.perf_counter() + 5.0
+            while uploads.pending() and time.perf_counter() < deadline:
+                time.sleep(0.05)
+            ok &= check("start() resumes the background flush", not uploads.pending())
+        finally:
+            uploads.close()
+            stub.stop()
+    print("All upload checks passed" if ok else "Upload checks failed")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,346 @@
+import os
+import sys
+import time
+import tty
+import heapq
+import random
+import select
+import argparse
+import statistics
+import threading
+
+import serial
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+import Python as p82  # Main Prometheus 82 program (host side under test)
+from virtual_p82 import VirtualPrometheus, read_banner
+
+
+class PtyPrometheus(VirtualPrometheus):
+    """Virtual Prometheus 82 behind a pseudo-terminal (Linux).
+    The host opens `port` with pyserial exactly like the real board; replies are written to the pty
+    at their modelled arrival time by a background thread."""
+
+    def __init__(self, **kwargs):
+        self._outgoing = []          # Heap of (due_us, seq, data)
+        self._seq = 0
+        self._cond = threading.Condition()
+        self._running = False
+        self.writes = []             # (host µs just before the write, bytes): earliest time the host could read each reply
+        self.master, self._slave = os.openpty()
+        tty.setraw(self._slave)      # No echo or newline translation on the host side
+        self.port = os.ttyname(self._slave)
+        super().__init__(**kwargs)
+        self._outgoing.clear()       # The banner is sent by reset(), once the host has opened the port
+
+    def reset(self, boot_ms=50.0):
+        """Models the Arduino auto-reset when the host opens the port: fresh state, banner after booting"""
+        with self._cond:
+            self._outgoing.clear()
+        self.timestamp_mode = False
+        self.release_events = False
+        self._pending_cmd = b""
+        self._queue(self._now_us() + boot_ms * 1000, b"RV" + self.firmware.encode("ascii") + b"\n")
+
+    def _queue(self, available_at_us, data):
+        with self._cond:
+            self._seq += 1
+            heapq.heappush(self._outgoing, (available_at_us, self._seq, bytes(data)))
+            self._cond.notify()
+
+    def start(self):
+        self._running = True
+        self._thread = threading.Thread(target=self._pump, name="pty-p82", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._running = False
+        with self._cond:
+            self._cond.notify()
+        self._thread.join(timeout=1.0)
+        os.close(self.master)
+        os.close(self._slave)
+
+    def _pump(self):
+        """Feeds host commands to the firmware model and releases replies when they are due"""
+        while self._running:
+            with self._cond:
+                due_us = self._outgoing[0][0] if self._outgoing else None
+            wait_s = 0.05 if due_us is None else max(0.0, (due_us - self._now_us()) / 1_000_000)
+            readable, _, _ = select.select([self.master], [], [], min(wait_s, 0.05))
+            if readable:
+                try:
+                    data = os.read(self.master, 1024)
+                except OSError:
+                    data = b""
+                if data:
+                    self.write(data)  # Firmware side of the link receives the host's bytes
+            now = self._now_us()
+            ready = []
+            with self._cond:
+                while self._outgoing and self._outgoing[0][0] <= now:
+                    ready.append(heapq.heappop(self._outgoing)[2])
+            if ready:
+                data = b"".join(ready)
+                self.writes.append((self._now_us(), data))
+                os.write(self.master, data)
+
+
+class VirtualGamepad:
+    """Joystick stand-in driven by the virtual board: each solenoid contact presses the button and deflects
+    the stick after a modelled controller delay (report phase + processing), with optional button bounce.
+    Keeps its own state like the direct HID/evdev backends, so no Pygame event pump is needed."""
+
+    CONTINUOUS_REPORTS = True
+
+    def __init__(self, latency_ms=(4.0, 0.5), report_interval_ms=1.0, bounce_prob=0.1, bounce_ms=(0.3, 0.1),
+                 release_ms=3.0, stick_ramp_ms=2.0, axis=0, report_drop_prob=0.0, seed=None):
+        self.latency_ms = latency_ms
+        self.report_interval_ms = report_interval_ms
+        self.bounce_prob = bounce_prob
+        self.bounce_ms = bounce_ms
+        self.release_ms = release_ms
+        self.stick_ramp_ms = stick_ramp_ms
+        self.axis = axis
+        self.rng = random.Random(seed)
+        self.report_drop_prob = report_drop_prob
+        self.presses = []            # Ground truth: (contact_us, press_us, release_us, bounce gaps)
+        self.report_timeline = None  # Set by LatencyTester; fed by start_reports() like the HID reader thread
+        self.dropped_reports = 0
+        self._lock = threading.Lock()
+        self._reporting = False
+
+    def attach(self, board):
+        board.on_trigger = self.on_trigger
+        return self
+
+    def on_trigger(self, contact_us, release_us):
+        """Schedules the input that the controller reports for one sensor contact"""
+        delay_ms = max(0.1, self.rng.gauss(*self.latency_ms)) + self.rng.uniform(0.0, self.report_interval_ms)
+        press_us = contact_us + delay_ms * 1000
+        gaps = []
+        if self.rng.random() < self.bounce_prob:
+            start = press_us + self.report_interval_ms * 1000
+            gaps.append((start, start + max(0.05, self.rng.gauss(*self.bounce_ms)) * 1000))
+        with self._lock:
+            self.presses.append((contact_us, press_us, release_us + self.release_ms * 1000, gaps))
+
+    def start_reports(self):
+        """Emits report timestamps on the report-interval grid (minus dropped reports) while reporting"""
+        if self.report_interval_ms <= 0:
+            return self
+        self._reporting = True
+        self._reporter = threading.Thread(target=self._report_loop, name="virtual-reports", daemon=True)
+        self._reporter.start()
+        return self
+
+    def stop_reports(self):
+        self._reporting = False
+        if getattr(self, "_reporter", None) is not None:
+            self._reporter.join(timeout=0.5)
+
+    def _report_loop(self):
+        interval_ns = int(self.report_interval_ms * 1_000_000)
+        next_ns = time.perf_counter_ns()
+        while self._reporting:
+            next_ns += interval_ns
+            delay_s = (next_ns - time.perf_counter_ns()) / 1e9
+            if delay_s > 0:
+                time.sleep(delay_s)
+            if self.rng.random() < self.report_drop_prob:
+                self.dropped_reports += 1
+            elif self.report_timeline is not None:
+                self.report_timeline.add(next_ns)
+
+    def _current(self, now_us):
+        with self._lock:
+            for press in reversed(self.presses):
+                if press[1] - self.stick_ramp_ms * 1000 <= now_us:
+                    return press
+        return None
+
+    def get_button(self, index):
+        if index != 0:
+            return False
+        now = time.perf_counter() * 1_000_000
+        press = self._current(now)
+        if press is None or not press[1] <= now < press[2]:
+            return False
+        return not any(start <= now < end for start, end in press[3])
+
+    def get_axis(self, index):
+        if index != self.axis:
+            return 0.0
+        now = time.perf_counter() * 1_000_000
+        press = self._current(now)
+        if press is None or now >= press[2]:
+            return 0.0
+        if now >= press[1]:
+            return 1.0
+        # Ramp reaches the activation threshold exactly at press_us
+        ramp_us = self.stick_ramp_ms * 1000
+        return p82.STICK_THRESHOLD * (now - (press[1] - ramp_us)) / ramp_us
+
+    def update(self):
+        pass
+
+    def init(self):
+        pass
+
+    def quit(self):
+        pass
+
+    def close(self):
+        pass
+
+    def get_id(self):
+        return 0
+
+    def get_name(self):
+        return "Virtual Gamepad"
+
+    def get_guid(self):
+        return "0000000000000000000000000000p82v"
+
+    def get_numaxes(self):
+        return 4
+
+    def get_numbuttons(self):
+        return 4
+
+    def get_numhats(self):
+        return 0
+
+
+# Simulated runs must not heat the thermal store of the real solenoid
+p82.THERMAL_STORE_FILE_BUTTON = os.path.join(p82._TEMP_DIR, "p82_sim_solenoid_heat_button.json")
+p82.THERMAL_STORE_FILE_STICK = os.path.join(p82._TEMP_DIR, "p82_sim_solenoid_heat_stick.json")
+# ... and must not end up in the result store next to real sessions
+p82.RESULT_STORE_FILE = os.path.join(p82._TEMP_DIR, "p82_sim_results.sqlite")
+
+# The simulator's gamepad keeps its own state, like SteamControllerDirect and EvdevDevice
+p82.DIRECT_INPUT_BACKENDS = p82.DIRECT_INPUT_BACKENDS + (VirtualGamepad,)
+
+
+class RecordingTester(p82.LatencyTester):
+    """LatencyTester that keeps the S and G timestamps of every accepted sample for ground-truth matching"""
+
+    def __init__(self, *args, **kwargs):
+        self.samples = []
+        super().__init__(*args, **kwargs)
+
+    def log_progress(self, latency, early_g=False):
+        self.samples.append((self.s_time_us, self.g_time_us, latency))
+        super().log_progress(latency, early_g)
+
+
+def connect(board, timestamps=True):
+    """Opens the virtual board like __main__ does: banner, optional board timestamps, latency calibration"""
+    ser = serial.Serial(board.port, 115200, timeout=1)
+    board.reset()
+    firmware = read_banner(ser)
+    clock_sync = None
+    if timestamps and p82.enable_board_timestamps(ser):
+        clock_sync = p82.BoardClockSync()
+    contact_delay = p82.test_arduino_latency(ser, clock_sync) or p82.CONTACT_DELAY
+    if clock_sync is not None and clock_sync.ready:
+        contact_delay = 0.0
+    return ser, firmware, clock_sync, contact_delay
+
+
+def match_ground_truth(tester, gamepad):
+    """Pairs every accepted sample with the simulated press whose contact is closest to its S timestamp"""
+    truth = sorted(gamepad.presses)
+    contacts = [press[0] for press in truth]
+    errors = {'s': [], 'g': [], 'latency': []}
+    for s_us, g_us, latency in tester.samples:
+        i = min(range(len(contacts)), key=lambda k: abs(contacts[k] - s_us))
+        contact_us, press_us = truth[i][0], truth[i][1]
+        errors['s'].append(s_us - contact_us)
+        errors['g'].append(g_us - press_us)
+        errors['latency'].append((latency - (press_us - contact_us) / 1000) * 1000)
+    return errors
+
+
+def run_end_to_end(test_type, iterations, timestamps=True, seed=None, gamepad_kwargs=None, board_kwargs=None, adaptive=False,
+                   reports=False):
+    """Runs headless test_loop against the pty board and virtual gamepad; returns (tester, errors µs, elapsed s)"""
+    board = PtyPrometheus(seed=seed, **(board_kwargs or {})).start()
+    gamepad = VirtualGamepad(seed=seed, **(gamepad_kwargs or {})).attach(board)
+    if reports:
+        gamepad.start_reports()
+    ser = None
+    tester = None
+    try:
+        ser, firmware, clock_sync, contact_delay = connect(board, timestamps)
+        print(f"Virtual Prometheus 82 on {board.port}, FW v{firmware}, contact delay {contact_delay:.3f} ms")
+        p82.ADAPTIVE_INTERVAL = adaptive
+        release_events = adaptive and p82.setup_release_events(ser, firmware)
+        tester = RecordingTester(gamepad, ser, test_type, contact_delay, iterations, "Virtual", None, clock_sync,
+                                 headless=True, release_events=release_events)
+        start = time.perf_counter()
+        tester.test_loop()
+        elapsed = time.perf_counter() - start
+        return tester, match_ground_truth(tester, gamepad), elapsed
+    finally:
+        if tester is not None:
+            tester.stop_serial_capture()
+        if ser is not None:
+            ser.close()
+        gamepad.stop_reports()
+        board.stop()
+
+
+def describe(label, values_us):
+    ordered = sorted(values_us)
+    p99 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))]
+    print(f"  {label:<18} mean {statistics.mean(ordered):+8.1f} µs   sd {statistics.pstdev(ordered):7.1f} µs   p99 {p99:+8.1f} µs")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the full measurement pipeline against a pty-backed virtual Prometheus 82")
+    parser.add_argument("--test", choices=(p82.TEST_TYPE_BUTTON, p82.TEST_TYPE_STICK), default=p82.TEST_TYPE_BUTTON)
+    parser.add_argument("--iterations", type=int, default=100)
+    parser.add_argument("--latency", type=float, nargs=2, default=(4.0, 0.5), metavar=("MEAN_MS", "SD_MS"), help="Controller delay distribution")
+    parser.add_argument("--report-interval", type=float, default=1.0, help="Controller report interval (ms)")
+    parser.add_argument("--bounce-prob", type=float, default=0.1, help="Probability of a button bounce after the press")
+    parser.add_argument("--reports", action="store_true", help="Emit timestamped controller reports for the report-rate estimate")
+    parser.add_argument("--report-drop", type=float, default=0.0, help="Probability that a controller report is dropped (with --reports)")
+    parser.add_argument("--arrival", action="store_true", help="Use arrival-time 'S' instead of board timestamps")
+    parser.add_argument("--adaptive", action="store_true", help="Adaptive trigger interval from the release events")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    p82.start_async_logger()
+    try:
+        tester, errors, elapsed = run_end_to_end(
+            args.test, args.iterations, timestamps=not args.arrival, seed=args.seed,
+            gamepad_kwargs={'latency_ms': tuple(args.latency), 'report_interval_ms': args.report_interval,
+                            'bounce_prob': args.bounce_prob, 'report_drop_prob': args.report_drop}, adaptive=args.adaptive, reports=args.reports)
+    finally:
+        p82.stop_async_logger()
+
+    if not tester.samples:
+        print("No samples were accepted")
+        return 1
+    print(f"\n{len(tester.samples)} samples, {tester.invalid_measurements} invalid, "
+          f"{len(tester.samples) / elapsed * 60:.0f} cycles/min ({elapsed:.1f} s)")
+    print("Host-side error against ground truth:")
+    describe("S timestamp", errors['s'])
+    describe("G timestamp", errors['g'])
+    describe("Latency", errors['latency'])
+    stats = tester.get_statistics()
+    if stats['s_capture_advance'] is not None:
+        print(f"S capture advance {stats['s_capture_advance']:.3f} ms (max {stats['s_capture_advance_max']:.3f} ms) vs. loop polling")
+    if stats['report_interval'] is not None:
+        print(f"Report interval {stats['report_interval']:.3f} ms (modelled {args.report_interval:.3f} ms), "
+              f"jitter {stats['report_jitter']:.3f} ms, {stats['dropped_reports']} dropped")
+    if p82.report_rate_warning(stats):
+        print(f"Warning: {p82.report_rate_warning(stats)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
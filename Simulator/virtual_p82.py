@@ -0,0 +1,225 @@
+import os
+import sys
+import time
+import random
+import argparse
+import statistics
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+import Python as p82  # Main Prometheus 82 program (host side under test)
+
+WRAP = 1 << 32
+
+
+class VirtualPrometheus:
+    """In-process stand-in for a Prometheus 82 on a serial port.
+    Speaks the Arduino.ino protocol with modelled USB latency, solenoid travel and a skewed board clock.
+    Uses the pyserial calls the host code relies on (in_waiting, read, write, flush, reset_*_buffer, timeout)."""
+
+    def __init__(self, firmware="1.3.0", skew_ppm=0.0, clock_offset_us=None, usb_latency_us=(120.0, 40.0),
+                 travel_ms=(8.0, 0.3), bounce_us=(300.0, 100.0), seed=None):
+        self.firmware = firmware
+        self.skew_ppm = skew_ppm
+        self.usb_latency_us = usb_latency_us
+        self.travel_ms = travel_ms
+        self.bounce_us = bounce_us   # Contact bounce after the first edge (only the first edge sends 'S')
+        self.on_trigger = None       # Called with (contact_us, release_us) for every 'T', e.g. by a virtual gamepad
+        self.rng = random.Random(seed)
+        self.timeout = 1
+        self.pulse_duration_us = 40000
+        self.timestamp_mode = False
+        self.release_events = False  # 'L' after every contact release (enabled with 'E', firmware 1.3.0+)
+        self.release_debounce_us = 2000.0
+        self.contacts_us = []        # Ground truth: host perf_counter µs of every sensor contact
+        self._lock = threading.Lock()
+        self._incoming = []          # (available_at_us, byte) in arrival order
+        self._pending_cmd = b""
+        self._hold_until_us = 0.0
+        self._contact_us = 0.0
+        self._bounce_until_us = 0.0
+        self._epoch_us = self._now_us()
+        self._clock_offset_us = clock_offset_us if clock_offset_us is not None else self.rng.randrange(WRAP)
+        banner = b"RV" + firmware.encode("ascii") + b"\n"
+        self._queue(self._epoch_us, banner)
+
+    @staticmethod
+    def _now_us():
+        return time.perf_counter() * 1_000_000
+
+    def board_micros(self, host_us):
+        """Board micros() at a given host time, including clock skew and 32-bit wraparound"""
+        elapsed = (host_us - self._epoch_us) * (1.0 + self.skew_ppm / 1_000_000)
+        return int(self._clock_offset_us + elapsed) % WRAP
+
+    def _usb_delay_us(self):
+        mean, jitter = self.usb_latency_us
+        return max(20.0, self.rng.gauss(mean, jitter))
+
+    def _queue(self, available_at_us, data):
+        with self._lock:
+            for b in data:
+                self._incoming.append((available_at_us, b))
+            self._incoming.sort(key=lambda item: item[0])
+
+    def _respond(self, handled_at_us, data):
+        self._queue(handled_at_us + self._usb_delay_us(), data)
+
+    # --- Firmware model -------------------------------------------------------------------------------
+    def _handle(self, cmd, handled_at_us):
+        if cmd == b'D':
+            if self.timestamp_mode:
+                self._respond(handled_at_us, b'R' + self.board_micros(handled_at_us).to_bytes(4, "little"))
+            else:
+                self._respond(handled_at_us, b'R')
+        elif cmd == b'T':
+            contact_us = handled_at_us + max(1.0, self.rng.gauss(*self.travel_ms)) * 1000
+            self.contacts_us.append(contact_us)
+            self._contact_us = contact_us
+            self._bounce_until_us = contact_us + max(0.0, self.rng.gauss(*self.bounce_us))
+            self._hold_until_us = handled_at_us + self.pulse_duration_us
+            if self.on_trigger:
+                self.on_trigger(contact_us, self._hold_until_us)
+            if self.timestamp_mode:
+                self._respond(contact_us + 20, b'S' + self.board_micros(contact_us).to_bytes(4, "little"))
+            else:
+                self._respond(contact_us, b'S')
+            if self.release_events:
+                # The contact opens when the pulse ends and is reported after the debounce time
+                release_us = self._hold_until_us
+                payload = self.board_micros(release_us).to_bytes(4, "little") if self.timestamp_mode else b""
+                self._respond(release_us + self.release_debounce_us, b'L' + payload)
+        elif cmd == b'Q':
+            closed = self._contact_us <= handled_at_us < self._hold_until_us
+            if closed and handled_at_us < self._bounce_until_us:
+                closed = self.rng.random() < 0.5  # Contact still bouncing
+            self._respond(handled_at_us, b'H' if closed else b'U')
+        elif cmd == b'X':
+            if p82_version_tuple(self.firmware) >= p82_version_tuple(p82.TIMESTAMP_ARDUINO_VERSION):
+                self.timestamp_mode = True
+                self._respond(handled_at_us, b'A')
+        elif cmd == b'E':
+            if p82_version_tuple(self.firmware) >= p82_version_tuple(p82.RELEASE_ARDUINO_VERSION):
+                self.release_events = True
+                self._respond(handled_at_us, b'A')
+
+    def write(self, data):
+        now = self._now_us()
+        buf = self._pending_cmd + bytes(data)
+        i = 0
+        while i < len(buf):
+            cmd = buf[i:i + 1]
+            if cmd == b'P':
+                if len(buf) - i < 3:
+                    break  # Wait for both duration bytes
+                self.pulse_duration_us = ((buf[i + 1] << 8) | buf[i + 2]) * 1000
+                self._respond(now + self._usb_delay_us(), b'A')
+                i += 3
+                continue
+            self._handle(cmd, now + self._usb_delay_us())
+            i += 1
+        self._pending_cmd = buf[i:]
+        return len(data)
+
+    # --- pyserial surface ----------------------------------------------------------------------------
+    @property
+    def in_waiting(self):
+        now = self._now_us()
+        with self._lock:
+            return sum(1 for at, _ in self._incoming if at <= now)
+
+    def read(self, size=1):
+        deadline = time.perf_counter() + (self.timeout if self.timeout is not None else 1e9)
+        out = bytearray()
+        while len(out) < size:
+            now = self._now_us()
+            with self._lock:
+                while self._incoming and self._incoming[0][0] <= now and len(out) < size:
+                    out.append(self._incoming.pop(0)[1])
+            if len(out) >= size or time.perf_counter() >= deadline:
+                break
+            time.sleep(0.0002)
+        return bytes(out)
+
+    def flush(self):
+        pass
+
+    def reset_input_buffer(self):
+        now = self._now_us()
+        with self._lock:
+            self._incoming = [item for item in self._incoming if item[0] > now]
+
+    def reset_output_buffer(self):
+        self._pending_cmd = b""
+
+    def close(self):
+        pass
+
+
+def p82_version_tuple(version):
+    try:
+        return tuple(int(x) for x in version.split("."))
+    except ValueError:
+        return (0,)
+
+
+def read_banner(device):
+    """Consumes the R/V boot banner and returns the reported firmware version"""
+    assert device.read() == b'R' and device.read() == b'V'
+    version = b""
+    while True:
+        c = device.read()
+        if c in (b"\n", b""):
+            return version.decode("ascii")
+        version += c
+
+
+def sync_round_trip(device, sync):
+    """One timestamped 'D' round trip, as sent by LatencyTester between measurement cycles"""
+    send_us = time.perf_counter() * 1_000_000
+    device.write(b'D')
+    if device.read() == b'R':
+        payload = device.read(4)
+        sync.add_sample(send_us, time.perf_counter() * 1_000_000, int.from_bytes(payload, "little"))
+
+
+def run_clock_sync_check(skew_ppm, contacts, seed=None):
+    """Compares host-reconstructed 'S' times against the simulator's ground truth for one clock skew"""
+    device = VirtualPrometheus(skew_ppm=skew_ppm, seed=seed)
+    read_banner(device)
+    assert p82.enable_board_timestamps(device), "timestamp mode not acknowledged"
+    sync = p82.BoardClockSync()
+    p82.test_arduino_latency(device, sync)
+
+    board_errors, arrival_errors = [], []
+    for i in range(contacts):
+        if i % 10 == 0:  # Periodic resync as done by LatencyTester during the idle phase
+            sync_round_trip(device, sync)
+        device.write(b'T')
+        assert device.read() == b'S'
+        arrival_us = time.perf_counter() * 1_000_000
+        board_us = int.from_bytes(device.read(4), "little")
+        truth_us = device.contacts_us[-1]
+        board_errors.append(sync.to_host_us(board_us) - truth_us)
+        arrival_errors.append(arrival_us - truth_us)
+        time.sleep(0.05)
+    return sync, board_errors, arrival_errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check board-timestamp clock sync against a simulated Prometheus 82")
+    parser.add_argument("--skew", type=float, nargs="+", default=[0.0, 50.0, -200.0], help="Board clock skew(s) in ppm")
+    parser.add_argument("--contacts", type=int, default=60, help="Simulated contacts per skew")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    for skew in args.skew:
+        sync, board_errors, arrival_errors = run_clock_sync_check(skew, args.contacts, args.seed)
+        print(f"\nSkew {skew:+.1f} ppm -> estimated {sync.drift_ppm:+.1f} ppm ({sync.samples} sync samples, {sync.rejected} rejected)")
+        print(f"  Board timestamps:  mean error {statistics.mean(board_errors):+8.1f} µs, max |error| {max(map(abs, board_errors)):7.1f} µs")
+        print(f"  Arrival timestamps: mean error {statistics.mean(arrival_errors):+8.1f} µs, max |error| {max(map(abs, arrival_errors)):7.1f} µs")
+
+
+if __name__ == "__main__":
+    main()